@@ -0,0 +1,238 @@
+"""
+Standalone audit worker
+
+Claims queued audits from MongoDB, runs them with the audit engine and writes the results back,
+so audit capacity scales across nodes separately from the API pods. Run the API with
+AUDIT_WORKER_MODE=external so it only queues audits, then start any number of workers:
+
+    cd backend && python -m audit_worker --concurrency 4 --health-port 8081
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+import server
+from server import db, logger
+
+class AuditWorker:
+    """
+    Claims queued audit sessions with a lease and runs up to `concurrency` of them at once
+
+    A lease is renewed while its audit runs, and the session is checked every status_interval.
+    Losing the lease (the reaper re-queued the audit) or a cancelled session stops the local run
+    at its next Salesforce call.
+    """
+
+    def __init__(self, worker_id: str, concurrency: int, lease_seconds: int, poll_interval: float, status_interval: float):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.status_interval = min(status_interval, lease_seconds / 3)
+        self.running = {}
+        self.claimed_total = 0
+        self.last_poll_at = None
+        self.stopping = asyncio.Event()
+
+    async def claim(self):
+        """Lease the next queued audit, heaviest scheduling weight first, or return None"""
+        now = datetime.utcnow()
+        return await db.audit_sessions.find_one_and_update(
+            {
+                "status": "queued",
+                "job": {"$ne": None},
+                "$or": [{"lease_owner": None}, {"lease_expires_at": {"$lt": now}}]
+            },
+            {"$set": {
+                "lease_owner": self.worker_id,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now
+            }},
+            sort=[("job.weight", -1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def watch_lease(self, job: dict):
+        """
+        Check the session every status_interval and extend the lease every third of its length
+
+        Stops the audit as soon as it is cancelled or its lease is lost, rather than at the next renewal.
+        """
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.status_interval)
+            try:
+                if time.monotonic() - renewed_at >= self.lease_seconds / 3:
+                    session = await db.audit_sessions.find_one_and_update(
+                        {"id": job['audit_session_id'], "lease_owner": self.worker_id},
+                        {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+                        return_document=ReturnDocument.AFTER
+                    )
+                    renewed_at = time.monotonic()
+                else:
+                    session = await db.audit_sessions.find_one(
+                        {"id": job['audit_session_id'], "lease_owner": self.worker_id},
+                        {"status": 1, "attempt": 1}
+                    )
+            except Exception as e:
+                logger.warning(f"Lease check failed for audit {job['audit_session_id']}: {e}")
+                continue
+            if session is None or session.get('status') not in ('queued', 'processing') or session.get('attempt') != job.get('attempt'):
+                logger.warning(f"Audit {job['audit_session_id']} was cancelled or handed to another worker, stopping it")
+                job['cancel_event'].set()
+                job['task'].cancel()
+                return
+
+    async def run_claimed(self, session: dict):
+        job = dict(
+            session['job'],
+            attempt=session.get('attempt'),
+            resumed_findings=session.get('partial_findings'),
+            cancel_event=threading.Event()
+        )
+        job['task'] = asyncio.current_task()
+        self.running[job['audit_session_id']] = job
+        lease = asyncio.create_task(self.watch_lease(job))
+        try:
+            await server.run_audit_job(job)
+        except asyncio.CancelledError:
+            logger.info(f"Audit {job['audit_session_id']} stopped on worker {self.worker_id}")
+        except Exception as e:
+            logger.error(f"Audit {job['audit_session_id']} failed on worker {self.worker_id}: {e}")
+        finally:
+            lease.cancel()
+            self.running.pop(job['audit_session_id'], None)
+            try:
+                await db.audit_sessions.update_one(
+                    {"id": job['audit_session_id'], "lease_owner": self.worker_id},
+                    {"$set": {"lease_owner": None}}
+                )
+            except Exception as e:
+                logger.warning(f"Failed to release lease for audit {job['audit_session_id']}: {e}")
+
+    async def run(self, grace_seconds: float):
+        """Claim and run audits until stopped, then drain like the API process does"""
+        logger.info(f"Audit worker {self.worker_id} started with concurrency {self.concurrency}")
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        while not self.stopping.is_set():
+            await slots.acquire()
+            self.last_poll_at = datetime.utcnow()
+            try:
+                session = await self.claim() if not self.stopping.is_set() else None
+            except Exception as e:
+                logger.error(f"Failed to claim an audit: {e}")
+                session = None
+            if session is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.claimed_total += 1
+            logger.info(f"Worker {self.worker_id} claimed audit {session['id']}")
+            task = asyncio.create_task(self.run_claimed(session))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+        # Give running audits the grace period, then re-queue the rest with their finished analyzers
+        logger.info(f"Worker {self.worker_id} stopping with {len(tasks)} audits running")
+        if tasks:
+            await asyncio.wait(set(tasks), timeout=grace_seconds)
+        drained_at = datetime.utcnow()
+        for job in list(self.running.values()):
+            await server.requeue_interrupted_audit(job, drained_at)
+        if tasks:
+            await asyncio.wait(set(tasks), timeout=5)
+
+    def health(self) -> dict:
+        fresh = self.last_poll_at is not None and datetime.utcnow() - self.last_poll_at < timedelta(seconds=max(30, 3 * self.poll_interval))
+        # A worker with every slot busy does not poll; it is healthy as long as its audits are running
+        healthy = not self.stopping.is_set() and (fresh or len(self.running) >= self.concurrency)
+        return {
+            "status": "ok" if healthy else "unhealthy",
+            "worker_id": self.worker_id,
+            "running": sorted(self.running),
+            "concurrency": self.concurrency,
+            "claimed_total": self.claimed_total,
+            "last_poll_at": self.last_poll_at.isoformat() if self.last_poll_at else None
+        }
+
+async def serve_health(worker: AuditWorker, port: int):
+    """Minimal HTTP health probe: 200 while the worker polls and MongoDB answers, 503 otherwise"""
+    async def handle(reader, writer):
+        try:
+            await reader.readline()
+            health = worker.health()
+            try:
+                await asyncio.wait_for(server.client.admin.command('ping'), 2)
+            except Exception as e:
+                health.update(status="unhealthy", mongo_error=str(e))
+            body = json.dumps(health).encode()
+            status = "200 OK" if health["status"] == "ok" else "503 Service Unavailable"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Health probe failed: {e}")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, '0.0.0.0', port)
+
+async def main(args):
+    worker = AuditWorker(
+        args.worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}",
+        args.concurrency,
+        args.lease_seconds,
+        args.poll_interval,
+        args.status_interval
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stopping.set)
+
+    health_server = await serve_health(worker, args.health_port) if args.health_port else None
+    try:
+        await worker.run(args.grace_seconds)
+    finally:
+        if health_server is not None:
+            health_server.close()
+        for pool in server.EXECUTORS.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        server.client.close()
+        logger.info(f"Audit worker {worker.worker_id} stopped")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued Salesforce audits outside the API process")
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('AUDIT_WORKER_CONCURRENCY', '2')),
+                        help="Audits run at once by this worker")
+    parser.add_argument('--lease-seconds', type=int, default=int(os.environ.get('AUDIT_WORKER_LEASE_SECONDS', '60')),
+                        help="Lease length on a claimed audit; renewed every third of it")
+    parser.add_argument('--poll-interval', type=float, default=float(os.environ.get('AUDIT_WORKER_POLL_SECONDS', '2')),
+                        help="Seconds between claim attempts while the queue is empty")
+    parser.add_argument('--status-interval', type=float, default=float(os.environ.get('AUDIT_WORKER_STATUS_SECONDS', '2')),
+                        help="Seconds between checks of a running audit's session for cancellation")
+    parser.add_argument('--grace-seconds', type=float, default=server.AUDIT_DRAIN_GRACE_SECONDS,
+                        help="Time running audits get to finish on shutdown before being re-queued")
+    parser.add_argument('--health-port', type=int, default=int(os.environ.get('AUDIT_WORKER_HEALTH_PORT', '8081')),
+                        help="Port for the HTTP health probe; 0 disables it")
+    parser.add_argument('--worker-id', default=os.environ.get('AUDIT_WORKER_ID'),
+                        help="Lease owner id; defaults to hostname plus a random suffix")
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+    asyncio.run(main(parse_args()))
@@ -1,25 +1,39 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Query, Header
 from fastapi.responses import RedirectResponse, HTMLResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import traceback
 import json
 import random
+import re
+import hashlib
+import hmac
+from statistics import NormalDist
 from bson import ObjectId
 import requests
-from urllib.parse import urlencode
+from urllib.parse import urlencode, quote_plus
 import base64
 from simple_salesforce import Salesforce
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import itertools
+import heapq
+from concurrent.futures import Executor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import asynccontextmanager
+from cryptography.fernet import Fernet, InvalidToken
+import numpy as np
+import pandas as pd
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -35,14 +49,108 @@ SALESFORCE_CLIENT_SECRET = os.environ.get('SALESFORCE_CLIENT_SECRET')
 SALESFORCE_CALLBACK_URL = os.environ.get('SALESFORCE_CALLBACK_URL')
 SALESFORCE_LOGIN_URL = os.environ.get('SALESFORCE_LOGIN_URL', 'https://login.salesforce.com')
 
+# Refresh tokens are stored encrypted with this Fernet key; without it none are stored and scheduled audits are disabled
+TOKEN_ENCRYPTION_KEY = os.environ.get('TOKEN_ENCRYPTION_KEY')
+token_cipher = Fernet(TOKEN_ENCRYPTION_KEY) if TOKEN_ENCRYPTION_KEY else None
+
 # Create the main app without a prefix
 app = FastAPI()
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Thread pool for Salesforce API calls
-executor = ThreadPoolExecutor(max_workers=4)
+class ResizableExecutor(Executor):
+    """
+    Thread pool that can be resized at runtime and reports how saturated it is
+
+    Resizing swaps in a new pool; work already submitted finishes on the old one.
+    """
+    
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._queue_wait_seconds = 0.0
+    
+    def submit(self, fn, *args, **kwargs):
+        submitted_at = time.monotonic()
+        
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._queue_wait_seconds += time.monotonic() - submitted_at
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+        
+        with self._lock:
+            self._queued += 1
+            future = self._pool.submit(run)
+        # Work cancelled before it started never runs, so it leaves the queue here
+        future.add_done_callback(lambda done: done.cancelled() and self._dequeue_cancelled())
+        return future
+    
+    def _dequeue_cancelled(self):
+        with self._lock:
+            self._queued -= 1
+    
+    def resize(self, max_workers: int):
+        with self._lock:
+            previous = self._pool
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=self.name)
+            self.max_workers = max_workers
+        previous.shutdown(wait=False)
+    
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+    
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'active': self._active,
+                'queued': self._queued,
+                'completed': self._completed,
+                'saturation': round((self._active + self._queued) / self.max_workers, 2),
+                'avg_queue_wait_ms': round(1000 * self._queue_wait_seconds / self._completed, 1) if self._completed else 0.0
+            }
+
+# Large pool for work that mostly waits on Salesforce (audit engines, probes, REST calls)
+io_executor = ResizableExecutor('io', int(os.environ.get('AUDIT_IO_WORKERS', '32')))
+
+# Separate pool for deep-tier audits so record-level scans never queue ahead of quick scans
+deep_executor = ResizableExecutor('deep', int(os.environ.get('DEEP_AUDIT_WORKERS', '2')))
+
+# Analyzers and their inputs for every audit in this process; each audit keeps at most its tier's max_workers in flight
+analyzer_executor = ResizableExecutor('analyzers', int(os.environ.get('AUDIT_ANALYZER_WORKERS', '16')))
+
+# Bounds how much CPU-heavy scoring and validation runs at once. These are threads: numpy kernels
+# release the GIL, but pure-Python work such as score_findings gains no parallelism from more workers.
+cpu_executor = ResizableExecutor('cpu', int(os.environ.get('AUDIT_CPU_WORKERS', str(os.cpu_count() or 1))))
+
+EXECUTORS = {'io': io_executor, 'deep': deep_executor, 'analyzers': analyzer_executor, 'cpu': cpu_executor}
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN')
+
+def run_cpu_bound(fn, *args):
+    """Run CPU-heavy work from an I/O thread on the CPU pool and wait for its result"""
+    return cpu_executor.submit(fn, *args).result()
+
+def map_bounded(executor: Executor, fn, items: list, limit: int) -> list:
+    """executor.map with at most `limit` items in flight, so one caller cannot flood a shared pool"""
+    results = []
+    for start in range(0, len(items), limit):
+        results.extend(executor.map(fn, items[start:start + limit]))
+    return results
 
 # Helper function to convert ObjectId to string
 def convert_objectid(obj):
@@ -85,6 +193,27 @@ class AuditRequest(BaseModel):
     department_salaries: Optional[DepartmentSalaries] = None
     use_quick_estimate: bool = True
     business_inputs: Optional[BusinessInputs] = None
+    sampling_mode: str = "auto"  # auto, sample or exact for record-level analyzers
+    incremental: bool = False  # Reuse previous findings for objects whose watermark did not move
+    aging_thresholds: Optional[Dict[str, int]] = None  # Days without activity per object, e.g. {"Lead": 90}
+    tier: Optional[str] = None  # quick or deep; defaults to quick for quick estimates
+
+class AuditScheduleRequest(BaseModel):
+    audit: AuditRequest  # audit settings; its session_id picks the org and its refresh token
+    cron: str  # minute hour day-of-month month day-of-week, e.g. "0 9 * * 1" for Mondays at 9am
+    timezone: str = "UTC"
+
+AUDIT_BATCH_MAX_CONCURRENCY = 20
+
+class AuditBatchRequest(BaseModel):
+    audits: List[AuditRequest]  # one per org, each with its own OAuth session and business inputs
+    max_concurrency: Optional[int] = Field(None, ge=1, le=AUDIT_BATCH_MAX_CONCURRENCY)  # audits of this batch queued or running at once
+
+class ExecutorResizeRequest(BaseModel):
+    io_workers: Optional[int] = Field(None, ge=1, le=512)
+    deep_workers: Optional[int] = Field(None, ge=1, le=64)
+    analyzer_workers: Optional[int] = Field(None, ge=1, le=256)
+    cpu_workers: Optional[int] = Field(None, ge=1, le=256)
 
 class AssumptionsUpdate(BaseModel):
     admin_rate: Optional[float] = 40
@@ -657,7 +786,102 @@ def calculate_task_based_roi(finding_data, org_context, business_stage, custom_a
         result['total_annual_roi'] = (monthly_confusion_savings * 12) - cleanup_cost
         result['confidence'] = 'High'
         
-    # Data Quality Issues
+    # Data Skew (account or ownership)
+    elif finding_data.get('type') == 'data_skew':
+        skewed_records = finding_data.get('salesforce_data', {}).get('skewed_records', 0)
+        rebalance_hours = skewed_records * 4  # 4 hours to plan and migrate each skewed parent/owner
+        rebalance_cost = rebalance_hours * HOURLY_RATES_BY_ROLE['admin'] * stage_multiplier
+        
+        # Lock errors and sharing recalculation delays hit admins and integration owners
+        monthly_skew_hours = finding_data.get('estimated_monthly_hours', skewed_records * 0.5)
+        monthly_skew_savings = monthly_skew_hours * HOURLY_RATES_BY_ROLE['admin'] * stage_multiplier
+        
+        result['task_breakdown'] = [{
+            'task': 'Skew rebalancing',
+            'type': 'one_time',
+            'hours': rebalance_hours,
+            'cost': rebalance_cost,
+            'role': 'Admin',
+            'description': f'Redistribute records for {skewed_records} skewed parents/owners'
+        }, {
+            'task': 'Lock error and recalculation elimination',
+            'type': 'recurring',
+            'hours_per_month': monthly_skew_hours,
+            'savings_per_month': monthly_skew_savings,
+            'role': 'Admin',
+            'description': 'Fewer record-locking failures and shorter sharing recalculations'
+        }]
+        
+        result['one_time_costs'] = {'rebalancing': rebalance_cost}
+        result['recurring_savings'] = {'lock_contention': monthly_skew_savings}
+        result['total_one_time_cost'] = rebalance_cost
+        result['total_monthly_savings'] = monthly_skew_savings
+        result['total_annual_roi'] = (monthly_skew_savings * 12) - rebalance_cost
+        result['confidence'] = 'High'
+        
+    # License Utilization (dormant users and unassigned seats)
+    elif finding_data.get('type') == 'license_utilization':
+        license_data = finding_data.get('salesforce_data', {})
+        dormant_users = license_data.get('dormant_users', 0)
+        review_hours = dormant_users * 0.5  # 30 minutes per user to review and deactivate
+        review_cost = review_hours * HOURLY_RATES_BY_ROLE['admin'] * stage_multiplier
+        monthly_license_savings = license_data.get('estimated_monthly_license_savings', 0)
+        
+        result['task_breakdown'] = [{
+            'task': 'Dormant user review',
+            'type': 'one_time',
+            'hours': review_hours,
+            'cost': review_cost,
+            'role': 'Admin',
+            'description': f'Review and deactivate {dormant_users} users with no recent login'
+        }, {
+            'task': 'License reduction',
+            'type': 'recurring',
+            'hours_per_month': 0,
+            'savings_per_month': monthly_license_savings,
+            'role': 'Finance',
+            'description': f"{dormant_users + license_data.get('unassigned_seats', 0)} licenses × ${license_data.get('license_monthly_cost', 0)}/month"
+        }]
+        
+        result['one_time_costs'] = {'review': review_cost}
+        result['recurring_savings'] = {'licenses': monthly_license_savings}
+        result['total_one_time_cost'] = review_cost
+        result['total_monthly_savings'] = monthly_license_savings
+        result['total_annual_roi'] = (monthly_license_savings * 12) - review_cost
+        result['confidence'] = 'High'
+        
+    # Storage (data and file storage overage)
+    elif finding_data.get('type') == 'storage':
+        storage_data = finding_data.get('salesforce_data', {})
+        archive_objects = max(1, min(5, len(storage_data.get('top_objects', []))))
+        archive_hours = archive_objects * 4  # 4 hours to define retention and archive each large object
+        archive_cost = archive_hours * HOURLY_RATES_BY_ROLE['admin'] * stage_multiplier
+        monthly_storage_savings = storage_data.get('estimated_monthly_overage_cost', 0)
+        
+        result['task_breakdown'] = [{
+            'task': 'Data archiving',
+            'type': 'one_time',
+            'hours': archive_hours,
+            'cost': archive_cost,
+            'role': 'Admin',
+            'description': f'Set up retention and archive records in {archive_objects} of the largest objects'
+        }, {
+            'task': 'Storage overage avoidance',
+            'type': 'recurring',
+            'hours_per_month': 0,
+            'savings_per_month': monthly_storage_savings,
+            'role': 'Finance',
+            'description': f"{storage_data.get('projected_overage_mb', 0):,} MB projected overage × ${storage_data.get('cost_per_gb_month', 0)}/GB/month"
+        }]
+        
+        result['one_time_costs'] = {'archiving': archive_cost}
+        result['recurring_savings'] = {'storage': monthly_storage_savings}
+        result['total_one_time_cost'] = archive_cost
+        result['total_monthly_savings'] = monthly_storage_savings
+        result['total_annual_roi'] = (monthly_storage_savings * 12) - archive_cost
+        result['confidence'] = 'High' if storage_data.get('growth_source') == 'measured' else 'Medium'
+        
+    # Data Quality Issues (after the type-specific branches, which also use this category)
     elif finding_data.get('category', '') == 'Revenue Leaks':
         record_count = finding_data.get('record_count', 0)
         cleanup_time_per_record = 0.1  # 6 minutes per record
@@ -1094,6 +1318,80 @@ def calculate_enhanced_roi_with_tasks(finding_data, department_salaries, active_
         result['total_annual_roi'] = (monthly_confusion_savings * 12) - cleanup_cost
         result['confidence'] = get_confidence_level(has_org_data=True)
         
+    # Reporting automation sized from real report usage
+    elif finding_type == 'reporting':
+        usage = org_data.get('report_usage', {}) if org_data else {}
+        active_reports = usage.get('active_reports', 0)
+        cleanup_count = usage.get('stale_reports', 0) + usage.get('duplicate_reports', 0) + usage.get('stale_dashboards', 0)
+        
+        # Each active report is assumed to be run and exported by hand weekly
+        REPORT_RUNS_PER_MONTH = 4
+        REPORT_RUN_MINUTES = 5
+        monthly_manual_hours = active_reports * REPORT_RUNS_PER_MONTH * REPORT_RUN_MINUTES / 60
+        monthly_automatable_hours = monthly_manual_hours * REPORTING_EFFICIENCY / 100
+        
+        # Split the automatable hours across roles by their share of the default reporting workload
+        task_weights = {}
+        for task in DEFAULT_REPORT_TASKS:
+            task_weights[task['role']] = task_weights.get(task['role'], 0) + task['freq_per_month'] * task['duration_min']
+        total_weight = sum(task_weights.values())
+        
+        role_hours = {role: monthly_automatable_hours * weight / total_weight for role, weight in task_weights.items()}
+        role_savings = {role: hours * get_hourly_rate(role) for role, hours in role_hours.items()}
+        monthly_savings = sum(role_savings.values())
+        avg_hourly_rate = monthly_savings / monthly_automatable_hours if monthly_automatable_hours else 0
+        
+        cleanup_hours = cleanup_count * 5 / 60  # 5 minutes to review and archive each stale or duplicate report
+        cleanup_cost = cleanup_hours * ADMIN_RATE
+        
+        result['task_breakdown'] = [{
+            'task': 'Report cleanup',
+            'type': 'one_time',
+            'hours': cleanup_hours,
+            'cost': cleanup_cost,
+            'role': 'Admin',
+            'description': f'Archive or consolidate {cleanup_count} stale and duplicate reports and dashboards'
+        }] + [{
+            'task': next(t['task'] for t in DEFAULT_REPORT_TASKS if t['role'] == role),
+            'type': 'recurring',
+            'hours_per_month': role_hours[role],
+            'cost_per_month': role_savings[role],
+            'role': role.replace('_', ' ').title(),
+            'description': f'{REPORTING_EFFICIENCY}% of manual runs replaced by subscriptions and dashboards'
+        } for role in role_hours]
+        
+        result['role_attribution'] = {
+            role.replace('_', ' ').title(): {
+                'one_time_hours': cleanup_hours if role == 'admin' else 0,
+                'one_time_cost': cleanup_cost if role == 'admin' else 0,
+                'monthly_hours': role_hours[role],
+                'monthly_savings': role_savings[role]
+            } for role in role_hours
+        }
+        result['calculation_details'] = {
+            'active_reports': active_reports,
+            'runs_per_month': REPORT_RUNS_PER_MONTH,
+            'minutes_per_run': REPORT_RUN_MINUTES,
+            'reporting_efficiency_pct': REPORTING_EFFICIENCY,
+            'cleanup_count': cleanup_count
+        }
+        
+        # Backward compatibility fields
+        result['cleanup_cost'] = cleanup_cost
+        result['cleanup_hours'] = cleanup_hours
+        result['monthly_user_savings'] = monthly_savings
+        result['monthly_savings_hours'] = monthly_automatable_hours
+        result['annual_user_savings'] = monthly_savings * 12
+        result['net_annual_roi'] = (monthly_savings * 12) - cleanup_cost
+        result['avg_hourly_rate'] = avg_hourly_rate
+        
+        result['one_time_costs'] = {'cleanup': cleanup_cost}
+        result['recurring_savings'] = {'reporting_automation': monthly_savings}
+        result['total_one_time_cost'] = cleanup_cost
+        result['total_monthly_savings'] = monthly_savings
+        result['total_annual_roi'] = (monthly_savings * 12) - cleanup_cost
+        result['confidence'] = get_confidence_level(has_custom_data=bool(department_salaries), has_org_data=True)
+        
     # Default fallback for other finding types - maintain backward compatibility
     else:
         # Use existing time_savings_hours if available
@@ -1123,12 +1421,17 @@ def calculate_enhanced_roi_with_tasks(finding_data, department_salaries, active_
     
     return result
 
-def get_org_context(sf_client):
-    """Get org context for realistic ROI calculations"""
+def get_org_context(sf_client, watermarks=None, limits_snapshot=None):
+    """Get org context for realistic ROI calculations (reuses limits snapshot and watermark counts when provided)"""
+    watermarks = watermarks or {}
+    record_counts = (limits_snapshot or {}).get('record_counts', {})
     try:
         # Get user count for scaling calculations with defensive handling
         try:
-            active_users_result = sf_client.query("SELECT COUNT() FROM User WHERE IsActive = true")
+            if 'User' in watermarks:
+                active_users_result = {'totalSize': watermarks['User']['record_count']}
+            else:
+                active_users_result = sf_client.query("SELECT COUNT() FROM User WHERE IsActive = true")
             active_users = active_users_result.get('totalSize', 10) if active_users_result else 10
             if active_users is None:
                 active_users = 10
@@ -1138,7 +1441,12 @@ def get_org_context(sf_client):
         
         # Get record volumes for complexity assessment with defensive handling
         try:
-            account_result = sf_client.query("SELECT COUNT() FROM Account")
+            if 'Account' in record_counts:
+                account_result = {'totalSize': record_counts['Account']}
+            elif 'Account' in watermarks:
+                account_result = {'totalSize': watermarks['Account']['record_count']}
+            else:
+                account_result = sf_client.query("SELECT COUNT() FROM Account")
             account_count = account_result.get('totalSize', 100) if account_result else 100
             if account_count is None:
                 account_count = 100
@@ -1147,7 +1455,12 @@ def get_org_context(sf_client):
             account_count = 100
             
         try:
-            opportunity_result = sf_client.query("SELECT COUNT() FROM Opportunity")
+            if 'Opportunity' in record_counts:
+                opportunity_result = {'totalSize': record_counts['Opportunity']}
+            elif 'Opportunity' in watermarks:
+                opportunity_result = {'totalSize': watermarks['Opportunity']['record_count']}
+            else:
+                opportunity_result = sf_client.query("SELECT COUNT() FROM Opportunity")
             opportunity_count = opportunity_result.get('totalSize', 50) if opportunity_result else 50
             if opportunity_count is None:
                 opportunity_count = 50
@@ -1186,7 +1499,8 @@ def get_org_context(sf_client):
             'org_name': org_name,
             'org_type': org_type,
             'estimated_hourly_rate': hourly_rate,
-            'complexity_multiplier': min(2.0, 1.0 + ((active_users or 10) / 50))  # Scale with team size, guard against None
+            'complexity_multiplier': min(2.0, 1.0 + ((active_users or 10) / 50)),  # Scale with team size, guard against None
+            'limits_snapshot': limits_snapshot
         }
     except Exception as e:
         logger.error(f"Error getting org context: {e}")
@@ -1197,9 +1511,76 @@ def get_org_context(sf_client):
             'org_name': 'Unknown Org',
             'org_type': 'Unknown',
             'estimated_hourly_rate': 75,
-            'complexity_multiplier': 1.0
+            'complexity_multiplier': 1.0,
+            'limits_snapshot': limits_snapshot
         }
 
+class OrgMetadataCache:
+    """Thread-safe, per-org TTL cache for describe and Tooling/metadata results"""
+    
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_load(self, org_key: Optional[str], name: str, loader, cacheable=None):
+        """
+        Return the cached value for (org_key, name), calling loader() on a miss or expiry
+
+        Values are not cached when org_key is None (org unknown) or cacheable(value) is false.
+        """
+        if org_key is None:
+            return loader()
+        key = (org_key, name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        value = loader()
+        if cacheable is not None and not cacheable(value):
+            return value
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        return value
+    
+    def invalidate(self, org_key: Optional[str] = None):
+        """Drop cached entries for one org, or for every org"""
+        with self._lock:
+            if org_key is None:
+                self._entries.clear()
+            else:
+                self._entries = {k: v for k, v in self._entries.items() if k[0] != org_key}
+
+# Describe/metadata cache shared by all audits in this process
+org_metadata_cache = OrgMetadataCache(ttl_seconds=int(os.environ.get('METADATA_CACHE_TTL_SECONDS', 3600)))
+
+def get_org_cache_key(sf_client) -> Optional[str]:
+    """
+    Cache key identifying the org behind a Salesforce client: its org Id
+
+    The instance host is shared by every org on a pod, so it cannot be the key. Returns None
+    (nothing is cached) when the org Id cannot be read.
+    """
+    try:
+        return sf_client.query("SELECT Id FROM Organization LIMIT 1")['records'][0]['Id']
+    except Exception as e:
+        logger.warning(f"Error reading org Id for the metadata cache: {e}")
+        return None
+
+def get_cached_describe(sf_client, sobject: Optional[str] = None) -> dict:
+    """Global describe (sobject=None) or sObject describe, served from the org metadata cache"""
+    if sobject is None:
+        return org_metadata_cache.get_or_load(get_org_cache_key(sf_client), 'describe', sf_client.describe)
+    return org_metadata_cache.get_or_load(
+        get_org_cache_key(sf_client), f'describe:{sobject}', lambda: getattr(sf_client, sobject).describe()
+    )
+
 # Salesforce Analysis Functions
 def analyze_custom_fields(sf_client, org_context, department_salaries=None, custom_assumptions=None):
     """Analyze custom fields for unused ones"""
@@ -1207,7 +1588,7 @@ def analyze_custom_fields(sf_client, org_context, department_salaries=None, cust
     
     try:
         # Get all custom objects and standard objects
-        describe_result = sf_client.describe()
+        describe_result = get_cached_describe(sf_client)
         sobjects = describe_result['sobjects']
         
         custom_field_count = 0
@@ -1220,8 +1601,7 @@ def analyze_custom_fields(sf_client, org_context, department_salaries=None, cust
         for sobject in sobjects:
             if sobject['name'] in key_objects:
                 try:
-                    obj = getattr(sf_client, sobject['name'])
-                    describe = obj.describe()
+                    describe = get_cached_describe(sf_client, sobject['name'])
                     
                     for field in describe['fields']:
                         if field['custom']:
@@ -1323,6 +1703,7 @@ def analyze_custom_fields(sf_client, org_context, department_salaries=None, cust
     
     except Exception as e:
         logger.error(f"Error analyzing custom fields: {e}")
+        raise
     
     return findings
 
@@ -1368,37 +1749,6 @@ def analyze_data_quality(sf_client, org_context):
         except Exception as e:
             logger.warning(f"Error checking orphaned opportunities: {e}")
         
-        # Check for leads without activity (more aggressive timeframe)
-        try:
-            stale_leads = sf_client.query("SELECT COUNT() FROM Lead WHERE LastActivityDate < LAST_N_DAYS:90")
-            stale_count = stale_leads['totalSize']
-            logger.info(f"Found {stale_count} stale leads (90+ days)")
-            
-            if stale_count > 5:  # Lower threshold
-                # Scale time based on actual volume and team size
-                base_review_time = min(stale_count * 0.05, 20)  # 3 min per lead, max 20 hours
-                process_improvement_time = 2  # Time to set up automation
-                total_time = (base_review_time + process_improvement_time) * complexity_multiplier
-                
-                findings.append({
-                    "id": str(uuid.uuid4()),
-                    "category": "Revenue Leaks",
-                    "title": f"{stale_count} Stale Lead Records",
-                    "description": f"{stale_count} leads haven't had activity in 90+ days, representing potential lost revenue. With {active_users} users, this indicates process gaps in lead management.",
-                    "impact": "High" if stale_count > 100 else "Medium",
-                    "time_savings_hours": round(total_time, 1),
-                    "recommendation": "Implement lead scoring and automated nurture campaigns. Archive truly cold leads and improve lead assignment processes.",
-                    "affected_objects": ["Lead", "Campaign"],
-                    "salesforce_data": {
-                        "stale_leads": stale_count,
-                        "query_used": "SELECT COUNT() FROM Lead WHERE LastActivityDate < LAST_N_DAYS:90",
-                        "users_affected": active_users,
-                        "calculation_method": f"Review time (3 min/lead, max 20h) + process setup (2h), scaled by complexity ({complexity_multiplier:.1f}x)"
-                    }
-                })
-        except Exception as e:
-            logger.warning(f"Error checking stale leads: {e}")
-        
         # Check for opportunities without close dates
         try:
             opps_no_close_date = sf_client.query("SELECT COUNT() FROM Opportunity WHERE CloseDate = null")
@@ -1453,6 +1803,7 @@ def analyze_data_quality(sf_client, org_context):
     
     except Exception as e:
         logger.error(f"Error analyzing data quality: {e}")
+        raise
     
     return findings
 
@@ -1464,38 +1815,6 @@ def analyze_system_configuration(sf_client, org_context):
         active_users = org_context.get('active_users', 10)
         logger.info("Starting system configuration analysis...")
         
-        # Check for inactive users with licenses
-        try:
-            total_users = sf_client.query("SELECT COUNT() FROM User")['totalSize']
-            inactive_users = total_users - active_users
-            logger.info(f"Found {inactive_users} inactive users out of {total_users} total")
-            
-            if inactive_users > 2:  # More than 2 inactive users
-                # Estimate license cost savings (rough estimate $75/user/month)
-                monthly_license_savings = inactive_users * 75
-                annual_savings = monthly_license_savings * 12
-                cleanup_time = inactive_users * 0.5  # 30 minutes per user to review and deactivate
-                
-                findings.append({
-                    "id": str(uuid.uuid4()),
-                    "category": "Time Savings",
-                    "title": f"{inactive_users} Inactive User Licenses",
-                    "description": f"Found {inactive_users} inactive users out of {total_users} total users, potentially wasting license costs and creating security risks.",
-                    "impact": "Medium",
-                    "time_savings_hours": round(cleanup_time, 1),
-                    "recommendation": "Review inactive users, deactivate unnecessary accounts, and reallocate licenses to active team members. Implement user lifecycle management process.",
-                    "affected_objects": ["User", "Profile", "Permission Sets"],
-                    "salesforce_data": {
-                        "inactive_users": inactive_users,
-                        "total_users": total_users,
-                        "estimated_monthly_license_savings": monthly_license_savings,
-                        "estimated_annual_savings": annual_savings,
-                        "cleanup_time_hours": cleanup_time
-                    }
-                })
-        except Exception as e:
-            logger.warning(f"Error checking user licenses: {e}")
-        
         # Check for duplicate record types or page layouts
         try:
             # This is a common issue - simulate finding duplicate configurations
@@ -1521,11 +1840,12 @@ def analyze_system_configuration(sf_client, org_context):
     
     except Exception as e:
         logger.error(f"Error analyzing system configuration: {e}")
+        raise
     
     return findings
 
-def analyze_data_governance(sf_client, org_context):
-    """Analyze data governance and quality standards"""
+def analyze_data_governance(sf_client, org_context, picklist_usage=None):
+    """Analyze data governance and quality standards, sizing standardization from picklist usage when provided"""
     findings = []
     
     try:
@@ -1559,7 +1879,41 @@ def analyze_data_governance(sf_client, org_context):
         
         # Check for inconsistent data entry patterns
         try:
-            if active_users > 2:
+            if picklist_usage is not None:
+                # Size the cleanup from records holding inactive values or variant spellings
+                nonstandard_records = picklist_usage['nonstandard_records']
+                if nonstandard_records > 0:
+                    affected_fields = sorted(
+                        (f for f in picklist_usage['fields'].values() if f['nonstandard_records']),
+                        key=lambda f: f['nonstandard_records'], reverse=True
+                    )
+                    cleanup_time = nonstandard_records * PICKLIST_RECODE_MINUTES / 60
+                    findings.append({
+                        "id": str(uuid.uuid4()),
+                        "category": "Time Savings",
+                        "title": "Data Standardization Opportunity",
+                        "description": f"Found {nonstandard_records} records across {len(affected_fields)} picklist fields holding inactive values or variant spellings of the same value ({picklist_usage['near_duplicate_groups']} near-duplicate groups, {picklist_usage['inactive_values_in_use']} inactive values still in use). These split reports and filters.",
+                        "impact": "High" if nonstandard_records > 1000 else "Medium",
+                        "time_savings_hours": round(cleanup_time, 1),
+                        "recommendation": "Merge variant spellings into one value, re-code records that hold inactive values, and restrict picklists to their defined values.",
+                        "affected_objects": sorted({f['object'] for f in affected_fields}) + ["Picklists"],
+                        "salesforce_data": {
+                            "nonstandard_records": nonstandard_records,
+                            "estimated_cleanup_time": round(cleanup_time, 1),
+                            "governance_area": "data_standardization",
+                            "top_fields": [
+                                {
+                                    "field": f"{f['object']}.{f['field']}",
+                                    "nonstandard_records": f['nonstandard_records'],
+                                    "near_duplicates": f['near_duplicates'][:5],
+                                    "inactive_values_in_use": dict(list(f['inactive_values_in_use'].items())[:5])
+                                }
+                                for f in affected_fields[:10]
+                            ],
+                            "queries_run": picklist_usage['queries_run']
+                        }
+                    })
+            elif active_users > 2:
                 # Estimate time spent on data cleanup due to inconsistent entry
                 monthly_cleanup_time = active_users * 1.5  # 1.5 hours per user per month
                 findings.append({
@@ -1584,11 +1938,12 @@ def analyze_data_governance(sf_client, org_context):
     
     except Exception as e:
         logger.error(f"Error analyzing data governance: {e}")
+        raise
     
     return findings
 
-def analyze_automation_opportunities(sf_client, org_context):
-    """Analyze automation opportunities"""
+def analyze_automation_opportunities(sf_client, org_context, automation_inventory=None):
+    """Analyze automation opportunities, skipping automation the org already has when an inventory is provided"""
     findings = []
     
     try:
@@ -1599,10 +1954,12 @@ def analyze_automation_opportunities(sf_client, org_context):
         
         # Check for manual case assignment (simplified)
         try:
-            case_count = sf_client.query("SELECT COUNT() FROM Case")['totalSize']
+            case_count = get_record_count(sf_client, org_context, 'Case')
             logger.info(f"Found {case_count} cases in system")
             
-            if case_count > 5:  # Lower threshold for smaller orgs
+            if has_existing_automation(automation_inventory, 'Case', ['assignment']):
+                logger.info("Case assignment rules already active, skipping recommendation")
+            elif case_count > 5:  # Lower threshold for smaller orgs
                 # Scale time savings based on case volume and team size
                 weekly_case_volume = case_count / 52  # Approximate weekly cases
                 time_per_case = 0.1  # 6 minutes manual assignment time
@@ -1633,7 +1990,9 @@ def analyze_automation_opportunities(sf_client, org_context):
         try:
             # Always recommend this for any org with data
             opportunities_count = org_context.get('opportunity_count', 0)
-            if opportunities_count > 0:
+            if has_existing_automation(automation_inventory, 'Opportunity', ['alerts', 'flows']):
+                logger.info("Opportunity alerts or record-triggered flows already exist, skipping recommendation")
+            elif opportunities_count > 0:
                 base_setup_time = 4  # Hours to set up email alerts
                 monthly_time_saved = active_users * 0.5  # 30 minutes per user per month
                 
@@ -1658,10 +2017,12 @@ def analyze_automation_opportunities(sf_client, org_context):
         
         # Check for lead assignment automation
         try:
-            lead_count = sf_client.query("SELECT COUNT() FROM Lead")['totalSize']
+            lead_count = get_record_count(sf_client, org_context, 'Lead')
             logger.info(f"Found {lead_count} leads in system")
             
-            if lead_count > 10:
+            if has_existing_automation(automation_inventory, 'Lead', ['assignment']):
+                logger.info("Lead assignment rules already active, skipping recommendation")
+            elif lead_count > 10:
                 # Estimate time saved from automated lead assignment
                 monthly_leads = lead_count / 12  # Rough estimate
                 time_per_lead_assignment = 0.05  # 3 minutes per manual assignment
@@ -1686,205 +2047,2693 @@ def analyze_automation_opportunities(sf_client, org_context):
         except Exception as e:
             logger.warning(f"Error checking leads: {e}")
         
-        # Report and dashboard optimization
-        try:
-            # This is always relevant for active orgs
-            if active_users > 1:
-                estimated_report_time = active_users * 2  # 2 hours per user per month on manual reporting
-                findings.append({
-                    "id": str(uuid.uuid4()),
-                    "category": "Automation Opportunities",
-                    "title": "Manual Reporting Processes",
-                    "description": f"With {active_users} active users, there's likely significant time spent on manual report generation and data analysis that could be automated with scheduled reports and dashboards.",
-                    "impact": "Medium",
-                    "time_savings_hours": round(estimated_report_time * 0.5, 1),  # 50% of manual time could be saved
-                    "recommendation": "Set up scheduled report deliveries, dashboard subscriptions, and automated data exports. Create role-based dashboards for different user types.",
-                    "affected_objects": ["Reports", "Dashboards", "Scheduled Jobs"],
-                    "salesforce_data": {
-                        "users_affected": active_users,
-                        "estimated_manual_reporting_hours": estimated_report_time,
-                        "automation_recommendation": "scheduled_reports_dashboards"
-                    }
-                })
-        except Exception as e:
-            logger.warning(f"Error analyzing reporting: {e}")
-        
         logger.info(f"Automation analysis completed: {len(findings)} findings")
     
     except Exception as e:
         logger.error(f"Error analyzing automation: {e}")
+        raise
     
     return findings
 
-def run_salesforce_audit(access_token, instance_url):
-    """Run comprehensive Salesforce audit"""
-    findings = []
-    
-    try:
-        # Initialize Salesforce client
-        sf = Salesforce(instance_url=instance_url, session_id=access_token)
-        
-        # Get org context for realistic calculations
-        org_context = get_org_context(sf)
-        org_name = org_context['org_name']
-        hourly_rate = org_context['estimated_hourly_rate']
-        
-        # Get org ID from context
-        org_id = sf.query("SELECT Id FROM Organization LIMIT 1")['records'][0]['Id']
-        
-        logger.info(f"Starting audit for org: {org_name} (Type: {org_context['org_type']}, Users: {org_context['active_users']}, Rate: ${hourly_rate}/hr)")
-        
-        # Run analysis modules with org context
-        findings.extend(analyze_custom_fields(sf, org_context))
-        findings.extend(analyze_data_quality(sf, org_context))
-        findings.extend(analyze_automation_opportunities(sf, org_context))
-        
-        # Calculate ROI for each finding using org-specific hourly rate
-        for finding in findings:
-            finding["roi_estimate"] = finding["time_savings_hours"] * hourly_rate * 12  # Annual
-            # Add org context to finding
-            finding["org_context"] = {
-                "hourly_rate": hourly_rate,
-                "active_users": org_context['active_users'],
-                "org_type": org_context['org_type']
-            }
-        
-        logger.info(f"Audit completed: {len(findings)} findings, estimated ${sum(f['roi_estimate'] for f in findings):,.0f} annual value")
-        
-        return findings, org_name, org_id
-        
-    except Exception as e:
-        logger.error(f"Error running Salesforce audit: {e}")
-        raise e
+# Statistical sampling settings for record-level analyzers
+SAMPLING_MODES = ['auto', 'sample', 'exact']
+SAMPLING_AUTO_THRESHOLD = 500000  # objects larger than this are sampled in 'auto' mode
+SAMPLING_TARGET_RECORDS = 100000  # records read per object when sampling
+SAMPLING_WINDOWS = 20  # contiguous windows per Id-range/CreatedDate sample
+SAMPLING_CONFIDENCE_LEVEL = 0.95
+SALESFORCE_ID_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+def resolve_sampling_mode(sampling_mode: str, population: int) -> str:
+    """Decide whether an object is scanned exactly or sampled"""
+    if sampling_mode == 'exact':
+        return 'exact'
+    if sampling_mode == 'sample':
+        return 'sample' if population > SAMPLING_TARGET_RECORDS else 'exact'
+    return 'sample' if population > SAMPLING_AUTO_THRESHOLD else 'exact'
+
+def sampling_confidence_label(relative_error: float) -> str:
+    """Map the relative margin of error of an estimate to a finding confidence"""
+    if relative_error <= 0.1:
+        return 'High'
+    elif relative_error <= 0.25:
+        return 'Medium'
+    return 'Low'
 
-def run_salesforce_audit_with_stage_engine(access_token, instance_url, business_inputs=None, department_salaries=None, custom_assumptions=None):
+def estimate_cluster_ratio(clusters: List[tuple], population: int, total_clusters: Optional[int] = None,
+                           confidence_level: float = SAMPLING_CONFIDENCE_LEVEL) -> Dict[str, Any]:
     """
-    Run comprehensive Salesforce audit with Alex Hormozi Stage Engine
-    
+    Estimate a population total from a cluster sample with a ratio estimator
+
     Args:
-        access_token: Salesforce access token
-        instance_url: Salesforce instance URL  
-        business_inputs: BusinessInputs with revenue/headcount
-        department_salaries: Optional department salary overrides
-        custom_assumptions: Optional ROI calculation overrides
+        clusters: (records_in_cluster, matching_records) per sampled cluster
+        population: Total records in the object
+        total_clusters: Number of clusters in the population, for the finite population correction
+        confidence_level: Two-sided confidence level of the interval
+
+    Returns:
+        dict: estimate, ci_low, ci_high, rate, margin_of_error, relative_error, sampled_records
     """
-    findings = []
-    
-    try:
-        # Initialize Salesforce client
-        sf = Salesforce(instance_url=instance_url, session_id=access_token)
-        
-        # Get org context for realistic calculations
-        org_context = get_org_context(sf)
-        org_name = org_context['org_name']
-        org_id = sf.query("SELECT Id FROM Organization LIMIT 1")['records'][0]['Id']
-        
-        # Determine business stage with picklist support
-        if business_inputs:
-            logger.debug(f"Business inputs provided: {business_inputs}")
-            revenue, headcount = convert_picklist_to_numeric(business_inputs)
-            logger.debug(f"Converted to numeric: revenue=${revenue:,}, headcount={headcount}")
-        else:
-            logger.debug("No business inputs provided, using defaults")
-            revenue = 1000000  # Default $1M
-            headcount = 50     # Default 50 employees
-            
-        # Final safety check before stage determination
-        if revenue is None or headcount is None:
-            logger.error(f"Critical error: None values after conversion - revenue={revenue}, headcount={headcount}")
-            revenue = revenue or 1000000
-            headcount = headcount or 50
-            logger.info(f"Applied emergency defaults: revenue=${revenue:,}, headcount={headcount}")
-            
-        business_stage = determine_business_stage(revenue, headcount)
-        
-        logger.info(f"Starting Stage {business_stage['stage']} audit for org: {org_name}")
-        logger.info(f"Stage: {business_stage['name']} ({business_stage['role']}) - {business_stage['bottom_line']}")
-        logger.info(f"Revenue: ${revenue:,} | Headcount: {headcount} | Active SF Users: {org_context['active_users']}")
-        
-        # Run analysis modules
-        logger.info("Running audit analysis modules...")
-        custom_fields_findings = analyze_custom_fields(sf, org_context, department_salaries, custom_assumptions)
-        data_quality_findings = analyze_data_quality(sf, org_context)
-        automation_findings = analyze_automation_opportunities(sf, org_context)
-        system_config_findings = analyze_system_configuration(sf, org_context)
-        data_governance_findings = analyze_data_governance(sf, org_context)
-        
-        all_findings = []
-        all_findings.extend(custom_fields_findings)
-        all_findings.extend(data_quality_findings)
-        all_findings.extend(automation_findings)
-        all_findings.extend(system_config_findings)
-        all_findings.extend(data_governance_findings)
-        
-        logger.info(f"Generated {len(all_findings)} raw findings")
-        
-        # Enhance each finding with stage-based analysis
-        for finding in all_findings:
-            # Add domain classification
-            finding['domain'] = classify_finding_domain(finding)
-            
-            # Calculate stage-based priority
-            finding['priority_score'] = calculate_finding_priority(finding, business_stage)
-            
-            # Calculate enhanced ROI using stage engine
-            finding_data = {
-                'title': finding.get('title', ''),
-                'category': finding.get('category', ''),
-                'description': finding.get('description', ''),
-                'type': 'custom_fields' if 'custom fields' in finding.get('title', '').lower() else 'general',
-                'field_count': finding.get('salesforce_data', {}).get('potentially_unused', 0),
-                'record_count': finding.get('salesforce_data', {}).get('orphaned_opportunities', 0) or finding.get('salesforce_data', {}).get('stale_leads', 0),
-                'estimated_monthly_hours': finding.get('time_savings_hours', 2.0)
-            }
-            
-            enhanced_roi = calculate_task_based_roi(finding_data, org_context, business_stage, custom_assumptions)
-            
-            # Merge enhanced ROI data into finding
-            finding.update({
-                'stage_analysis': {
-                    'current_stage': business_stage['stage'],
-                    'stage_name': business_stage['name'],
-                    'stage_role': business_stage['role'],
-                    'stage_relevance': enhanced_roi['priority_score']
-                },
-                'enhanced_roi': enhanced_roi,
-                'domain': enhanced_roi['domain'],
-                'priority_score': enhanced_roi['priority_score'],
-                'task_breakdown': enhanced_roi['task_breakdown'],
-                'total_annual_roi': enhanced_roi['total_annual_roi'],
-                'confidence_level': enhanced_roi['confidence']
-            })
-            
-            # Update legacy fields for backward compatibility
-            if enhanced_roi['total_annual_roi'] > 0:
-                finding['roi_estimate'] = enhanced_roi['total_annual_roi']
-            
-        
-        # Sort findings by priority score (descending) with defensive None handling
-        def safe_priority_key(finding):
-            priority = finding.get('priority_score', 0)
-            # Guard against None priority scores
-            return priority if priority is not None else 0
-            
-        all_findings.sort(key=safe_priority_key, reverse=True)
-        
-        logger.info(f"Stage {business_stage['stage']} audit completed: {len(all_findings)} findings")
-        logger.info(f"Priority distribution: {[f['priority_score'] for f in all_findings[:5]]}")
-        
-        return all_findings, org_name, org_id, business_stage
-        
-    except Exception as e:
-        logger.error(f"Error running stage-based audit: {e}")
-        raise e
+    sampled_records = sum(n for n, _ in clusters)
+    matches = sum(y for _, y in clusters)
+    if sampled_records == 0:
+        return {'estimate': 0, 'ci_low': 0, 'ci_high': 0, 'rate': 0.0, 'margin_of_error': 0,
+                'relative_error': 1.0, 'sampled_records': 0}
 
-def calculate_audit_summary(findings: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Calculate overall audit metrics"""
-    total_time_savings = sum(f.get("time_savings_hours", 0) for f in findings)
-    total_roi = sum(f.get("roi_estimate", 0) for f in findings)
-    
-    category_breakdown = {}
-    for finding in findings:
+    rate = matches / sampled_records
+    k = len(clusters)
+    if k > 1:
+        mean_size = sampled_records / k
+        residual_var = sum((y - rate * n) ** 2 for n, y in clusters) / (k - 1)
+        fpc = max(0.0, 1 - k / total_clusters) if total_clusters else max(0.0, 1 - sampled_records / max(population, 1))
+        std_error = (fpc * residual_var / k) ** 0.5 / mean_size
+    else:
+        # A single cluster gives no between-cluster variance; fall back to the binomial error
+        std_error = (rate * (1 - rate) / sampled_records) ** 0.5
+
+    z = NormalDist().inv_cdf((1 + confidence_level) / 2)
+    margin = z * std_error * population
+    estimate = rate * population
+    return {
+        'estimate': round(estimate),
+        'ci_low': max(0, round(estimate - margin)),
+        'ci_high': round(estimate + margin),
+        'rate': rate,
+        'margin_of_error': round(margin),
+        'relative_error': (margin / estimate) if estimate else (0.0 if margin == 0 else 1.0),
+        'sampled_records': sampled_records
+    }
+
+def _salesforce_id_counter(record_id: str) -> int:
+    """Numeric value of the 9-character sequence part of a 15/18-character Salesforce Id"""
+    value = 0
+    for char in record_id[6:15]:
+        value = value * 62 + SALESFORCE_ID_ALPHABET.index(char)
+    return value
+
+def _salesforce_id_from_counter(prefix: str, counter: int) -> str:
+    """Build a 15-character Salesforce Id from a 6-character prefix and a sequence value"""
+    chars = []
+    for _ in range(9):
+        counter, digit = divmod(counter, 62)
+        chars.append(SALESFORCE_ID_ALPHABET[digit])
+    return prefix + ''.join(reversed(chars))
+
+def draw_record_sample(sf_client, sobject: str, fields: List[str], sample_size: int = SAMPLING_TARGET_RECORDS,
+                       method: str = 'id_range', where: Optional[str] = None, windows: int = SAMPLING_WINDOWS) -> Tuple[str, List[List[dict]]]:
+    """
+    Draw a sample of records as a set of contiguous windows
+
+    'id_range' picks random start points between the lowest and highest record Id and reads
+    the next records in Id order; 'created_date' does the same over CreatedDate. Each window costs
+    one query, so the sample costs windows + 2 calls regardless of object size.
+
+    Id ranges can only be decoded when the lowest and highest Id share their 6-character prefix
+    (key prefix and pod); otherwise the sample falls back to 'created_date'. Its windows hold records
+    created together, such as one import, so they are more alike than random windows and the
+    margin of error computed from them is optimistic.
+
+    Returns:
+        tuple: The method actually used, and one list of records per window (records are unique across windows)
+    """
+    per_window = max(1, min(2000, -(-sample_size // windows)))
+    field_list = ', '.join(fields)
+    filter_prefix = f"{where} AND " if where else ""
+    where_clause = f" WHERE {where}" if where else ""
+
+    starts = []
+    if method == 'id_range':
+        lowest = sf_client.query(f"SELECT Id FROM {sobject}{where_clause} ORDER BY Id ASC LIMIT 1")['records']
+        highest = sf_client.query(f"SELECT Id FROM {sobject}{where_clause} ORDER BY Id DESC LIMIT 1")['records']
+        if not lowest:
+            return method, []
+        low_id, high_id = lowest[0]['Id'], highest[0]['Id']
+        if low_id[:6] == high_id[:6]:
+            low, high = _salesforce_id_counter(low_id), _salesforce_id_counter(high_id)
+            starts = sorted({f"Id >= '{_salesforce_id_from_counter(low_id[:6], random.randint(low, high))}' ORDER BY Id"
+                             for _ in range(windows)})
+        else:
+            method = 'created_date'  # Ids span several pods; fall back to CreatedDate windows
+
+    if method == 'created_date':
+        bounds = sf_client.query(f"SELECT MIN(CreatedDate) first_created, MAX(CreatedDate) last_created FROM {sobject}{where_clause}")['records']
+        if not bounds or not bounds[0].get('first_created'):
+            return method, []
+        first = datetime.strptime(bounds[0]['first_created'][:19], '%Y-%m-%dT%H:%M:%S')
+        last = datetime.strptime(bounds[0]['last_created'][:19], '%Y-%m-%dT%H:%M:%S')
+        span = max(1, int((last - first).total_seconds()))
+        starts = sorted({f"CreatedDate >= {(first + timedelta(seconds=random.randint(0, span))).strftime('%Y-%m-%dT%H:%M:%SZ')} ORDER BY CreatedDate"
+                         for _ in range(windows)})
+
+    sample, seen_ids = [], set()
+    for start in starts:
+        result = sf_client.query(f"SELECT {field_list} FROM {sobject} WHERE {filter_prefix}{start} LIMIT {per_window}")
+        window = [r for r in result.get('records', []) if r.get('Id') not in seen_ids]
+        seen_ids.update(r.get('Id') for r in window)
+        if window:
+            sample.append(window)
+    return method, sample
+
+# Duplicate record detection settings
+DUPLICATE_DETECTION_OBJECTS = {
+    'Account': {
+        'fields': ['Id', 'Name', 'Phone', 'Website'], 'where': None,
+        'first_name': None, 'last_name': 'Name', 'email': None, 'website': 'Website',
+        'phone': 'Phone', 'company': None
+    },
+    'Contact': {
+        'fields': ['Id', 'FirstName', 'LastName', 'Email', 'Phone', 'AccountId'], 'where': None,
+        'first_name': 'FirstName', 'last_name': 'LastName', 'email': 'Email', 'website': None,
+        'phone': 'Phone', 'company': 'AccountId'
+    },
+    'Lead': {
+        'fields': ['Id', 'FirstName', 'LastName', 'Email', 'Phone', 'Company'], 'where': "IsConverted = false",
+        'first_name': 'FirstName', 'last_name': 'LastName', 'email': 'Email', 'website': None,
+        'phone': 'Phone', 'company': 'Company'
+    }
+}
+DUPLICATE_SCAN_MAX_RECORDS = 2000000  # per object safety cap
+DUPLICATE_SAMPLE_CLUSTERS = 5  # example clusters kept per object for the finding
+DUPLICATE_SAMPLE_CLUSTER_IDS = 5  # record Ids listed per example cluster
+SALESFORCE_ID_LENGTH = 18
+DUPLICATE_BLOCK_INITIALS = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ') + [None]  # None: digits, punctuation, non-ASCII
+DUPLICATE_SAMPLE_BLOCK_MAX_RECORDS = 50000  # records read per sampled block
+
+COMPANY_SUFFIXES = {'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company', 'plc', 'gmbh'}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'), **dict.fromkeys('CGJKQSXZ', '2'), **dict.fromkeys('DT', '3'),
+    'L': '4', **dict.fromkeys('MN', '5'), 'R': '6'
+}
+
+def soundex(value: str) -> str:
+    """American Soundex code for a name, e.g. 'Robert' -> 'R163'"""
+    letters = [c for c in (value or '').upper() if 'A' <= c <= 'Z']
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'HW':  # H and W do not separate letters with the same code
+            previous = digit
+    return code.ljust(4, '0')
+
+def normalize_name(value: str, strip_company_suffixes: bool = False) -> str:
+    """Lowercase a name and keep only alphanumeric tokens"""
+    tokens = re.findall(r'[a-z0-9]+', (value or '').lower())
+    if strip_company_suffixes:
+        tokens = [t for t in tokens if t not in COMPANY_SUFFIXES] or tokens
+    return ' '.join(tokens)
+
+def normalize_phone(value: str) -> str:
+    """Keep the last 10 digits of a phone number, or '' when too short to be meaningful"""
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-10:] if len(digits) >= 7 else ''
+
+def extract_email_domain(value: str) -> str:
+    """Domain part of an email address or website URL"""
+    value = (value or '').strip().lower()
+    if '@' in value:
+        return value.rsplit('@', 1)[1]
+    value = re.sub(r'^[a-z]+://', '', value).split('/', 1)[0]
+    return value[4:] if value.startswith('www.') else value
+
+def record_signature(*parts) -> bytes:
+    """Compact 8-byte hash used to compare candidate records inside a block"""
+    return hashlib.blake2b('|'.join(p or '' for p in parts).encode('utf-8'), digest_size=8).digest()
+
+def build_blocking_keys(record: dict, config: dict) -> List[tuple]:
+    """
+    Build (blocking key, match signature) pairs for a record
+
+    Records are only compared against other records sharing a blocking key, and
+    they match when their signatures are equal, so each record costs a handful of
+    dictionary lookups instead of a scan over every other record.
+    """
+    first = normalize_name(record.get(config['first_name'])) if config['first_name'] else ''
+    last = normalize_name(record.get(config['last_name']), strip_company_suffixes=not config['first_name'])
+    if not last:
+        return []
+
+    full_name = f"{first} {last}".strip()
+    company = normalize_name(record.get(config['company'])) if config['company'] else ''
+    domain = extract_email_domain(record.get(config['email']) if config['email'] else record.get(config['website']) if config['website'] else '')
+    phone = normalize_phone(record.get(config['phone']))
+    last_soundex = soundex(last)
+
+    keys = []
+    if domain:
+        keys.append((b'd' + domain.encode('utf-8'), record_signature(full_name)))
+    if phone:
+        keys.append((b'p' + phone.encode('utf-8'), record_signature(last_soundex, first[:1])))
+    if last_soundex:
+        keys.append((b's' + last_soundex.encode('utf-8') + first[:1].encode('utf-8'), record_signature(full_name, company)))
+    return keys
+
+def find_duplicate_clusters(records, config: dict, max_records: int = DUPLICATE_SCAN_MAX_RECORDS) -> Dict[str, Any]:
+    """
+    Cluster duplicate records from a record stream with blocking keys and union-find
+
+    Args:
+        records: Iterable of Salesforce record dicts (consumed lazily)
+        config: Entry from DUPLICATE_DETECTION_OBJECTS describing the field mapping
+        max_records: Stop after this many records
+
+    Returns:
+        dict: records_scanned, duplicate_clusters, duplicate_records, sample_clusters
+    """
+    parent = []  # union-find forest over record positions
+    first_seen = {}  # hash((block, signature)) -> position of the first record with that pair
+    linked = set()  # positions that belong to some duplicate cluster
+    record_ids = bytearray()  # fixed-width Id per position, so both ends of every match can be listed
+
+    def find(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    scanned = 0
+    for record in records:
+        if scanned >= max_records:
+            logger.warning(f"Duplicate scan capped at {max_records} records")
+            break
+        position = scanned
+        parent.append(position)
+        record_ids += (record.get('Id') or '').encode('ascii')[:SALESFORCE_ID_LENGTH].ljust(SALESFORCE_ID_LENGTH)
+        scanned += 1
+
+        for block, signature in build_blocking_keys(record, config):
+            other = first_seen.setdefault(hash((block, signature)), position)
+            if other == position:
+                continue
+            linked.update((position, other))
+            root_a, root_b = find(position), find(other)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = {}
+    for position in linked:
+        clusters.setdefault(find(position), []).append(position)
+
+    sample_clusters = [
+        [record_ids[p * SALESFORCE_ID_LENGTH:(p + 1) * SALESFORCE_ID_LENGTH].decode('ascii').rstrip()
+         for p in sorted(members)[:DUPLICATE_SAMPLE_CLUSTER_IDS]]
+        for members in sorted(clusters.values(), key=len, reverse=True)[:DUPLICATE_SAMPLE_CLUSTERS]
+    ]
+
+    return {
+        'records_scanned': scanned,
+        'duplicate_clusters': len(clusters),
+        'duplicate_records': len(linked) - len(clusters),
+        'sample_clusters': sample_clusters
+    }
+
+def initial_condition(field: str, initial: Optional[str], include_null: bool = False) -> str:
+    """SOQL condition for values of a field starting with a letter, or (initial None) with anything else"""
+    if initial is not None:
+        return f"{field} LIKE '{initial}%'"
+    letters = ' OR '.join(f"{field} LIKE '{letter}%'" for letter in DUPLICATE_BLOCK_INITIALS if letter)
+    return f"({field} = null OR NOT ({letters}))" if include_null else f"({field} != null AND NOT ({letters}))"
+
+def sample_duplicate_clusters(sf_client, sobject: str, config: dict, population: int) -> Dict[str, Any]:
+    """
+    Estimate duplicate counts for a large object from randomly chosen name-initial blocks
+
+    Every match signature includes the (soundex of the) last name, and for people the first
+    initial, so all duplicates of a record share its block. Whole blocks are scanned, which
+    makes the per-record duplicate rate a cluster-sample estimate; people are split by first
+    initial as well when last-name blocks alone would be large. Blocks are still capped at
+    DUPLICATE_SAMPLE_BLOCK_MAX_RECORDS so one huge block cannot make the cost linear in
+    object size; capped blocks are reported in the sampling details.
+    """
+    split_by_first_name = bool(config['first_name']) and population / len(DUPLICATE_BLOCK_INITIALS) > DUPLICATE_SAMPLE_BLOCK_MAX_RECORDS
+    blocks = [(last, first) for last in DUPLICATE_BLOCK_INITIALS
+              for first in (DUPLICATE_BLOCK_INITIALS if split_by_first_name else [False])]
+    random.shuffle(blocks)
+    filter_prefix = f"{config['where']} AND " if config['where'] else ""
+
+    record_clusters, cluster_counts, sample_clusters, truncated = [], [], [], 0
+    for last, first in blocks:
+        condition = initial_condition(config['last_name'], last)
+        if first is not False:
+            condition += f" AND {initial_condition(config['first_name'], first, include_null=True)}"
+        soql = f"SELECT {', '.join(config['fields'])} FROM {sobject} WHERE {filter_prefix}{condition}"
+        result = find_duplicate_clusters(sf_client.query_all_iter(soql), config, DUPLICATE_SAMPLE_BLOCK_MAX_RECORDS)
+        truncated += result['records_scanned'] >= DUPLICATE_SAMPLE_BLOCK_MAX_RECORDS
+        record_clusters.append((result['records_scanned'], result['duplicate_records']))
+        cluster_counts.append((result['records_scanned'], result['duplicate_clusters']))
+        sample_clusters.extend(result['sample_clusters'])
+        if len(record_clusters) >= 2 and sum(n for n, _ in record_clusters) >= SAMPLING_TARGET_RECORDS:
+            break
+
+    duplicates = estimate_cluster_ratio(record_clusters, population, total_clusters=len(blocks))
+    clusters = estimate_cluster_ratio(cluster_counts, population, total_clusters=len(blocks))
+    return {
+        'records_scanned': duplicates['sampled_records'],
+        'duplicate_clusters': clusters['estimate'],
+        'duplicate_records': duplicates['estimate'],
+        'sample_clusters': sample_clusters[:DUPLICATE_SAMPLE_CLUSTERS],
+        'sampling': {
+            'mode': 'sample',
+            'method': 'name_initial_blocks',
+            'population': population,
+            'blocks_sampled': len(record_clusters),
+            'blocks_total': len(blocks),
+            'blocks_capped': truncated,
+            'duplicate_records_ci': [duplicates['ci_low'], duplicates['ci_high']],
+            'margin_of_error': duplicates['margin_of_error'],
+            'relative_error': round(duplicates['relative_error'], 3),
+            'confidence_level': SAMPLING_CONFIDENCE_LEVEL
+        }
+    }
+
+def analyze_duplicate_records(sf_client, org_context, audit_options=None):
+    """Detect duplicate Accounts, Contacts and Leads with streamed blocking-key clustering"""
+    findings = []
+
+    try:
+        active_users = org_context.get('active_users', 10)
+        complexity_multiplier = org_context.get('complexity_multiplier', 1.0)
+        sampling_mode = (audit_options or {}).get('sampling_mode', 'auto')
+        logger.info(f"Starting duplicate record analysis (sampling mode: {sampling_mode})...")
+
+        object_results = {}
+        for sobject, config in DUPLICATE_DETECTION_OBJECTS.items():
+            try:
+                where_clause = f" WHERE {config['where']}" if config['where'] else ""
+                if config['where']:
+                    population = sf_client.query(f"SELECT COUNT() FROM {sobject}{where_clause}")['totalSize']
+                else:
+                    population = get_record_count(sf_client, org_context, sobject)
+
+                if resolve_sampling_mode(sampling_mode, population) == 'sample':
+                    object_results[sobject] = sample_duplicate_clusters(sf_client, sobject, config, population)
+                else:
+                    records = sf_client.query_all_iter(f"SELECT {', '.join(config['fields'])} FROM {sobject}{where_clause}")
+                    object_results[sobject] = find_duplicate_clusters(records, config)
+                    object_results[sobject]['sampling'] = {'mode': 'exact', 'population': population}
+                logger.info(f"{sobject}: {object_results[sobject]['duplicate_clusters']} duplicate clusters in {object_results[sobject]['records_scanned']} records ({object_results[sobject]['sampling']['mode']})")
+            except Exception as e:
+                logger.warning(f"Error scanning {sobject} for duplicates: {e}")
+
+        total_clusters = sum(r['duplicate_clusters'] for r in object_results.values())
+        total_duplicates = sum(r['duplicate_records'] for r in object_results.values())
+        sampled = [r['sampling'] for r in object_results.values() if r['sampling']['mode'] == 'sample']
+
+        if total_clusters > 0:
+            merge_time = total_duplicates * 0.08  # 5 minutes to review and merge each redundant record
+            affected_objects = [name for name, result in object_results.items() if result['duplicate_clusters'] > 0]
+
+            # Sampled objects contribute their margin of error; exact scans contribute none
+            if sampled:
+                total_margin = sum(s['margin_of_error'] for s in sampled)
+                confidence = sampling_confidence_label(total_margin / total_duplicates if total_duplicates else 1.0)
+                estimate_note = f" Estimated from a statistical sample (±{total_margin} records at {SAMPLING_CONFIDENCE_LEVEL:.0%} confidence)."
+            else:
+                confidence = "High"
+                estimate_note = ""
+
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Revenue Leaks",
+                "title": f"{total_clusters} Duplicate Record Clusters",
+                "description": f"Found {total_clusters} clusters of duplicate records ({total_duplicates} redundant records) across {', '.join(affected_objects)}. Duplicates split activity history, inflate pipeline and cause {active_users} users to work the same customer twice.{estimate_note}",
+                "impact": "High" if total_duplicates > 100 else "Medium",
+                "time_savings_hours": round(merge_time * complexity_multiplier, 1),
+                "confidence": confidence,
+                "recommendation": "Enable Duplicate and Matching Rules for Accounts, Contacts and Leads, then merge the existing clusters starting with the largest ones.",
+                "affected_objects": affected_objects,
+                "salesforce_data": {
+                    "duplicate_clusters": total_clusters,
+                    "duplicate_records": total_duplicates,
+                    "objects": object_results,
+                    "sampling": {name: result['sampling'] for name, result in object_results.items()},
+                    "matching_method": "Blocking on email/website domain, phone digits and name soundex; matched by hashed name signatures",
+                    "users_affected": active_users,
+                    "calculation_method": f"Merge time (5 min/redundant record), scaled by complexity ({complexity_multiplier:.1f}x)"
+                }
+            })
+
+        logger.info(f"Duplicate record analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing duplicate records: {e}")
+        raise
+
+    return findings
+
+# Data skew detection settings
+DATA_SKEW_THRESHOLD = 10000  # Salesforce guidance: more than 10k children or owned records
+ACCOUNT_SKEW_CHILD_OBJECTS = ['Contact', 'Opportunity', 'Case']
+OWNERSHIP_SKEW_OBJECTS = ['Account', 'Contact', 'Opportunity', 'Lead']
+
+def find_skewed_groups(sf_client, sobject: str, group_field: str, threshold: int = DATA_SKEW_THRESHOLD) -> List[dict]:
+    """Return {id, record_count} for groups above the threshold using a server-side HAVING aggregate"""
+    soql = (f"SELECT {group_field}, COUNT(Id) record_count FROM {sobject} WHERE {group_field} != null "
+            f"GROUP BY {group_field} HAVING COUNT(Id) > {threshold} ORDER BY COUNT(Id) DESC")
+    result = sf_client.query(soql)
+    return [{'id': row[group_field], 'record_count': row['record_count']} for row in result.get('records', [])]
+
+def analyze_data_skew(sf_client, org_context):
+    """Detect account data skew and ownership skew with GROUP BY ... HAVING aggregates"""
+    findings = []
+
+    try:
+        logger.info("Starting data skew analysis...")
+
+        # Account data skew: parents with too many children of one type
+        skewed_accounts = {}
+        for child_object in ACCOUNT_SKEW_CHILD_OBJECTS:
+            try:
+                for group in find_skewed_groups(sf_client, child_object, 'AccountId'):
+                    skewed_accounts.setdefault(group['id'], {})[child_object] = group['record_count']
+            except Exception as e:
+                logger.warning(f"Error checking account skew on {child_object}: {e}")
+
+        logger.info(f"Found {len(skewed_accounts)} accounts with data skew")
+        if skewed_accounts:
+            largest = sorted(skewed_accounts.items(), key=lambda item: sum(item[1].values()), reverse=True)
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "finding_type": "data_skew",
+                "title": f"{len(skewed_accounts)} Accounts with Data Skew",
+                "description": f"Found {len(skewed_accounts)} accounts with more than {DATA_SKEW_THRESHOLD:,} child records of a single type. Updates to these children lock the parent account, causing record-locking errors and slow sharing recalculations.",
+                "impact": "High" if len(skewed_accounts) > 5 else "Medium",
+                "time_savings_hours": round(min(len(skewed_accounts) * 0.5, 20), 1),  # 30 min/month per account lost to lock errors, max 20h
+                "recommendation": "Redistribute child records across multiple parent accounts (for example by region or business unit) and keep each account under 10,000 children.",
+                "affected_objects": ["Account"] + ACCOUNT_SKEW_CHILD_OBJECTS,
+                "salesforce_data": {
+                    "skew_type": "account",
+                    "skewed_records": len(skewed_accounts),
+                    "threshold": DATA_SKEW_THRESHOLD,
+                    "largest_skewed_accounts": [{'account_id': account_id, 'children': children} for account_id, children in largest[:10]],
+                    "query_used": f"SELECT AccountId, COUNT(Id) FROM <child> GROUP BY AccountId HAVING COUNT(Id) > {DATA_SKEW_THRESHOLD}"
+                }
+            })
+
+        # Ownership skew: single owners holding too many records of one object
+        skewed_owners = {}
+        for sobject in OWNERSHIP_SKEW_OBJECTS:
+            try:
+                for group in find_skewed_groups(sf_client, sobject, 'OwnerId'):
+                    skewed_owners.setdefault(group['id'], {})[sobject] = group['record_count']
+            except Exception as e:
+                logger.warning(f"Error checking ownership skew on {sobject}: {e}")
+
+        logger.info(f"Found {len(skewed_owners)} owners with ownership skew")
+        if skewed_owners:
+            largest = sorted(skewed_owners.items(), key=lambda item: sum(item[1].values()), reverse=True)
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "finding_type": "data_skew",
+                "title": f"{len(skewed_owners)} Record Owners with Ownership Skew",
+                "description": f"Found {len(skewed_owners)} owners (often integration or placeholder accounts) holding more than {DATA_SKEW_THRESHOLD:,} records of a single object. Role or group changes for these owners trigger long sharing recalculations.",
+                "impact": "Medium",
+                "time_savings_hours": round(min(len(skewed_owners) * 1.0, 20), 1),  # 1h/month per owner in sharing recalculation delays, max 20h
+                "recommendation": "Assign skewed owners to a role at the top of the hierarchy (or no role) and spread record ownership across multiple owners or queues.",
+                "affected_objects": OWNERSHIP_SKEW_OBJECTS,
+                "salesforce_data": {
+                    "skew_type": "ownership",
+                    "skewed_records": len(skewed_owners),
+                    "threshold": DATA_SKEW_THRESHOLD,
+                    "largest_skewed_owners": [{'owner_id': owner_id, 'records': records} for owner_id, records in largest[:10]],
+                    "query_used": f"SELECT OwnerId, COUNT(Id) FROM <object> GROUP BY OwnerId HAVING COUNT(Id) > {DATA_SKEW_THRESHOLD}"
+                }
+            })
+
+        logger.info(f"Data skew analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing data skew: {e}")
+        raise
+
+    return findings
+
+# Record aging settings: one CALENDAR_MONTH histogram per object, thresholds applied locally
+AGING_OBJECTS = {
+    'Lead': {'where': "IsConverted = false", 'label': 'Lead', 'data_key': 'stale_leads'},
+    'Opportunity': {'where': "IsClosed = false", 'label': 'Open Opportunity', 'data_key': 'stale_opportunities'}
+}
+AGING_DEFAULT_THRESHOLDS = {'Lead': 90, 'Opportunity': 60}  # days without activity
+AGING_MIN_STALE_RECORDS = 5
+
+def query_aging_histogram(sf_client, sobject: str, where: Optional[str] = None) -> Dict[str, Any]:
+    """Get the LastActivityDate distribution of an object by calendar month in one aggregate query"""
+    where_clause = f" WHERE {where}" if where else ""
+    soql = (f"SELECT CALENDAR_YEAR(LastActivityDate) activity_year, CALENDAR_MONTH(LastActivityDate) activity_month, "
+            f"COUNT(Id) record_count FROM {sobject}{where_clause} "
+            f"GROUP BY CALENDAR_YEAR(LastActivityDate), CALENDAR_MONTH(LastActivityDate)")
+    result = sf_client.query(soql)
+
+    months, no_activity = [], 0
+    for row in result.get('records', []):
+        if row.get('activity_year') is None:
+            no_activity += row['record_count']
+        else:
+            months.append({'year': row['activity_year'], 'month': row['activity_month'], 'count': row['record_count']})
+    months.sort(key=lambda bucket: (bucket['year'], bucket['month']))
+    return {'months': months, 'no_activity': no_activity, 'query_used': soql}
+
+def count_aged_records(histogram: Dict[str, Any], threshold_days: int, as_of: Optional[datetime] = None) -> int:
+    """
+    Count records whose last activity is older than the threshold from a monthly histogram
+
+    Months entirely before the cutoff count in full; the month containing the cutoff is
+    pro-rated assuming activity is spread evenly across the month. Records that never had
+    activity are reported separately and not counted here.
+    """
+    as_of = as_of or datetime.utcnow()
+    cutoff = as_of - timedelta(days=threshold_days)
+    aged = 0.0
+    for bucket in histogram.get('months', []):
+        month_start = datetime(bucket['year'], bucket['month'], 1)
+        month_end = datetime(bucket['year'] + (bucket['month'] == 12), bucket['month'] % 12 + 1, 1)
+        if month_end <= cutoff:
+            aged += bucket['count']
+        elif month_start < cutoff:
+            aged += bucket['count'] * (cutoff - month_start) / (month_end - month_start)
+    return int(round(aged))
+
+def analyze_record_aging(sf_client, org_context, audit_options=None):
+    """
+    Analyze lead and open opportunity aging from monthly activity histograms
+
+    Every histogram is also stored in audit_options['aging_histograms'], whether or not it
+    produced a finding, so thresholds can be re-applied later without querying Salesforce.
+    """
+    findings = []
+    aging_histograms = {}
+    if audit_options is not None:
+        audit_options['aging_histograms'] = aging_histograms
+
+    try:
+        active_users = org_context.get('active_users', 10)
+        complexity_multiplier = org_context.get('complexity_multiplier', 1.0)
+        thresholds = {**AGING_DEFAULT_THRESHOLDS, **((audit_options or {}).get('aging_thresholds') or {})}
+        as_of = datetime.utcnow()
+        logger.info("Starting record aging analysis...")
+
+        for sobject, config in AGING_OBJECTS.items():
+            try:
+                histogram = query_aging_histogram(sf_client, sobject, config['where'])
+                threshold_days = thresholds[sobject]
+                stale_count = count_aged_records(histogram, threshold_days, as_of)
+                logger.info(f"Found {stale_count} stale {sobject} records ({threshold_days}+ days)")
+                aging_histograms[sobject] = {
+                    "threshold_days": threshold_days,
+                    "no_activity_records": histogram['no_activity'],
+                    "aging_histogram": histogram['months']
+                }
+
+                if stale_count > AGING_MIN_STALE_RECORDS:
+                    # Scale time based on actual volume and team size
+                    base_review_time = min(stale_count * 0.05, 20)  # 3 min per record, max 20 hours
+                    process_improvement_time = 2  # Time to set up automation
+                    total_time = (base_review_time + process_improvement_time) * complexity_multiplier
+
+                    findings.append({
+                        "id": str(uuid.uuid4()),
+                        "category": "Revenue Leaks",
+                        "finding_type": "record_aging",
+                        "title": f"{stale_count} Stale {config['label']} Records",
+                        "description": f"{stale_count} {config['label'].lower()} records haven't had activity in {threshold_days}+ days, representing potential lost revenue. With {active_users} users, this indicates process gaps in follow-up.",
+                        "impact": "High" if stale_count > 100 else "Medium",
+                        "time_savings_hours": round(total_time, 1),
+                        "recommendation": "Implement lead scoring and automated nurture campaigns. Archive truly cold leads and improve lead assignment processes." if sobject == 'Lead' else "Set up stage-age alerts and pipeline reviews for opportunities without recent activity. Close out deals that are no longer active.",
+                        "affected_objects": [sobject, "Campaign"] if sobject == 'Lead' else [sobject, "Task"],
+                        "salesforce_data": {
+                            config['data_key']: stale_count,
+                            "sobject": sobject,
+                            "threshold_days": threshold_days,
+                            "as_of": as_of.isoformat(),
+                            "no_activity_records": histogram['no_activity'],
+                            "aging_histogram": histogram['months'],
+                            "query_used": histogram['query_used'],
+                            "users_affected": active_users,
+                            "calculation_method": f"Review time (3 min/record, max 20h) + process setup (2h), scaled by complexity ({complexity_multiplier:.1f}x)"
+                        }
+                    })
+            except Exception as e:
+                logger.warning(f"Error checking {sobject} aging: {e}")
+
+        logger.info(f"Record aging analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing record aging: {e}")
+        raise
+
+    return findings
+
+# Automation inventory sources, fetched concurrently; 'tooling' sources go through the Tooling API
+AUTOMATION_INVENTORY_SOURCES = {
+    'flows': {'api': 'data', 'soql': "SELECT Id, ApiName, ProcessType, TriggerType, TriggerObjectOrEventId FROM FlowDefinitionView WHERE IsActive = true"},
+    'workflow_rules': {'api': 'tooling', 'soql': "SELECT Id, Name, TableEnumOrId FROM WorkflowRule"},
+    'workflow_alerts': {'api': 'tooling', 'soql': "SELECT Id, DeveloperName, EntityDefinitionId FROM WorkflowAlert"},
+    'assignment_rules': {'api': 'data', 'soql': "SELECT Id, Name, SobjectType, Active FROM AssignmentRule"}
+}
+AUTOMATION_INVENTORY_MAX_PAGES = 5  # per source, so the fetch never exceeds 20 calls
+
+def paginated_query(sf_client, soql: str, api: str = 'data', max_pages: int = AUTOMATION_INVENTORY_MAX_PAGES) -> List[dict]:
+    """Run a data or Tooling API query and follow nextRecordsUrl for at most max_pages pages"""
+    if api == 'tooling':
+        result = sf_client.toolingexecute(f"query/?q={quote_plus(soql)}")
+    else:
+        result = sf_client.query(soql)
+    
+    records = list(result.get('records', []))
+    pages = 1
+    while not result.get('done', True) and result.get('nextRecordsUrl'):
+        if pages >= max_pages:
+            logger.warning(f"Stopped paging after {max_pages} pages: {soql}")
+            break
+        if api == 'tooling':
+            result = sf_client.toolingexecute(result['nextRecordsUrl'].split('/tooling/', 1)[1])
+        else:
+            result = sf_client.query_more(result['nextRecordsUrl'], identifier_is_url=True)
+        records.extend(result.get('records', []))
+        pages += 1
+    return records
+
+def fetch_automation_inventory(sf_client) -> Dict[str, Any]:
+    """Fetch Flows, Workflow Rules, email alerts and Assignment Rules concurrently on the I/O pool and summarize them by object"""
+    raw, errors = {}, {}
+    futures = {
+        name: io_executor.submit(paginated_query, sf_client, source['soql'], source['api'])
+        for name, source in AUTOMATION_INVENTORY_SOURCES.items()
+    }
+    for name, future in futures.items():
+        try:
+            raw[name] = future.result()
+        except Exception as e:
+            logger.warning(f"Error fetching automation inventory for {name}: {e}")
+            errors[name] = str(e)
+            raw[name] = []
+    
+    def count_by(records, field):
+        counts = {}
+        for record in records:
+            counts[record.get(field) or 'Unknown'] = counts.get(record.get(field) or 'Unknown', 0) + 1
+        return counts
+    
+    flows = raw['flows']
+    return {
+        'flows': {
+            'total': len(flows),
+            'process_builders': sum(1 for f in flows if f.get('ProcessType') == 'Workflow'),
+            'by_process_type': count_by(flows, 'ProcessType'),
+            # API name for standard objects (Id for custom ones), like the workflow rule keys
+            'record_triggered_by_object': count_by([f for f in flows if (f.get('TriggerType') or '').startswith('Record')], 'TriggerObjectOrEventId')
+        },
+        'workflow_rules': {'total': len(raw['workflow_rules']), 'by_object': count_by(raw['workflow_rules'], 'TableEnumOrId')},
+        'workflow_alerts': {'total': len(raw['workflow_alerts']), 'by_object': count_by(raw['workflow_alerts'], 'EntityDefinitionId')},
+        'assignment_rules': {
+            'total': len(raw['assignment_rules']),
+            'active_by_object': count_by([r for r in raw['assignment_rules'] if r.get('Active')], 'SobjectType')
+        },
+        'errors': errors
+    }
+
+def get_automation_inventory(sf_client) -> Dict[str, Any]:
+    """Automation inventory for the client's org, served from the org metadata cache unless a source failed"""
+    return org_metadata_cache.get_or_load(
+        get_org_cache_key(sf_client), 'automation_inventory', lambda: fetch_automation_inventory(sf_client),
+        cacheable=lambda inventory: not inventory['errors']
+    )
+
+def has_existing_automation(inventory: Optional[dict], sobject: str, kinds: List[str]) -> bool:
+    """Whether the inventory shows automation of the given kinds ('assignment', 'alerts', 'flows', 'workflow') on an object"""
+    if not inventory:
+        return False
+    checks = {
+        'assignment': inventory['assignment_rules']['active_by_object'],
+        'alerts': inventory['workflow_alerts']['by_object'],
+        'flows': inventory['flows']['record_triggered_by_object'],
+        'workflow': inventory['workflow_rules']['by_object']
+    }
+    return any(checks[kind].get(sobject, 0) > 0 for kind in kinds)
+
+def analyze_automation_inventory(sf_client, org_context):
+    """Analyze the existing automation inventory for legacy tools that should move to Flow"""
+    findings = []
+    
+    try:
+        logger.info("Starting automation inventory analysis...")
+        inventory = get_automation_inventory(sf_client)
+        
+        process_builders = inventory['flows']['process_builders']
+        workflow_rules = inventory['workflow_rules']['total']
+        legacy_count = process_builders + workflow_rules
+        logger.info(f"Found {workflow_rules} workflow rules and {process_builders} process builders")
+        
+        if legacy_count > 0:
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Automation Opportunities",
+                "title": f"{legacy_count} Legacy Workflow Rules and Process Builders",
+                "description": f"Found {workflow_rules} Workflow Rules and {process_builders} Process Builders. Salesforce has retired both tools; they no longer receive fixes and run slower than record-triggered Flows on the same objects.",
+                "impact": "High" if legacy_count > 20 else "Medium",
+                "time_savings_hours": round(legacy_count * 0.25, 1),  # 15 min/month maintenance per legacy automation
+                "recommendation": "Use the Migrate to Flow tool to convert Workflow Rules and Process Builders into record-triggered Flows, consolidating to one Flow per object and trigger where possible.",
+                "affected_objects": sorted(set(inventory['workflow_rules']['by_object']) - {'Unknown'}) or ["Workflow", "Process Builder"],
+                "salesforce_data": {
+                    "workflow_rules": workflow_rules,
+                    "process_builders": process_builders,
+                    "active_flows": inventory['flows']['total'],
+                    "automation_inventory": inventory
+                }
+            })
+        
+        logger.info(f"Automation inventory analysis completed: {len(findings)} findings")
+    
+    except Exception as e:
+        logger.error(f"Error analyzing automation inventory: {e}")
+        raise
+    
+    return findings
+
+# Permission analysis settings: system permissions tracked as bits, high-risk ones flagged
+SECURITY_SYSTEM_PERMISSIONS = [
+    'PermissionsModifyAllData', 'PermissionsViewAllData', 'PermissionsManageUsers', 'PermissionsAuthorApex',
+    'PermissionsCustomizeApplication', 'PermissionsManageProfilesPermissionsets', 'PermissionsBulkApiHardDelete',
+    'PermissionsManageSharing', 'PermissionsResetPasswords', 'PermissionsTransferAnyEntity', 'PermissionsViewAllUsers',
+    'PermissionsManageDataIntegrations', 'PermissionsViewSetup', 'PermissionsApiEnabled', 'PermissionsExportReport'
+]
+SECURITY_HIGH_RISK_PERMISSIONS = SECURITY_SYSTEM_PERMISSIONS[:7]
+SECURITY_OBJECT_PERMISSIONS = [
+    'PermissionsRead', 'PermissionsCreate', 'PermissionsEdit', 'PermissionsDelete',
+    'PermissionsViewAllRecords', 'PermissionsModifyAllRecords'
+]
+SECURITY_ADMIN_ALLOWANCE = 3  # Admin-level users expected in any org
+SECURITY_ASSIGNMENT_CHUNK = 50000  # Assignments compared per vectorized chunk
+SECURITY_GROUP_COMPONENTS_QUERY = "SELECT PermissionSetId FROM PermissionSetGroupComponent"
+
+def build_permission_bitsets(permission_sets: List[dict], object_permissions) -> tuple:
+    """
+    Pack each permission set's system and object permissions into rows of uint64 words
+
+    System permissions take the first bits (so high-risk checks only read word 0);
+    object permissions get one bit per (object, permission) pair as they are seen.
+
+    Returns:
+        tuple: (matrix [n_permission_sets, n_words], index by permission set Id, bit count)
+    """
+    ps_index = {ps['Id']: i for i, ps in enumerate(permission_sets)}
+    rows, bits = [], []
+    for i, ps in enumerate(permission_sets):
+        for bit, field in enumerate(SECURITY_SYSTEM_PERMISSIONS):
+            if ps.get(field):
+                rows.append(i)
+                bits.append(bit)
+
+    object_bits = {}
+    for grant in object_permissions:
+        row = ps_index.get(grant.get('ParentId'))
+        if row is None:
+            continue
+        for field in SECURITY_OBJECT_PERMISSIONS:
+            if grant.get(field):
+                key = (grant.get('SobjectType'), field)
+                if key not in object_bits:
+                    object_bits[key] = len(SECURITY_SYSTEM_PERMISSIONS) + len(object_bits)
+                rows.append(row)
+                bits.append(object_bits[key])
+
+    bit_count = len(SECURITY_SYSTEM_PERMISSIONS) + len(object_bits)
+    matrix = np.zeros((len(permission_sets), max(1, -(-bit_count // 64))), dtype=np.uint64)
+    if rows:
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        bits_arr = np.asarray(bits, dtype=np.int64)
+        np.bitwise_or.at(matrix, (rows_arr, bits_arr // 64), np.left_shift(np.uint64(1), (bits_arr % 64).astype(np.uint64)))
+    return matrix, ps_index, bit_count
+
+def compute_permission_analysis(permission_sets: List[dict], object_permissions, assignments, grouped_set_ids=()) -> Dict[str, Any]:
+    """
+    Compute over-privileged users, redundant and unused permission sets with vectorized bit operations
+
+    Only the tracked system and object permissions are compared. Sets with none of them (field
+    access, Apex classes, custom permissions, tabs or apps only) are never called redundant, and
+    sets inside a permission set group are never called unused since they are assigned through it.
+
+    Args:
+        permission_sets: PermissionSet rows (profile-owned ones included)
+        object_permissions: Iterable of ObjectPermissions rows
+        assignments: Iterable of PermissionSetAssignment rows for active users
+        grouped_set_ids: Ids of permission sets that are components of a permission set group
+    """
+    matrix, ps_index, bit_count = build_permission_bitsets(permission_sets, object_permissions)
+    is_profile = np.array([bool(ps.get('IsOwnedByProfile')) for ps in permission_sets], dtype=bool)
+
+    user_index, user_rows, ps_rows = {}, [], []
+    for assignment in assignments:
+        row = ps_index.get(assignment.get('PermissionSetId'))
+        if row is None:
+            continue
+        user_rows.append(user_index.setdefault(assignment.get('AssigneeId'), len(user_index)))
+        ps_rows.append(row)
+    user_rows = np.asarray(user_rows, dtype=np.int64)
+    ps_rows = np.asarray(ps_rows, dtype=np.int64)
+
+    # Effective permissions per user, and the part granted by the profile alone
+    effective = np.zeros((len(user_index), matrix.shape[1]), dtype=np.uint64)
+    profile_grants = np.zeros_like(effective)
+    from_profile = is_profile[ps_rows] if len(ps_rows) else np.zeros(0, dtype=bool)
+    for start in range(0, len(ps_rows), SECURITY_ASSIGNMENT_CHUNK):
+        users, sets = user_rows[start:start + SECURITY_ASSIGNMENT_CHUNK], ps_rows[start:start + SECURITY_ASSIGNMENT_CHUNK]
+        profile_chunk = from_profile[start:start + SECURITY_ASSIGNMENT_CHUNK]
+        np.bitwise_or.at(effective, users, matrix[sets])
+        np.bitwise_or.at(profile_grants, users[profile_chunk], matrix[sets[profile_chunk]])
+
+    high_risk_mask = np.uint64(sum(1 << SECURITY_SYSTEM_PERMISSIONS.index(p) for p in SECURITY_HIGH_RISK_PERMISSIONS))
+    high_risk = (effective[:, 0] & high_risk_mask) != 0
+    elevated = (effective[:, 0] & ~profile_grants[:, 0] & high_risk_mask) != 0
+
+    # An assignment is redundant when the permission set adds no tracked permission beyond the
+    # user's profile; sets without any tracked bit grant something we do not compare
+    has_tracked_bits = matrix.any(axis=1)
+    added_rows = np.flatnonzero(~from_profile)
+    redundant = np.zeros(len(added_rows), dtype=bool)
+    for start in range(0, len(added_rows), SECURITY_ASSIGNMENT_CHUNK):
+        chunk = added_rows[start:start + SECURITY_ASSIGNMENT_CHUNK]
+        extra = matrix[ps_rows[chunk]] & ~profile_grants[user_rows[chunk]]
+        redundant[start:start + SECURITY_ASSIGNMENT_CHUNK] = ~extra.any(axis=1) & has_tracked_bits[ps_rows[chunk]]
+
+    assignment_counts = np.bincount(ps_rows[added_rows], minlength=len(permission_sets))
+    redundant_counts = np.bincount(ps_rows[added_rows][redundant], minlength=len(permission_sets))
+    custom_sets = np.array([not ps.get('IsOwnedByProfile') and bool(ps.get('IsCustom')) for ps in permission_sets], dtype=bool)
+    grouped = np.array([ps['Id'] in grouped_set_ids for ps in permission_sets], dtype=bool)
+    redundant_sets = np.flatnonzero(custom_sets & ~grouped & has_tracked_bits & (assignment_counts > 0) & (redundant_counts == assignment_counts))
+    unused_sets = np.flatnonzero(custom_sets & ~grouped & (assignment_counts == 0))
+
+    return {
+        'users_analyzed': len(user_index),
+        'permission_sets_analyzed': int((~is_profile).sum()),
+        'permission_bits': bit_count,
+        'high_risk_users': int(high_risk.sum()),
+        'elevated_by_permission_set': int(elevated.sum()),
+        'redundant_assignments': int(redundant.sum()),
+        'redundant_permission_sets': [permission_sets[i].get('Name') for i in redundant_sets],
+        'unused_permission_sets': [permission_sets[i].get('Name') for i in unused_sets]
+    }
+
+def analyze_security_permissions(sf_client, org_context):
+    """Analyze profiles, permission sets and assignments for over-privileged users and unused access"""
+    findings = []
+
+    try:
+        active_users = org_context.get('active_users', 10)
+        logger.info("Starting security permission analysis...")
+
+        fields = ', '.join(['Id', 'Name', 'IsOwnedByProfile', 'IsCustom', 'ProfileId', 'Profile.Name'] + SECURITY_SYSTEM_PERMISSIONS)
+        permission_sets = list(sf_client.query_all_iter(f"SELECT {fields} FROM PermissionSet"))
+        object_permissions = sf_client.query_all_iter(
+            f"SELECT ParentId, SobjectType, {', '.join(SECURITY_OBJECT_PERMISSIONS)} FROM ObjectPermissions"
+        )
+        assignments = sf_client.query_all_iter(
+            "SELECT AssigneeId, PermissionSetId FROM PermissionSetAssignment WHERE Assignee.IsActive = true"
+        )
+        try:
+            group_components = sf_client.query_all(SECURITY_GROUP_COMPONENTS_QUERY).get('records', [])
+            grouped_set_ids = {row['PermissionSetId'] for row in group_components}
+        except Exception as e:
+            # Orgs without permission set groups have no components to exclude
+            logger.warning(f"Error loading permission set group components: {e}")
+            grouped_set_ids = set()
+        analysis = compute_permission_analysis(permission_sets, object_permissions, assignments, grouped_set_ids)
+        logger.info(f"Permission analysis: {analysis['high_risk_users']} high-risk users, {len(analysis['redundant_permission_sets'])} redundant and {len(analysis['unused_permission_sets'])} unused permission sets")
+
+        high_risk_users = analysis['high_risk_users']
+        if high_risk_users > SECURITY_ADMIN_ALLOWANCE:
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "title": f"{high_risk_users} Users with Administrative Permissions",
+                "description": f"{high_risk_users} of {analysis['users_analyzed']} active users hold high-risk permissions such as Modify All Data, View All Data or Manage Users ({analysis['elevated_by_permission_set']} through permission sets rather than their profile). Broad access increases security exposure and audit effort.",
+                "impact": "High" if high_risk_users > max(10, active_users * 0.1) else "Medium",
+                "time_savings_hours": round(high_risk_users * 0.25, 1),  # 15 min/month access review per privileged user
+                "recommendation": "Apply least privilege: remove Modify All Data and View All Data from non-admin users and grant narrower permission sets for specific tasks.",
+                "affected_objects": ["Profile", "Permission Sets", "User"],
+                "salesforce_data": {
+                    "high_risk_users": high_risk_users,
+                    "elevated_by_permission_set": analysis['elevated_by_permission_set'],
+                    "high_risk_permissions": SECURITY_HIGH_RISK_PERMISSIONS,
+                    "users_analyzed": analysis['users_analyzed']
+                }
+            })
+
+        cleanup_sets = analysis['redundant_permission_sets'] + analysis['unused_permission_sets']
+        if cleanup_sets:
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "title": f"{len(cleanup_sets)} Redundant or Unused Permission Sets",
+                "description": f"Found {len(analysis['redundant_permission_sets'])} permission sets whose tracked system and object permissions are all already granted by their assignees' profiles, and {len(analysis['unused_permission_sets'])} custom permission sets with no active assignments and no permission set group. Field-level security, Apex class, custom permission, tab and app access are not compared. These sets make access reviews slower and permission changes riskier.",
+                "impact": "Low" if len(cleanup_sets) < 10 else "Medium",
+                "time_savings_hours": round(len(cleanup_sets) * 0.25, 1),
+                "recommendation": "Review each set's field, Apex class, custom permission and app access before removing it; then remove redundant assignments, retire unused sets, and consolidate the rest into permission set groups by job function.",
+                "affected_objects": ["Permission Sets", "Permission Set Assignments"],
+                "salesforce_data": {
+                    "redundant_permission_sets": analysis['redundant_permission_sets'][:50],
+                    "unused_permission_sets": analysis['unused_permission_sets'][:50],
+                    "redundant_assignments": analysis['redundant_assignments'],
+                    "permission_sets_analyzed": analysis['permission_sets_analyzed'],
+                    "permission_bits": analysis['permission_bits'],
+                    "compared_permissions": "tracked system and object permissions only"
+                }
+            })
+
+        # Unused custom profiles: profile-owned permission sets with no active users on the profile
+        try:
+            profile_users = sf_client.query("SELECT ProfileId, COUNT(Id) user_count FROM User WHERE IsActive = true GROUP BY ProfileId")
+            profiles_in_use = {row['ProfileId'] for row in profile_users.get('records', [])}
+            unused_profiles = [
+                (ps.get('Profile') or {}).get('Name') or ps.get('Name') for ps in permission_sets
+                if ps.get('IsOwnedByProfile') and ps.get('IsCustom') and ps.get('ProfileId') not in profiles_in_use
+            ]
+            if unused_profiles:
+                findings.append({
+                    "id": str(uuid.uuid4()),
+                    "category": "Time Savings",
+                    "title": f"{len(unused_profiles)} Unused Custom Profiles",
+                    "description": f"Found {len(unused_profiles)} custom profiles with no active users. Every profile has to be updated when fields, objects or apps change, so unused ones add ongoing admin work.",
+                    "impact": "Low",
+                    "time_savings_hours": round(len(unused_profiles) * 0.5, 1),
+                    "recommendation": "Delete unused custom profiles after confirming no integrations rely on them, and move to a minimal-profile plus permission set model.",
+                    "affected_objects": ["Profile"],
+                    "salesforce_data": {
+                        "unused_profiles": unused_profiles[:50],
+                        "query_used": "SELECT ProfileId, COUNT(Id) FROM User WHERE IsActive = true GROUP BY ProfileId"
+                    }
+                })
+        except Exception as e:
+            logger.warning(f"Error checking unused profiles: {e}")
+
+        logger.info(f"Security permission analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing security permissions: {e}")
+        raise
+
+    return findings
+
+# License utilization settings
+LICENSE_MONTHLY_COST = 75  # rough average $/user/month across Salesforce editions
+LICENSE_DORMANT_DAYS = 90
+LICENSE_SEAT_TYPES = ['Salesforce', 'Salesforce Platform']  # paid seat types checked for unassigned licenses
+
+def query_login_buckets(sf_client) -> Dict[str, Any]:
+    """Bucket active standard users by last login with one LastLoginDate histogram query"""
+    soql = ("SELECT CALENDAR_YEAR(LastLoginDate) activity_year, CALENDAR_MONTH(LastLoginDate) activity_month, COUNT(Id) record_count "
+            "FROM User WHERE IsActive = true AND UserType = 'Standard' "
+            "GROUP BY CALENDAR_YEAR(LastLoginDate), CALENDAR_MONTH(LastLoginDate)")
+    histogram = {'months': [], 'no_activity': 0}
+    for row in sf_client.query(soql).get('records', []):
+        if row.get('activity_year') is None:
+            histogram['no_activity'] += row['record_count']
+        else:
+            histogram['months'].append({'year': row['activity_year'], 'month': row['activity_month'], 'count': row['record_count']})
+
+    total = histogram['no_activity'] + sum(b['count'] for b in histogram['months'])
+    over_30 = count_aged_records(histogram, 30)
+    over_90 = count_aged_records(histogram, LICENSE_DORMANT_DAYS)
+    return {
+        'active_standard_users': total,
+        'last_30_days': total - histogram['no_activity'] - over_30,
+        '31_90_days': over_30 - over_90,
+        'over_90_days': over_90,
+        'never_logged_in': histogram['no_activity'],
+        'query_used': soql
+    }
+
+def analyze_license_utilization(sf_client, org_context):
+    """
+    Analyze license utilization from server-side aggregates of User.LastLoginDate and LoginHistory
+
+    A dormant user is an active standard user with no successful login in the last
+    LICENSE_DORMANT_DAYS days. They are counted from LoginHistory, which records every login,
+    as the active standard users minus those with a successful login in the window. When
+    LoginHistory cannot be read, the LastLoginDate buckets are used instead; salesforce_data
+    records which source the count came from.
+    """
+    findings = []
+
+    try:
+        logger.info("Starting license utilization analysis...")
+        buckets = query_login_buckets(sf_client)
+
+        # Scoped to the users in the buckets so the two counts can be subtracted; only distinct counts come back
+        login_history_users = None
+        try:
+            result = sf_client.query(
+                f"SELECT COUNT_DISTINCT(UserId) login_users FROM LoginHistory "
+                f"WHERE LoginTime = LAST_N_DAYS:{LICENSE_DORMANT_DAYS} AND Status = 'Success' "
+                f"AND UserId IN (SELECT Id FROM User WHERE IsActive = true AND UserType = 'Standard')"
+            )
+            login_history_users = result['records'][0]['login_users'] if result.get('records') else None
+        except Exception as e:
+            logger.warning(f"Error aggregating LoginHistory, counting dormant users from LastLoginDate: {e}")
+
+        if login_history_users is not None:
+            dormant_users = max(0, buckets['active_standard_users'] - login_history_users)
+            dormant_source = 'login_history'
+        else:
+            dormant_users = buckets['over_90_days'] + buckets['never_logged_in']
+            dormant_source = 'last_login_date'
+
+        unassigned_seats = 0
+        try:
+            licenses = sf_client.query("SELECT Name, TotalLicenses, UsedLicenses FROM UserLicense WHERE Status = 'Active'")
+            unassigned_seats = sum(
+                max(0, (row.get('TotalLicenses') or 0) - (row.get('UsedLicenses') or 0))
+                for row in licenses.get('records', []) if row.get('Name') in LICENSE_SEAT_TYPES
+            )
+        except Exception as e:
+            logger.warning(f"Error checking UserLicense seats: {e}")
+
+        logger.info(f"Found {dormant_users} dormant users and {unassigned_seats} unassigned seats")
+        underutilized = dormant_users + unassigned_seats
+
+        if underutilized > 2:
+            monthly_license_savings = underutilized * LICENSE_MONTHLY_COST
+            cleanup_time = dormant_users * 0.5  # 30 minutes per user to review and deactivate
+
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "finding_type": "license_utilization",
+                "title": f"{underutilized} Underutilized User Licenses",
+                "description": f"{dormant_users} of {buckets['active_standard_users']} active users have not logged in for {LICENSE_DORMANT_DAYS}+ days ({buckets['never_logged_in']} never logged in), and {unassigned_seats} paid seats are unassigned. These licenses cost money without being used and leave dormant accounts open.",
+                "impact": "High" if monthly_license_savings > 1000 else "Medium",
+                "time_savings_hours": round(cleanup_time, 1),
+                "recommendation": "Freeze or deactivate users with no login in 90 days, reduce the seat count at renewal, and implement a user lifecycle process tied to HR offboarding.",
+                "affected_objects": ["User", "UserLicense", "LoginHistory"],
+                "salesforce_data": {
+                    "dormant_users": dormant_users,
+                    "dormant_users_source": dormant_source,
+                    "unassigned_seats": unassigned_seats,
+                    "last_login_buckets": {k: v for k, v in buckets.items() if k != 'query_used'},
+                    "login_history_users_90_days": login_history_users,
+                    "license_monthly_cost": LICENSE_MONTHLY_COST,
+                    "estimated_monthly_license_savings": monthly_license_savings,
+                    "estimated_annual_savings": monthly_license_savings * 12,
+                    "cleanup_time_hours": cleanup_time,
+                    "query_used": buckets['query_used']
+                }
+            })
+
+        logger.info(f"License utilization analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing license utilization: {e}")
+        raise
+
+    return findings
+
+# Report and dashboard usage settings
+REPORT_STALE_DAYS = 180  # not run or viewed in this many days
+REPORT_ACTIVE_DAYS = 30
+REPORT_NAME_NOISE = re.compile(r'\b(copy of|copy|clone|cloned|new|old|test|v\d+|version \d+|\d+)\b')
+
+def report_cluster_key(name: str) -> bytes:
+    """Hashed name key that groups copies like 'Copy of Pipeline Report v2' with 'Pipeline Report'"""
+    normalized = ' '.join(REPORT_NAME_NOISE.sub(' ', normalize_name(name)).split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+
+def summarize_report_usage(reports, dashboards, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Compute stale, active and duplicate report counts in a single pass over streamed records
+
+    Only counters and one 8-byte name hash per distinct report name are kept, so memory stays
+    bounded by the number of distinct names rather than the full report metadata.
+    """
+    as_of = as_of or datetime.utcnow()
+    stale_cutoff = (as_of - timedelta(days=REPORT_STALE_DAYS)).strftime('%Y-%m-%d')
+    active_cutoff = (as_of - timedelta(days=REPORT_ACTIVE_DAYS)).strftime('%Y-%m-%d')
+
+    usage = {'total_reports': 0, 'active_reports': 0, 'stale_reports': 0, 'duplicate_reports': 0,
+             'total_dashboards': 0, 'stale_dashboards': 0, 'stale_by_folder': {}}
+    name_counts = {}
+    for report in reports:
+        usage['total_reports'] += 1
+        last_used = max((report.get('LastRunDate') or '')[:10], (report.get('LastViewedDate') or '')[:10])
+        if last_used < stale_cutoff:
+            usage['stale_reports'] += 1
+            folder = report.get('FolderName') or 'Unfiled'
+            usage['stale_by_folder'][folder] = usage['stale_by_folder'].get(folder, 0) + 1
+        elif last_used >= active_cutoff:
+            usage['active_reports'] += 1
+        key = report_cluster_key(report.get('Name'))
+        name_counts[key] = name_counts.get(key, 0) + 1
+
+    for dashboard in dashboards:
+        usage['total_dashboards'] += 1
+        last_used = max((dashboard.get('LastViewedDate') or '')[:10], (dashboard.get('LastReferencedDate') or '')[:10])
+        if last_used < stale_cutoff:
+            usage['stale_dashboards'] += 1
+
+    usage['duplicate_clusters'] = sum(1 for count in name_counts.values() if count > 1)
+    usage['duplicate_reports'] = sum(count - 1 for count in name_counts.values() if count > 1)
+    usage['stale_by_folder'] = dict(sorted(usage['stale_by_folder'].items(), key=lambda item: item[1], reverse=True)[:10])
+    return usage
+
+def analyze_report_usage(sf_client, org_context, department_salaries=None, custom_assumptions=None):
+    """Analyze report and dashboard usage from streamed metadata and size the reporting automation opportunity"""
+    findings = []
+
+    try:
+        active_users = org_context.get('active_users', 10)
+        logger.info("Starting report usage analysis...")
+
+        try:
+            reports = sf_client.query_all_iter("SELECT Id, Name, FolderName, OwnerId, LastRunDate, LastViewedDate FROM Report")
+            dashboards = sf_client.query_all_iter("SELECT Id, Title, FolderName, LastViewedDate, LastReferencedDate FROM Dashboard")
+            usage = summarize_report_usage(reports, dashboards)
+            logger.info(f"Report usage: {usage['total_reports']} reports, {usage['active_reports']} active, {usage['stale_reports']} stale, {usage['duplicate_reports']} duplicates")
+        except Exception as e:
+            logger.warning(f"Error streaming report metadata: {e}")
+            usage = None
+
+        if usage is None:
+            # No report metadata access: fall back to the per-user estimate
+            if active_users > 1:
+                estimated_report_time = active_users * 2  # 2 hours per user per month on manual reporting
+                findings.append({
+                    "id": str(uuid.uuid4()),
+                    "category": "Automation Opportunities",
+                    "title": "Manual Reporting Processes",
+                    "description": f"With {active_users} active users, there's likely significant time spent on manual report generation and data analysis that could be automated with scheduled reports and dashboards.",
+                    "impact": "Medium",
+                    "time_savings_hours": round(estimated_report_time * 0.5, 1),  # 50% of manual time could be saved
+                    "recommendation": "Set up scheduled report deliveries, dashboard subscriptions, and automated data exports. Create role-based dashboards for different user types.",
+                    "affected_objects": ["Reports", "Dashboards", "Scheduled Jobs"],
+                    "salesforce_data": {
+                        "users_affected": active_users,
+                        "estimated_manual_reporting_hours": estimated_report_time,
+                        "automation_recommendation": "scheduled_reports_dashboards"
+                    }
+                })
+            return findings
+
+        if usage['active_reports'] > 0:
+            org_data = {'active_users': active_users, 'report_usage': usage}
+            finding_data = {'category': 'Automation Opportunities', 'title': 'Manual Reporting Processes', 'type': 'reporting'}
+            roi_calc = calculate_enhanced_roi_with_tasks(finding_data, department_salaries, active_users, org_data, custom_assumptions)
+
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Automation Opportunities",
+                "finding_type": "reporting",
+                "title": "Manual Reporting Processes",
+                "description": f"{usage['active_reports']} reports were run or viewed in the last {REPORT_ACTIVE_DAYS} days. Reports pulled by hand each week could be delivered through subscriptions and dashboards instead.",
+                "impact": "High" if roi_calc['monthly_savings_hours'] > 40 else "Medium",
+                "time_savings_hours": round(roi_calc['monthly_savings_hours'], 1),
+                "cleanup_cost": roi_calc['cleanup_cost'],
+                "cleanup_hours": roi_calc['cleanup_hours'],
+                "monthly_user_savings": roi_calc['monthly_user_savings'],
+                "annual_user_savings": roi_calc['annual_user_savings'],
+                "net_annual_roi": roi_calc['net_annual_roi'],
+                "roi_estimate": roi_calc['net_annual_roi'],
+                "confidence": roi_calc['confidence'],
+                "task_breakdown": roi_calc['task_breakdown'],
+                "role_attribution": roi_calc['role_attribution'],
+                "recommendation": "Set up scheduled report deliveries, dashboard subscriptions, and automated data exports. Create role-based dashboards for different user types.",
+                "affected_objects": ["Reports", "Dashboards", "Scheduled Jobs"],
+                "salesforce_data": {
+                    "report_usage": usage,
+                    "users_affected": active_users,
+                    "automation_recommendation": "scheduled_reports_dashboards",
+                    "roi_breakdown": roi_calc.get('calculation_details', {})
+                }
+            })
+
+        cleanup_count = usage['stale_reports'] + usage['duplicate_reports'] + usage['stale_dashboards']
+        if cleanup_count > 0:
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "title": f"{cleanup_count} Stale or Duplicate Reports and Dashboards",
+                "description": f"Found {usage['stale_reports']} reports and {usage['stale_dashboards']} dashboards not used in {REPORT_STALE_DAYS}+ days, plus {usage['duplicate_reports']} near-duplicate reports in {usage['duplicate_clusters']} clusters. Clutter makes it harder for users to find the report they trust.",
+                "impact": "Medium" if cleanup_count > 100 else "Low",
+                "time_savings_hours": round(cleanup_count * 5 / 60, 1),  # 5 min per report to review and archive
+                "recommendation": "Archive reports and dashboards unused for six months, consolidate near-duplicate copies, and keep shared folders for certified reports only.",
+                "affected_objects": ["Reports", "Dashboards", "Report Folders"],
+                "salesforce_data": {
+                    "stale_reports": usage['stale_reports'],
+                    "stale_dashboards": usage['stale_dashboards'],
+                    "duplicate_reports": usage['duplicate_reports'],
+                    "duplicate_clusters": usage['duplicate_clusters'],
+                    "stale_by_folder": usage['stale_by_folder'],
+                    "total_reports": usage['total_reports'],
+                    "total_dashboards": usage['total_dashboards']
+                }
+            })
+
+        logger.info(f"Report usage analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing report usage: {e}")
+        raise
+
+    return findings
+
+# Storage and limits settings
+STORAGE_LIMIT_KEYS = {'data': 'DataStorageMB', 'file': 'FileStorageMB'}
+STORAGE_COST_PER_GB_MONTH = {'data': 250, 'file': 5}  # list price of additional storage blocks
+STORAGE_DEFAULT_MONTHLY_GROWTH_PCT = 2.0  # assumed growth of used storage when there is no previous snapshot
+STORAGE_WARNING_PCT = 75
+STORAGE_RECORD_SIZE_KB = 2  # Salesforce counts most records as 2 KB of data storage
+
+def fetch_limits_snapshot(sf_client) -> Optional[Dict[str, Any]]:
+    """
+    Get org limits and per-object record counts with one /limits call and one /limits/recordCount call
+
+    Returns:
+        dict: Storage usage, API usage and record counts, or None when limits are not accessible
+    """
+    try:
+        limits = sf_client.limits()
+    except Exception as e:
+        logger.warning(f"Error fetching org limits: {e}")
+        return None
+
+    snapshot = {
+        'captured_at': datetime.utcnow().isoformat(),
+        'storage': {},
+        'api_requests': limits.get('DailyApiRequests', {}),
+        'record_counts': {}
+    }
+    for kind, key in STORAGE_LIMIT_KEYS.items():
+        limit = limits.get(key) or {}
+        if limit.get('Max'):
+            snapshot['storage'][kind] = {
+                'max_mb': limit['Max'],
+                'used_mb': limit['Max'] - limit.get('Remaining', limit['Max'])
+            }
+
+    try:
+        record_count = sf_client.restful('limits/recordCount')
+        snapshot['record_counts'] = {row['name']: row['count'] for row in record_count.get('sObjects', [])}
+    except Exception as e:
+        logger.warning(f"Error fetching record counts: {e}")
+
+    return snapshot
+
+def get_record_count(sf_client, org_context, sobject: str) -> int:
+    """Get an object's record count from the shared limits snapshot, falling back to a COUNT() query"""
+    record_counts = ((org_context or {}).get('limits_snapshot') or {}).get('record_counts', {})
+    if sobject in record_counts:
+        return record_counts[sobject]
+    return sf_client.query(f"SELECT COUNT() FROM {sobject}")['totalSize']
+
+def project_storage_growth(current: Dict[str, Any], previous: Optional[Dict[str, Any]], days_between: Optional[float]) -> Dict[str, Any]:
+    """
+    Project monthly storage growth and the overage expected over the next 12 months
+
+    Growth is measured from the previous audit's snapshot when one exists at least a day old,
+    otherwise STORAGE_DEFAULT_MONTHLY_GROWTH_PCT of current usage is assumed.
+    """
+    used_mb, max_mb = current['used_mb'], current['max_mb']
+    if previous and days_between and days_between >= 1:
+        monthly_growth_mb = max(0, (used_mb - previous['used_mb']) / days_between * 30)
+        growth_source = 'measured'
+    else:
+        monthly_growth_mb = used_mb * STORAGE_DEFAULT_MONTHLY_GROWTH_PCT / 100
+        growth_source = 'default_rate'
+
+    remaining_mb = max_mb - used_mb
+    if remaining_mb <= 0:
+        months_until_full = 0
+    elif monthly_growth_mb > 0:
+        months_until_full = round(remaining_mb / monthly_growth_mb, 1)
+    else:
+        months_until_full = None
+
+    return {
+        'used_mb': used_mb,
+        'max_mb': max_mb,
+        'used_pct': round(used_mb / max_mb * 100, 1),
+        'monthly_growth_mb': round(monthly_growth_mb, 1),
+        'growth_source': growth_source,
+        'months_until_full': months_until_full,
+        'projected_overage_mb': round(max(0, used_mb + monthly_growth_mb * 12 - max_mb), 1)
+    }
+
+def analyze_storage_limits(sf_client, org_context, audit_options=None):
+    """Analyze data and file storage usage from the shared limits snapshot and project overage cost"""
+    findings = []
+
+    try:
+        snapshot = org_context.get('limits_snapshot')
+        if not snapshot or not snapshot.get('storage'):
+            logger.info("No limits snapshot available, skipping storage analysis")
+            return findings
+
+        logger.info("Starting storage and limits analysis...")
+        previous = (audit_options or {}).get('previous_limits_snapshot')
+        days_between = None
+        if previous and previous.get('captured_at'):
+            elapsed = datetime.fromisoformat(snapshot['captured_at']) - datetime.fromisoformat(previous['captured_at'])
+            days_between = elapsed.total_seconds() / 86400
+
+        # Largest objects by estimated data storage, from recordCount instead of per-object COUNT queries
+        top_objects = [
+            {'object': name, 'record_count': count, 'estimated_mb': round(count * STORAGE_RECORD_SIZE_KB / 1024, 1)}
+            for name, count in sorted(snapshot['record_counts'].items(), key=lambda item: item[1], reverse=True)[:10]
+        ]
+
+        for kind, current in snapshot['storage'].items():
+            projection = project_storage_growth(current, (previous or {}).get('storage', {}).get(kind), days_between)
+            if projection['used_pct'] < STORAGE_WARNING_PCT and projection['projected_overage_mb'] == 0:
+                continue
+
+            cost_per_mb = STORAGE_COST_PER_GB_MONTH[kind] / 1024
+            current_overage_mb = max(0, projection['used_mb'] - projection['max_mb'])
+            # Average monthly overage cost across the next 12 months of projected growth
+            average_overage_mb = (current_overage_mb + projection['projected_overage_mb']) / 2
+            monthly_overage_cost = round(average_overage_mb * cost_per_mb, 2)
+            months_text = f"is projected to run out in {projection['months_until_full']} months" if projection['months_until_full'] else "is already over its limit" if projection['months_until_full'] == 0 else "is not currently growing"
+
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Revenue Leaks",
+                "finding_type": "storage",
+                "title": f"{kind.title()} Storage at {projection['used_pct']:.0f}% of Limit",
+                "description": f"{kind.title()} storage uses {projection['used_mb']:,} MB of {projection['max_mb']:,} MB and {months_text} at {projection['monthly_growth_mb']:,} MB/month ({projection['growth_source'].replace('_', ' ')} growth). Additional storage costs about ${STORAGE_COST_PER_GB_MONTH[kind]}/GB per month.",
+                "impact": "High" if projection['used_pct'] >= 90 or current_overage_mb > 0 else "Medium",
+                "time_savings_hours": 0,
+                "recommendation": "Archive or delete closed records and old files in the largest objects, set up a data retention policy, and move historical data to Big Objects or an external archive before buying more storage.",
+                "affected_objects": [obj['object'] for obj in top_objects[:5]] if kind == 'data' else ["ContentVersion", "Attachment", "Document"],
+                "salesforce_data": {
+                    "storage_kind": kind,
+                    **projection,
+                    "cost_per_gb_month": STORAGE_COST_PER_GB_MONTH[kind],
+                    "estimated_monthly_overage_cost": monthly_overage_cost,
+                    "top_objects": top_objects if kind == 'data' else [],
+                    "query_used": "GET /limits, GET /limits/recordCount"
+                }
+            })
+
+        logger.info(f"Storage analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing storage limits: {e}")
+        raise
+
+    return findings
+
+# Picklist usage settings
+PICKLIST_USAGE_OBJECTS = ['Account', 'Contact', 'Lead', 'Opportunity', 'Case']
+PICKLIST_MAX_GROUP_ROWS = 2000  # SOQL aggregate queries return at most 2,000 rows
+PICKLIST_MAX_CUBE_FIELDS = 3  # GROUP BY CUBE accepts up to three fields
+COMPOSITE_BATCH_LIMIT = 25  # subrequests per composite/batch call
+PICKLIST_RECODE_MINUTES = 0.5  # per record, mass-updated with Data Loader or a list view
+
+def plan_picklist_queries(sobject: str, fields: List[tuple]) -> List[Dict[str, Any]]:
+    """
+    Pack an object's picklist fields into as few GROUP BY CUBE queries as possible
+
+    A CUBE over fields with n1, n2, ... values returns at most (n1 + 2) * (n2 + 2) * ... rows
+    (each value, null, and the subtotal), so fields are packed first-fit decreasing while that
+    product stays within PICKLIST_MAX_GROUP_ROWS.
+
+    Args:
+        sobject: Object API name
+        fields: (field name, picklist value count) pairs
+    """
+    groups = []
+    for field, value_count in sorted(fields, key=lambda item: item[1], reverse=True):
+        rows = value_count + 2
+        if rows > PICKLIST_MAX_GROUP_ROWS:
+            logger.warning(f"Skipping picklist {sobject}.{field}: {value_count} values exceed the aggregate row limit")
+            continue
+        for group in groups:
+            if len(group['fields']) < PICKLIST_MAX_CUBE_FIELDS and group['max_rows'] * rows <= PICKLIST_MAX_GROUP_ROWS:
+                group['fields'].append(field)
+                group['max_rows'] *= rows
+                break
+        else:
+            groups.append({'fields': [field], 'max_rows': rows})
+
+    for group in groups:
+        field_list = ', '.join(group['fields'])
+        grouping = ', '.join(f"GROUPING({field}) grp{i}" for i, field in enumerate(group['fields']))
+        group['sobject'] = sobject
+        group['soql'] = f"SELECT {field_list}, {grouping}, COUNT(Id) record_count FROM {sobject} GROUP BY CUBE({field_list})"
+    return groups
+
+def run_soql_batch(sf_client, soqls: List[str]) -> List[Optional[dict]]:
+    """
+    Run queries through composite/batch, 25 subrequests per call
+
+    Falls back to one request per query when the composite call fails. Failed queries return None.
+    """
+    results = []
+    for start in range(0, len(soqls), COMPOSITE_BATCH_LIMIT):
+        chunk = soqls[start:start + COMPOSITE_BATCH_LIMIT]
+        try:
+            response = sf_client.restful('composite/batch', method='POST', json={
+                'batchRequests': [{'method': 'GET', 'url': f"v{sf_client.sf_version}/query?q={quote_plus(soql)}"} for soql in chunk]
+            })
+            for soql, subresult in zip(chunk, response.get('results', [])):
+                if subresult.get('statusCode') == 200:
+                    results.append(subresult['result'])
+                else:
+                    logger.warning(f"Batched query failed ({subresult.get('statusCode')}): {soql}")
+                    results.append(None)
+        except Exception as e:
+            logger.warning(f"Composite batch failed, running {len(chunk)} queries individually: {e}")
+            for soql in chunk:
+                try:
+                    results.append(sf_client.query(soql))
+                except Exception as query_error:
+                    logger.warning(f"Query failed: {soql}: {query_error}")
+                    results.append(None)
+    return results
+
+def summarize_picklist_field(sobject: str, field: dict, values: Dict[Any, int], total_records: int) -> Dict[str, Any]:
+    """Flag unused, inactive and near-duplicate values of one picklist from its value histogram"""
+    active_values = {v['value'] for v in field.get('picklistValues', []) if v.get('active')}
+    used = {value: count for value, count in values.items() if value is not None and count > 0}
+
+    inactive_in_use = {value: count for value, count in used.items() if value not in active_values}
+
+    # Values that differ only by case, spacing or punctuation ("Tech", "tech.", "TECH")
+    variants = {}
+    for value in used:
+        variants.setdefault(re.sub(r'[^a-z0-9]', '', str(value).lower()), []).append(value)
+    near_duplicates = [sorted(group, key=lambda v: used[v], reverse=True) for group in variants.values() if len(group) > 1]
+
+    # Records to re-code: minority spellings plus inactive values, each record counted once
+    nonstandard_values = set(inactive_in_use)
+    for group in near_duplicates:
+        nonstandard_values.update(group[1:])
+
+    return {
+        'object': sobject,
+        'field': field['name'],
+        'label': field.get('label', field['name']),
+        'total_records': total_records,
+        'populated_records': sum(used.values()),
+        'value_counts': used,
+        'unused_values': sorted(active_values - set(used)) if used else [],
+        'inactive_values_in_use': inactive_in_use,
+        'near_duplicates': near_duplicates,
+        'nonstandard_records': sum(used[value] for value in nonstandard_values)
+    }
+
+def fetch_picklist_usage(sf_client) -> Dict[str, Any]:
+    """Get value histograms for every groupable picklist on the usage objects with batched CUBE queries"""
+    plans = []
+    field_meta = {}
+    for sobject in PICKLIST_USAGE_OBJECTS:
+        try:
+            describe = get_cached_describe(sf_client, sobject)
+        except Exception as e:
+            logger.warning(f"Error describing {sobject} for picklist usage: {e}")
+            continue
+        picklists = [f for f in describe.get('fields', []) if f.get('type') == 'picklist' and f.get('groupable') and f.get('picklistValues')]
+        for field in picklists:
+            field_meta[(sobject, field['name'])] = field
+        plans.extend(plan_picklist_queries(sobject, [(f['name'], len(f['picklistValues'])) for f in picklists]))
+
+    results = run_soql_batch(sf_client, [plan['soql'] for plan in plans])
+
+    # Unrestricted picklists can hold more values than describe lists, so a packed CUBE may
+    # overflow the row limit; retry those fields one per query
+    retry_plans = []
+    for plan, result in zip(plans, results):
+        if result is None and len(plan['fields']) > 1:
+            for field in plan['fields']:
+                retry_plans.extend(plan_picklist_queries(plan['sobject'], [(field, 0)]))
+    if retry_plans:
+        plans = plans + retry_plans
+        results = results + run_soql_batch(sf_client, [plan['soql'] for plan in retry_plans])
+
+    fields = {}
+    for plan, result in zip(plans, results):
+        if result is None:
+            continue
+        histograms = {field: {} for field in plan['fields']}
+        total_records = 0
+        for row in result.get('records', []):
+            grouped = [row.get(f'grp{i}') == 0 for i in range(len(plan['fields']))]
+            if not any(grouped):
+                total_records = row.get('record_count', 0)
+            elif sum(grouped) == 1:
+                field = plan['fields'][grouped.index(True)]
+                histograms[field][row.get(field)] = row.get('record_count', 0)
+        for field, values in histograms.items():
+            fields[f"{plan['sobject']}.{field}"] = summarize_picklist_field(plan['sobject'], field_meta[(plan['sobject'], field)], values, total_records)
+
+    return {
+        'fields': fields,
+        'queries_run': len(plans),
+        'api_calls': -(-len(plans) // COMPOSITE_BATCH_LIMIT),
+        'unused_values': sum(len(f['unused_values']) for f in fields.values()),
+        'inactive_values_in_use': sum(len(f['inactive_values_in_use']) for f in fields.values()),
+        'near_duplicate_groups': sum(len(f['near_duplicates']) for f in fields.values()),
+        'nonstandard_records': sum(f['nonstandard_records'] for f in fields.values())
+    }
+
+def get_picklist_usage(sf_client) -> Dict[str, Any]:
+    """Picklist usage for the client's org, loaded once per audit since record counts change between audits"""
+    if isinstance(sf_client, CachedSalesforceClient):
+        return sf_client.memoize('picklist_usage', lambda: fetch_picklist_usage(sf_client))
+    return fetch_picklist_usage(sf_client)
+
+def analyze_picklist_usage(sf_client, org_context):
+    """Analyze picklist value usage to find values nobody selects"""
+    findings = []
+
+    try:
+        logger.info("Starting picklist usage analysis...")
+        usage = get_picklist_usage(sf_client)
+        logger.info(f"Picklist usage: {len(usage['fields'])} fields in {usage['queries_run']} queries ({usage['api_calls']} API calls)")
+
+        fields_with_unused = sorted(
+            (f for f in usage['fields'].values() if f['unused_values']),
+            key=lambda f: len(f['unused_values']), reverse=True
+        )
+        if fields_with_unused:
+            unused_count = usage['unused_values']
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Time Savings",
+                "title": f"{unused_count} Unused Picklist Values",
+                "description": f"Found {unused_count} active picklist values across {len(fields_with_unused)} fields that no record uses. Long picklists slow down data entry and push users toward the wrong value.",
+                "impact": "Medium" if unused_count > 50 else "Low",
+                "time_savings_hours": round(unused_count * 2 / 60, 1),  # 2 minutes to review and deactivate each value
+                "recommendation": "Deactivate unused picklist values, move shared value lists to Global Value Sets, and restrict picklists to their defined values.",
+                "affected_objects": sorted({f['object'] for f in fields_with_unused}),
+                "salesforce_data": {
+                    "unused_values": unused_count,
+                    "fields_with_unused_values": len(fields_with_unused),
+                    "top_fields": [
+                        {"field": f"{f['object']}.{f['field']}", "unused_values": f['unused_values'][:10], "unused_count": len(f['unused_values'])}
+                        for f in fields_with_unused[:10]
+                    ],
+                    "fields_analyzed": len(usage['fields']),
+                    "queries_run": usage['queries_run']
+                }
+            })
+
+        logger.info(f"Picklist usage analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing picklist usage: {e}")
+        raise
+
+    return findings
+
+# Contact data validation settings
+CONTACT_VALIDATION_OBJECTS = {
+    'Contact': {
+        'fields': ['Id', 'Email', 'Phone', 'MailingCountry', 'MailingState'], 'where': None,
+        'email': 'Email', 'phone': 'Phone', 'country': 'MailingCountry', 'state': 'MailingState'
+    },
+    'Lead': {
+        'fields': ['Id', 'Email', 'Phone', 'Country', 'State'], 'where': "IsConverted = false",
+        'email': 'Email', 'phone': 'Phone', 'country': 'Country', 'state': 'State'
+    }
+}
+CONTACT_VALIDATION_BATCH_SIZE = 50000
+CONTACT_ISSUE_TYPES = ['invalid_email', 'invalid_phone', 'missing_country', 'missing_state', 'no_email_or_phone']
+CONTACT_ISSUE_SAMPLES = 5
+EMAIL_PATTERN = r"^[A-Za-z0-9._%+'-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}$"
+# Countries where addresses are unusable for territories and tax without a state or province
+STATE_REQUIRED_COUNTRIES = {'us', 'usa', 'united states', 'united states of america', 'ca', 'canada', 'au', 'australia'}
+
+def validate_contact_batch(batch: pd.DataFrame, config: dict) -> Dict[str, pd.Series]:
+    """
+    Flag data-quality issues in a batch of Contact or Lead records with vectorized string operations
+
+    Returns:
+        dict: One boolean Series per issue type, aligned with the batch index
+    """
+    email = batch[config['email']].fillna('').astype(str).str.strip()
+    phone = batch[config['phone']].fillna('').astype(str)
+    country = batch[config['country']].fillna('').astype(str).str.strip()
+    state = batch[config['state']].fillna('').astype(str).str.strip()
+
+    has_email = email != ''
+    has_phone = phone.str.strip() != ''
+    phone_digits = phone.str.replace(r'\D', '', regex=True)
+
+    return {
+        'invalid_email': has_email & ~email.str.match(EMAIL_PATTERN),
+        # E.164 numbers have 7-15 digits; a single repeated digit is a placeholder
+        'invalid_phone': has_phone & (~phone_digits.str.len().between(7, 15) | phone_digits.str.fullmatch(r'(\d)\1*')),
+        'missing_country': country == '',
+        'missing_state': country.str.lower().isin(STATE_REQUIRED_COUNTRIES) & (state == ''),
+        'no_email_or_phone': ~has_email & ~has_phone
+    }
+
+def _issue_samples(batch: pd.DataFrame, mask: pd.Series, config: dict, issue: str, limit: int) -> List[dict]:
+    """A few example records for an issue type"""
+    column = {'invalid_email': 'email', 'invalid_phone': 'phone', 'missing_country': 'country', 'missing_state': 'country'}.get(issue)
+    rows = batch.loc[mask].head(limit)
+    return [{'Id': row['Id'], 'value': row[config[column]] if column else None} for _, row in rows.iterrows()]
+
+def scan_contact_quality(records, config: dict, batch_size: int = CONTACT_VALIDATION_BATCH_SIZE) -> Dict[str, Any]:
+    """Validate streamed records batch by batch, keeping only per-issue counts and a few samples"""
+    counts = {issue: 0 for issue in CONTACT_ISSUE_TYPES}
+    samples = {issue: [] for issue in CONTACT_ISSUE_TYPES}
+    records_scanned = 0
+    records_with_issues = 0
+
+    iterator = iter(records)
+    while True:
+        chunk = list(itertools.islice(iterator, batch_size))
+        if not chunk:
+            break
+        batch = pd.DataFrame.from_records(chunk, columns=config['fields'])
+        issues = run_cpu_bound(validate_contact_batch, batch, config)
+        records_scanned += len(batch)
+        records_with_issues += int(np.logical_or.reduce([mask.to_numpy() for mask in issues.values()]).sum())
+        for issue, mask in issues.items():
+            counts[issue] += int(mask.sum())
+            if len(samples[issue]) < CONTACT_ISSUE_SAMPLES and mask.any():
+                samples[issue].extend(_issue_samples(batch, mask, config, issue, CONTACT_ISSUE_SAMPLES - len(samples[issue])))
+
+    return {
+        'records_scanned': records_scanned,
+        'records_with_issues': records_with_issues,
+        'issue_counts': counts,
+        'samples': samples
+    }
+
+def sample_contact_quality(sf_client, sobject: str, config: dict, population: int) -> Dict[str, Any]:
+    """Estimate issue counts for a large object from Id-range (or CreatedDate) windows, each window treated as a cluster"""
+    method, windows = draw_record_sample(sf_client, sobject, config['fields'], where=config['where'])
+    if not windows:
+        return {'records_scanned': 0, 'records_with_issues': 0, 'issue_counts': {issue: 0 for issue in CONTACT_ISSUE_TYPES},
+                'samples': {issue: [] for issue in CONTACT_ISSUE_TYPES},
+                'sampling': {'mode': 'sample', 'method': method, 'population': population, 'margin_of_error': 0}}
+
+    batch = pd.DataFrame.from_records([r for window in windows for r in window], columns=config['fields'])
+    batch['_window'] = np.repeat(np.arange(len(windows)), [len(window) for window in windows])
+    issues = run_cpu_bound(validate_contact_batch, batch, config)
+    issues['any_issue'] = np.logical_or.reduce([mask for mask in issues.values()])
+    per_window = pd.DataFrame(issues).groupby(batch['_window']).agg(['size', 'sum'])
+
+    estimates = {}
+    for issue in issues:
+        clusters = list(zip(per_window[(issue, 'size')].tolist(), per_window[(issue, 'sum')].astype(int).tolist()))
+        estimates[issue] = estimate_cluster_ratio(clusters, population)
+
+    any_issue = estimates.pop('any_issue')
+    return {
+        'records_scanned': len(batch),
+        'records_with_issues': any_issue['estimate'],
+        'issue_counts': {issue: estimates[issue]['estimate'] for issue in CONTACT_ISSUE_TYPES},
+        'samples': {issue: _issue_samples(batch, issues[issue], config, issue, CONTACT_ISSUE_SAMPLES) for issue in CONTACT_ISSUE_TYPES},
+        'sampling': {
+            'mode': 'sample',
+            'method': method,
+            'population': population,
+            'sampled_records': len(batch),
+            'windows': len(windows),
+            'ci_low': any_issue['ci_low'],
+            'ci_high': any_issue['ci_high'],
+            'margin_of_error': any_issue['margin_of_error'],
+            'confidence_level': SAMPLING_CONFIDENCE_LEVEL,
+            'issue_intervals': {issue: [estimates[issue]['ci_low'], estimates[issue]['ci_high']] for issue in CONTACT_ISSUE_TYPES}
+        }
+    }
+
+def analyze_contact_data_quality(sf_client, org_context, audit_options=None):
+    """Validate Contact and Lead emails, phones and addresses over streamed, vectorized batches"""
+    findings = []
+
+    try:
+        sampling_mode = (audit_options or {}).get('sampling_mode', 'auto')
+        logger.info(f"Starting contact data quality analysis (sampling mode: {sampling_mode})...")
+
+        object_results = {}
+        for sobject, config in CONTACT_VALIDATION_OBJECTS.items():
+            try:
+                where_clause = f" WHERE {config['where']}" if config['where'] else ""
+                if config['where']:
+                    population = sf_client.query(f"SELECT COUNT() FROM {sobject}{where_clause}")['totalSize']
+                else:
+                    population = get_record_count(sf_client, org_context, sobject)
+
+                if resolve_sampling_mode(sampling_mode, population) == 'sample':
+                    object_results[sobject] = sample_contact_quality(sf_client, sobject, config, population)
+                else:
+                    records = sf_client.query_all_iter(f"SELECT {', '.join(config['fields'])} FROM {sobject}{where_clause}")
+                    object_results[sobject] = scan_contact_quality(records, config)
+                    object_results[sobject]['sampling'] = {'mode': 'exact', 'population': population}
+                logger.info(f"{sobject}: {object_results[sobject]['records_with_issues']} records with contact data issues in {object_results[sobject]['records_scanned']} scanned ({object_results[sobject]['sampling']['mode']})")
+            except Exception as e:
+                logger.warning(f"Error validating {sobject} contact data: {e}")
+
+        invalid_records = sum(r['records_with_issues'] for r in object_results.values())
+        if invalid_records > 0:
+            issue_totals = {issue: sum(r['issue_counts'][issue] for r in object_results.values()) for issue in CONTACT_ISSUE_TYPES}
+            affected_objects = [name for name, result in object_results.items() if result['records_with_issues'] > 0]
+            sampled = [r['sampling'] for r in object_results.values() if r['sampling']['mode'] == 'sample']
+
+            if sampled:
+                total_margin = sum(s['margin_of_error'] for s in sampled)
+                confidence = sampling_confidence_label(total_margin / invalid_records)
+                estimate_note = f" Estimated from a statistical sample (±{total_margin} records at {SAMPLING_CONFIDENCE_LEVEL:.0%} confidence)."
+                by_created_date = [name for name, result in object_results.items() if result['sampling'].get('method') == 'created_date']
+                if by_created_date:
+                    estimate_note += (f" {' and '.join(by_created_date)} Ids span several Salesforce instances, so their sample reads windows of"
+                                      " records created together instead of random Id ranges; records loaded together tend to share issues,"
+                                      " so the true margin may be wider.")
+            else:
+                confidence = "High"
+                estimate_note = ""
+
+            issue_summary = ', '.join(f"{count} {issue.replace('_', ' ')}" for issue, count in issue_totals.items() if count)
+            findings.append({
+                "id": str(uuid.uuid4()),
+                "category": "Revenue Leaks",
+                "title": f"{invalid_records} Contacts and Leads with Invalid Contact Data",
+                "description": f"Found {invalid_records} contact and lead records that cannot be reliably reached or routed ({issue_summary}). Bad emails bounce campaigns, bad phones waste call time and missing regions break territory assignment.{estimate_note}",
+                "impact": "High" if invalid_records > 1000 else "Medium",
+                "time_savings_hours": round(invalid_records * 2 / 60, 1),  # 2 minutes to research and fix each record
+                "confidence": confidence,
+                "recommendation": "Add validation rules for email and phone formats, turn on State and Country picklists, and run a data enrichment pass on existing records.",
+                "affected_objects": affected_objects,
+                "salesforce_data": {
+                    "invalid_contact_records": invalid_records,
+                    "issue_counts": issue_totals,
+                    "objects": object_results,
+                    "sampling": {name: result['sampling'] for name, result in object_results.items()}
+                }
+            })
+
+        logger.info(f"Contact data quality analysis completed: {len(findings)} findings")
+
+    except Exception as e:
+        logger.error(f"Error analyzing contact data quality: {e}")
+        raise
+
+    return findings
+
+# salesforce_data keys of data-quality gaps and the field each one is about
+FIELD_COVERAGE_GAPS = {
+    'orphaned_opportunities': ('Opportunity', 'AccountId'),
+    'opportunities_no_close_date': ('Opportunity', 'CloseDate'),
+    'orphaned_contacts': ('Contact', 'AccountId'),
+    'opportunities_missing_amount': ('Opportunity', 'Amount')
+}
+# Contact quality issues and the CONTACT_VALIDATION_OBJECTS field each one is about
+CONTACT_ISSUE_COVERAGE_FIELDS = {
+    'invalid_email': 'email',
+    'invalid_phone': 'phone',
+    'missing_country': 'country',
+    'missing_state': 'state'
+}
+# The Tooling API returns a rule's formula only when querying that one rule, so this caps the calls
+VALIDATION_RULE_FORMULA_MAX_RULES = 50
+VALIDATION_RULE_FORMULA_WORKERS = 4  # formula fetches in flight at once on the shared I/O pool
+
+def fetch_validation_rule_formula(sf_client, rule_id: str) -> Optional[str]:
+    """Get the error condition formula of one validation rule, or None when it cannot be read"""
+    try:
+        records = paginated_query(sf_client, f"SELECT Id, Metadata FROM ValidationRule WHERE Id = '{rule_id}'", api='tooling')
+    except Exception as e:
+        logger.warning(f"Error loading formula of validation rule {rule_id}: {e}")
+        return None
+    return ((records[0].get('Metadata') or {}).get('errorConditionFormula') if records else None)
+
+def fetch_validation_rules(sf_client, sobjects: List[str]) -> List[dict]:
+    """Get validation rules of the given objects from the Tooling API, with the formulas of the first VALIDATION_RULE_FORMULA_MAX_RULES"""
+    object_list = ', '.join(f"'{sobject}'" for sobject in sorted(sobjects))
+    rules = paginated_query(
+        sf_client,
+        "SELECT Id, ValidationName, Active, ErrorDisplayField, EntityDefinition.QualifiedApiName "
+        f"FROM ValidationRule WHERE EntityDefinition.QualifiedApiName IN ({object_list})",
+        api='tooling'
+    )
+    # Active rules first, so a capped fetch still reads the formulas that enforce something
+    with_formula = sorted(rules, key=lambda rule: not rule.get('Active'))[:VALIDATION_RULE_FORMULA_MAX_RULES]
+    if len(rules) > len(with_formula):
+        logger.warning(f"Reading formulas of {len(with_formula)} of {len(rules)} validation rules on {object_list}")
+    formulas = dict(zip(
+        [rule['Id'] for rule in with_formula],
+        map_bounded(io_executor, lambda rule: fetch_validation_rule_formula(sf_client, rule['Id']), with_formula, VALIDATION_RULE_FORMULA_WORKERS)
+    ))
+    for rule in rules:
+        rule['Formula'] = formulas.get(rule['Id'])
+    return rules
+
+def get_field_coverage(sf_client, fields: List[tuple]) -> Dict[str, Dict[str, Any]]:
+    """
+    Whether each (object, field) is enforced by a required setting or a validation rule
+
+    Describes and validation rules come from the org metadata cache, so this makes no
+    queries when they were already loaded in the last METADATA_CACHE_TTL_SECONDS.
+
+    A rule covers a field when the field is its error location or its error condition
+    formula references the field; rules whose formula was not read match on error location only.
+    """
+    sobjects = sorted({sobject for sobject, _ in fields})
+    rules = org_metadata_cache.get_or_load(
+        get_org_cache_key(sf_client), f"validation_rules:{','.join(sobjects)}", lambda: fetch_validation_rules(sf_client, sobjects)
+    )
+
+    coverage = {}
+    for sobject, field_name in fields:
+        field = next((f for f in get_cached_describe(sf_client, sobject).get('fields', []) if f['name'] == field_name), {})
+        # Lookups are usually referred to by relationship name ("Account" for AccountId)
+        names = {field_name.lower(), (field.get('relationshipName') or field_name).lower()}
+        # A name right after "." or "$" is a field of another record (Account.Phone, $User.Email), not this one
+        references = re.compile('|'.join(rf'(?<![\w.$]){re.escape(name)}\b' for name in sorted(names)), re.IGNORECASE)
+        matching = [
+            rule for rule in rules
+            if (rule.get('EntityDefinition') or {}).get('QualifiedApiName') == sobject
+            and ((rule.get('ErrorDisplayField') or '').lower() in names
+                 or references.search(rule.get('Formula') or ''))
+        ]
+        coverage[f"{sobject}.{field_name}"] = {
+            'object': sobject,
+            'field': field_name,
+            'label': field.get('label', field_name),
+            'required': bool(field) and not field.get('nillable', True) and field.get('createable', False),
+            'active_rules': [rule['ValidationName'] for rule in matching if rule.get('Active')],
+            'inactive_rules': [rule['ValidationName'] for rule in matching if not rule.get('Active')]
+        }
+    return coverage
+
+def field_coverage_gaps(salesforce_data: dict) -> List[tuple]:
+    """The (object, field) gaps a finding reports, each with its affected record count"""
+    gaps = [(target, salesforce_data[key]) for key, target in FIELD_COVERAGE_GAPS.items() if salesforce_data.get(key)]
+    # Contact data quality findings report issue counts per object
+    for sobject, result in (salesforce_data.get('objects') or {}).items():
+        config = CONTACT_VALIDATION_OBJECTS.get(sobject)
+        if config is None or not isinstance(result, dict):
+            continue
+        for issue, field_key in CONTACT_ISSUE_COVERAGE_FIELDS.items():
+            if (result.get('issue_counts') or {}).get(issue):
+                gaps.append(((sobject, config[field_key]), result['issue_counts'][issue]))
+    return gaps
+
+def field_coverage_recommendation(field: dict, gap_count: int) -> str:
+    """Recommendation for records missing or mis-entering one field, given how the field is enforced today"""
+    sobject, label = field['object'], field['label']
+    if field['required']:
+        return f"{label} is already required on {sobject}, so the {gap_count} affected records were loaded before the requirement or by integrations. Clean them up with a one-time data load; no new validation rule is needed."
+    if field['active_rules']:
+        return f"Active validation rule {', '.join(field['active_rules'])} already covers {label} on {sobject}. The {gap_count} affected records predate it or come from integrations that bypass it: clean up existing records and review bypass permissions."
+    if field['inactive_rules']:
+        return f"Validation rule {', '.join(field['inactive_rules'])} for {label} on {sobject} exists but is inactive. Clean up the {gap_count} existing records, then activate it to prevent new gaps."
+    return f"No validation rule or required setting covers {label} on {sobject}. Add a validation rule (or make the field required) and clean up the {gap_count} existing records."
+
+def annotate_field_coverage(sf_client, findings: List[dict]) -> int:
+    """
+    Rewrite data-quality recommendations based on existing validation rules and required fields
+
+    Returns:
+        int: Number of findings annotated
+    """
+    gaps = [(finding, field_coverage_gaps(finding.get('salesforce_data', {}))) for finding in findings]
+    gaps = [(finding, finding_gaps) for finding, finding_gaps in gaps if finding_gaps]
+    if not gaps:
+        return 0
+
+    try:
+        coverage = get_field_coverage(sf_client, sorted({target for _, finding_gaps in gaps for target, _ in finding_gaps}))
+    except Exception as e:
+        logger.warning(f"Error loading validation rule coverage: {e}")
+        return 0
+
+    for finding, finding_gaps in gaps:
+        fields = [(coverage[f"{sobject}.{field_name}"], gap_count) for (sobject, field_name), gap_count in finding_gaps]
+        finding['recommendation'] = ' '.join(field_coverage_recommendation(field, gap_count) for field, gap_count in fields)
+        finding['salesforce_data']['field_coverage'] = [field for field, _ in fields]
+
+    logger.info(f"Annotated {len(gaps)} data quality findings with validation rule coverage")
+    return len(gaps)
+
+# Objects probed for per-object high-water marks on every audit, with an optional filter
+WATERMARK_OBJECTS = {
+    'Account': None,
+    'Contact': None,
+    'Opportunity': None,
+    'Lead': None,
+    'Case': None,
+    'User': "IsActive = true"
+}
+
+# Audit tiers an analyzer can be enabled for
+AUDIT_TIERS = ['quick', 'deep']
+
+# Per-tier analyzer concurrency and time budget (None runs every analyzer to completion)
+AUDIT_TIER_SETTINGS = {
+    'quick': {
+        'max_workers': int(os.environ.get('QUICK_AUDIT_ANALYZER_WORKERS', '8')),
+        'time_budget_seconds': float(os.environ.get('QUICK_AUDIT_TIME_BUDGET_SECONDS', '3'))
+    },
+    'deep': {
+        'max_workers': int(os.environ.get('DEEP_AUDIT_ANALYZER_WORKERS', '4')),
+        'time_budget_seconds': None
+    }
+}
+
+# Rough API calls per metadata loader, for audit cost estimates
+ANALYZER_METADATA_API_CALLS = {'global_describe': 1, 'automation_inventory': 4, 'picklist_usage': 3}
+
+# Registered analyzers: name -> spec (see register_analyzer)
+ANALYZER_REGISTRY = {}
+
+# Shared metadata an analyzer can declare; each loader runs once per audit (describes and automation also persist in the org cache)
+ANALYZER_METADATA_LOADERS = {
+    'global_describe': lambda sf_client: get_cached_describe(sf_client),
+    'automation_inventory': lambda sf_client: get_automation_inventory(sf_client),
+    'picklist_usage': lambda sf_client: get_picklist_usage(sf_client)
+}
+
+def register_analyzer(name: str, run, queries: List[str] = (), describes: List[str] = (), metadata: List[str] = (),
+                      depends_on: List[str] = (), tiers: List[str] = AUDIT_TIERS, watermark_objects: Optional[List[str]] = None,
+                      api_calls: int = 0, streams: List[str] = (), metadata_tiers: Optional[List[str]] = None):
+    """
+    Register an analyzer with the inputs it needs
+
+    Args:
+        name: Analyzer name, stored on each finding as 'analyzer'
+        run: Callable taking the analyzer context dict and returning findings
+        queries: SOQL the analyzer issues through sf_client.query, prefetched and deduplicated across analyzers
+        describes: sObjects the analyzer describes
+        metadata: Keys of ANALYZER_METADATA_LOADERS the analyzer reads
+        depends_on: Analyzers that must finish first
+        tiers: Audit tiers the analyzer runs in
+        watermark_objects: Objects whose watermarks decide carry-forward; None always re-runs
+        api_calls: Rough API calls the analyzer makes beyond its declared inputs, for cost estimates
+        streams: Objects the analyzer reads record by record, for cost estimates
+        metadata_tiers: Tiers that load the declared metadata; None loads it in every tier the analyzer runs in
+    """
+    ANALYZER_REGISTRY[name] = {
+        'run': run,
+        'queries': list(queries),
+        'describes': list(describes),
+        'metadata': list(metadata),
+        'depends_on': list(depends_on),
+        'tiers': list(tiers),
+        'watermark_objects': watermark_objects,
+        'api_calls': api_calls,
+        'streams': list(streams),
+        'metadata_tiers': metadata_tiers
+    }
+
+def analyzer_metadata(name: str, tier: str) -> List[str]:
+    """Metadata keys an analyzer loads in a tier"""
+    spec = ANALYZER_REGISTRY[name]
+    if spec['metadata_tiers'] is not None and tier not in spec['metadata_tiers']:
+        return []
+    return spec['metadata']
+
+register_analyzer(
+    'custom_fields',
+    lambda ctx: analyze_custom_fields(ctx['sf'], ctx['org_context'], ctx['department_salaries'], ctx['custom_assumptions']),
+    describes=['Account', 'Contact', 'Opportunity', 'Lead', 'Case'], metadata=['global_describe']
+)
+register_analyzer(
+    'data_quality',
+    lambda ctx: analyze_data_quality(ctx['sf'], ctx['org_context']),
+    queries=["SELECT COUNT() FROM Opportunity WHERE AccountId = null",
+             "SELECT COUNT() FROM Opportunity WHERE CloseDate = null",
+             "SELECT COUNT() FROM Contact WHERE AccountId = null"],
+    watermark_objects=['Opportunity', 'Contact']
+)
+register_analyzer(
+    'automation_inventory',
+    lambda ctx: analyze_automation_inventory(ctx['sf'], ctx['org_context']),
+    metadata=['automation_inventory']
+)
+register_analyzer(
+    'automation',  # Depends on the automation inventory, which has no watermark
+    lambda ctx: analyze_automation_opportunities(ctx['sf'], ctx['org_context'], get_automation_inventory(ctx['sf'])),
+    metadata=['automation_inventory']
+)
+register_analyzer(
+    'system_configuration',
+    lambda ctx: analyze_system_configuration(ctx['sf'], ctx['org_context']),
+    watermark_objects=['User']
+)
+register_analyzer(
+    'data_governance',  # Deep audits size standardization from picklist usage; quick audits estimate it
+    lambda ctx: analyze_data_governance(ctx['sf'], ctx['org_context'], get_picklist_usage(ctx['sf']) if ctx.get('tier', 'deep') == 'deep' else None),
+    queries=["SELECT COUNT() FROM Opportunity WHERE Amount = null AND StageName != 'Closed Lost'"],
+    metadata=['picklist_usage'], metadata_tiers=['deep']
+)
+register_analyzer(
+    'picklist_usage',
+    lambda ctx: analyze_picklist_usage(ctx['sf'], ctx['org_context']),
+    describes=PICKLIST_USAGE_OBJECTS, metadata=['picklist_usage'], tiers=['deep']
+)
+register_analyzer(
+    'duplicates',
+    lambda ctx: analyze_duplicate_records(ctx['sf'], ctx['org_context'], ctx['audit_options']),
+    queries=["SELECT COUNT() FROM Lead WHERE IsConverted = false"],
+    tiers=['deep'], watermark_objects=['Account', 'Contact', 'Lead'], streams=['Account', 'Contact', 'Lead']
+)
+register_analyzer(
+    'contact_quality',
+    lambda ctx: analyze_contact_data_quality(ctx['sf'], ctx['org_context'], ctx['audit_options']),
+    queries=["SELECT COUNT() FROM Lead WHERE IsConverted = false"],
+    tiers=['deep'], watermark_objects=['Contact', 'Lead'], streams=['Contact', 'Lead']
+)
+register_analyzer(
+    'data_skew',  # Full-table GROUP BY aggregates, too slow for quick audits
+    lambda ctx: analyze_data_skew(ctx['sf'], ctx['org_context']),
+    tiers=['deep'], watermark_objects=['Account', 'Contact', 'Opportunity', 'Case', 'Lead'],
+    api_calls=len(ACCOUNT_SKEW_CHILD_OBJECTS) + len(OWNERSHIP_SKEW_OBJECTS)
+)
+register_analyzer(
+    'record_aging',  # Aging is relative to today, so it always re-runs (one aggregate per object)
+    lambda ctx: analyze_record_aging(ctx['sf'], ctx['org_context'], ctx['audit_options']),
+    api_calls=len(AGING_OBJECTS)
+)
+register_analyzer(
+    'security',
+    lambda ctx: analyze_security_permissions(ctx['sf'], ctx['org_context']),
+    queries=["SELECT ProfileId, COUNT(Id) user_count FROM User WHERE IsActive = true GROUP BY ProfileId"],
+    tiers=['deep'], api_calls=3, streams=['PermissionSet', 'ObjectPermissions', 'PermissionSetAssignment']
+)
+register_analyzer(
+    'license_utilization',  # Login recency is relative to today
+    lambda ctx: analyze_license_utilization(ctx['sf'], ctx['org_context']),
+    queries=["SELECT Name, TotalLicenses, UsedLicenses FROM UserLicense WHERE Status = 'Active'"],
+    api_calls=2
+)
+register_analyzer(
+    'report_usage',
+    lambda ctx: analyze_report_usage(ctx['sf'], ctx['org_context'], ctx['department_salaries'], ctx['custom_assumptions']),
+    tiers=['deep'], streams=['Report', 'Dashboard']
+)
+register_analyzer(
+    'storage_limits',  # Storage usage is read fresh from /limits on every run
+    lambda ctx: analyze_storage_limits(ctx['sf'], ctx['org_context'], ctx['audit_options'])
+)
+
+# Objects each analyzer reads; None means the analyzer depends on metadata and always re-runs
+ANALYZER_WATERMARK_OBJECTS = {name: spec['watermark_objects'] for name, spec in ANALYZER_REGISTRY.items()}
+
+def probe_object_watermarks(sf_client, deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Get record count and max SystemModstamp for each watermark object (one aggregate query each)
+
+    Objects not probed before the deadline (time.monotonic()) are left out, so analyzers
+    reading them re-run instead of carrying findings forward.
+    """
+    watermarks = {}
+    for sobject, where in WATERMARK_OBJECTS.items():
+        if deadline is not None and time.monotonic() > deadline:
+            logger.warning(f"Time budget used up while probing watermarks, skipped from {sobject}")
+            break
+        try:
+            where_clause = f" WHERE {where}" if where else ""
+            result = sf_client.query(f"SELECT COUNT(Id) record_count, MAX(SystemModstamp) last_modified FROM {sobject}{where_clause}")
+            row = result['records'][0] if result.get('records') else {}
+            watermarks[sobject] = {
+                'record_count': row.get('record_count', 0) or 0,
+                'last_modified': row.get('last_modified')
+            }
+        except Exception as e:
+            logger.warning(f"Error probing watermark for {sobject}: {e}")
+    return watermarks
+
+def probe_org_watermarks(access_token, instance_url, deadline: Optional[float] = None):
+    """Get the org Id and current object watermarks before an audit runs"""
+    sf = Salesforce(instance_url=instance_url, session_id=access_token)
+    org_id = sf.query("SELECT Id FROM Organization LIMIT 1")['records'][0]['Id']
+    return org_id, probe_object_watermarks(sf, deadline)
+
+def get_carried_forward_findings(analyzer_name: str, org_context: dict, audit_options: Optional[dict]) -> Optional[List[dict]]:
+    """
+    Reuse an analyzer's findings from the previous audit when none of its objects changed
+
+    Returns:
+        list: Copies of the previous findings, or None when the analyzer has to re-run
+    """
+    previous = (audit_options or {}).get('previous_audit')
+    current_watermarks = (audit_options or {}).get('watermarks')
+    objects = ANALYZER_WATERMARK_OBJECTS.get(analyzer_name)
+    if not previous or not current_watermarks or objects is None:
+        return None
+    if analyzer_name not in previous.get('findings_by_analyzer', {}):
+        return None
+    # Sampled or quick-tier results do not stand in for an exact or deep run
+    if (previous.get('tier'), previous.get('sampling_mode')) != (audit_options.get('tier', 'deep'), audit_options.get('sampling_mode', 'auto')):
+        return None
+
+    # Findings scale with team size, so a change in active users invalidates them too
+    if previous.get('watermarks', {}).get('User', {}).get('record_count') != org_context.get('active_users'):
+        return None
+    for sobject in objects:
+        before = previous.get('watermarks', {}).get(sobject)
+        after = current_watermarks.get(sobject)
+        if not before or not after or before != after:
+            return None
+
+    carried = []
+    for finding in previous['findings_by_analyzer'][analyzer_name]:
+        finding_copy = {k: v for k, v in finding.items() if k not in ('_id', 'session_id')}
+        finding_copy['id'] = str(uuid.uuid4())
+        finding_copy['carried_forward_from'] = previous['session_id']
+        carried.append(finding_copy)
+    return carried
+
+# Cost model for audit plans
+ENGINE_OVERHEAD_API_CALLS = len(WATERMARK_OBJECTS) + 7  # watermark probe, /limits, org context and org Id
+API_CALL_SECONDS = 0.3  # typical REST round trip
+STREAM_PAGE_SIZE = 2000  # records per query/queryMore page
+STREAM_DEFAULT_RECORDS = 10000  # assumed size of a streamed object when its record count is unknown
+
+class AuditCancelled(BaseException):
+    """
+    Raised at a cancellation checkpoint once an audit has been cancelled
+
+    Derives from BaseException, like asyncio.CancelledError, so the analyzers' own
+    `except Exception` handlers do not swallow it and carry on querying.
+    """
+
+class AuditTimeBudgetExceeded(BaseException):
+    """
+    Raised at a cancellation checkpoint once the audit tier's time budget is used up
+
+    Stops the analyzer making the call, not the audit. Derives from BaseException for the
+    same reason as AuditCancelled.
+    """
+
+class CachedSalesforceClient:
+    """
+    Memoizing proxy around a Salesforce client for the duration of one audit
+
+    query() results are shared between analyzers (concurrent callers of the same SOQL wait
+    for one request), prefetch() loads declared queries through composite/batch, and every
+    other attribute is passed through to the wrapped client. Once cancel_event is set, every
+    Salesforce call made through the proxy raises AuditCancelled instead of using API quota.
+    Every call also reports progress through on_progress, which feeds the audit heartbeat, and
+    passes the scheduler's checkpoint, where a low-priority audit may pause mid-analyzer; streamed
+    queries pass it once per page. Once `deadline` (time.monotonic()) has passed, calls raise
+    AuditTimeBudgetExceeded.
+    Failed calls are counted per thread (call_errors()), so an analyzer that handled its own
+    query errors can still be told apart from one that ran cleanly.
+    """
+    
+    def __init__(self, sf_client, cancel_event: Optional[threading.Event] = None, on_progress=None, checkpoint=None):
+        self._sf_client = sf_client
+        self._cancel_event = cancel_event
+        self._on_progress = on_progress
+        self._checkpoint = checkpoint
+        self.deadline = None
+        self._errors = threading.local()
+        self._results = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def check_cancelled(self, checkpoint: bool = True):
+        if checkpoint and self._checkpoint is not None:
+            self._checkpoint()
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise AuditCancelled("Audit was cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise AuditTimeBudgetExceeded("Audit time budget used up")
+        if self._on_progress is not None:
+            self._on_progress()
+    
+    def call_errors(self) -> int:
+        """Salesforce calls that raised in the current thread"""
+        return getattr(self._errors, 'count', 0)
+    
+    def _counting_errors(self, call, *args, **kwargs):
+        try:
+            return call(*args, **kwargs)
+        except Exception:
+            self._errors.count = self.call_errors() + 1
+            raise
+    
+    def __getattr__(self, name):
+        self.check_cancelled()
+        attribute = getattr(self._sf_client, name)
+        if not callable(attribute):
+            return attribute
+        return lambda *args, **kwargs: self._counting_errors(attribute, *args, **kwargs)
+    
+    def query_all_iter(self, soql, **kwargs):
+        """Stream query results, stopping at the next record once the audit is cancelled"""
+        records = self._sf_client.query_all_iter(soql, **kwargs)
+        for count in itertools.count(1):
+            try:
+                record = self._counting_errors(next, records)
+            except StopIteration:
+                return
+            self.check_cancelled(checkpoint=count % STREAM_PAGE_SIZE == 0)
+            yield record
+    
+    def query(self, soql, **kwargs):
+        self.check_cancelled()
+        if kwargs:
+            return self._counting_errors(self._sf_client.query, soql, **kwargs)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(soql, threading.Lock())
+        with key_lock:
+            if soql in self._results:
+                self.hits += 1
+                return self._results[soql]
+            self.misses += 1
+            result = self._counting_errors(self._sf_client.query, soql)
+            self._results[soql] = result
+            return result
+    
+    def memoize(self, name: str, loader):
+        """Result of loader() computed once per audit, for data too volatile for the org metadata cache"""
+        key = ('memo', name)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._results:
+                self._results[key] = loader()
+            return self._results[key]
+    
+    def prefetch(self, soqls: List[str]) -> int:
+        """Load queries not yet cached through composite/batch; failed queries are left to run on demand"""
+        self.check_cancelled()
+        missing = [soql for soql in dict.fromkeys(soqls) if soql not in self._results]
+        if not missing:
+            return 0
+        for soql, result in zip(missing, run_soql_batch(self._sf_client, missing)):
+            if result is not None:
+                self._results.setdefault(soql, result)
+        return len(missing)
+
+def select_analyzers(tier: str = 'deep', enabled: Optional[List[str]] = None, disabled: Optional[List[str]] = None) -> List[str]:
+    """Registered analyzers that run for a tier, optionally narrowed to an enabled list or without disabled ones"""
+    names = [name for name, spec in ANALYZER_REGISTRY.items() if tier in spec['tiers']]
+    if enabled:
+        names = [name for name in names if name in enabled]
+    if disabled:
+        names = [name for name in names if name not in disabled]
+    return names
+
+def estimate_audit_plan(tier: str, record_counts: Optional[Dict[str, int]] = None, sampling_mode: str = 'auto') -> Dict[str, Any]:
+    """
+    Estimate the API calls and run time of an audit tier from the analyzers' declared inputs
+
+    Streamed objects are costed from record counts (e.g. /limits/recordCount) when given,
+    capped at the sample size when the object would be sampled.
+    """
+    names = select_analyzers(tier)
+    specs = [ANALYZER_REGISTRY[name] for name in names]
+    queries = {soql for spec in specs for soql in spec['queries']}
+    describes = {sobject for spec in specs for sobject in spec['describes']}
+    metadata = {key for name in names for key in analyzer_metadata(name, tier)}
+    streamed = {sobject for spec in specs for sobject in spec['streams']}
+
+    streamed_records = 0
+    for sobject in streamed:
+        count = (record_counts or {}).get(sobject, STREAM_DEFAULT_RECORDS)
+        streamed_records += SAMPLING_TARGET_RECORDS if resolve_sampling_mode(sampling_mode, count) == 'sample' else count
+
+    analyzer_calls = (-(-len(queries) // COMPOSITE_BATCH_LIMIT) + len(describes)
+                      + sum(ANALYZER_METADATA_API_CALLS.get(key, 1) for key in metadata)
+                      + sum(spec['api_calls'] for spec in specs)
+                      + -(-streamed_records // STREAM_PAGE_SIZE))
+    settings = AUDIT_TIER_SETTINGS[tier]
+    estimated_seconds = (ENGINE_OVERHEAD_API_CALLS + analyzer_calls / settings['max_workers']) * API_CALL_SECONDS
+    if settings['time_budget_seconds']:
+        # The watermark probe counts against the budget; the rest of the engine overhead does not
+        unbudgeted_calls = ENGINE_OVERHEAD_API_CALLS - len(WATERMARK_OBJECTS)
+        estimated_seconds = min(estimated_seconds, unbudgeted_calls * API_CALL_SECONDS + settings['time_budget_seconds'])
+
+    return {
+        'tier': tier,
+        'analyzers': names,
+        'api_calls': ENGINE_OVERHEAD_API_CALLS + analyzer_calls,
+        'streamed_records': streamed_records,
+        'record_counts_known': record_counts is not None,
+        'estimated_seconds': round(estimated_seconds, 1),
+        'max_workers': settings['max_workers'],
+        'time_budget_seconds': settings['time_budget_seconds']
+    }
+
+def run_registered_analyzers(sf_client, analyzer_names: List[str], context: dict, max_workers: Optional[int] = None,
+                             time_budget: Optional[float] = None) -> List[dict]:
+    """
+    Run analyzers in parallel as soon as their declared inputs are loaded
+
+    Inputs declared by the selected analyzers are deduplicated first: queries are prefetched
+    in composite batches, and describes and metadata loaders run once each. Analyzers with
+    findings carried forward from the previous audit skip their inputs entirely. With a time
+    budget (or an audit_options deadline already counting down), analyzers not finished when it
+    runs out are skipped and left out of the results; running ones stop at their next Salesforce call.
+    Findings of analyzers finished before a drained run was re-queued are resumed as-is.
+
+    Returns:
+        list: Findings tagged with their analyzer, in registry order
+    """
+    org_context = context['org_context']
+    audit_options = context.get('audit_options')
+    tier = context.get('tier', 'deep')
+    results = {}
+    failed = set()
+    carried_forward = []
+    to_run = []
+    resumed_findings = (audit_options or {}).get('resumed_findings') or {}
+    partial_results = (audit_options or {}).get('partial_results')
+    for name in analyzer_names:
+        if name in resumed_findings:
+            results[name] = [dict(finding) for finding in resumed_findings[name]]
+            continue
+        carried = get_carried_forward_findings(name, org_context, audit_options)
+        if carried is not None:
+            results[name] = carried
+            carried_forward.append(name)
+        else:
+            to_run.append(name)
+    
+    if carried_forward:
+        logger.info(f"Incremental audit reused findings from unchanged objects for: {', '.join(carried_forward)}")
+    if resumed_findings:
+        logger.info(f"Resumed findings from before the last drain for: {', '.join(name for name in analyzer_names if name in resumed_findings)}")
+    
+    def run_one(name):
+        """Run an analyzer; returns its findings and the Salesforce calls it saw fail"""
+        started = time.monotonic()
+        errors_before = sf_client.call_errors() if isinstance(sf_client, CachedSalesforceClient) else 0
+        findings = ANALYZER_REGISTRY[name]['run'](context)
+        errors = (sf_client.call_errors() if isinstance(sf_client, CachedSalesforceClient) else 0) - errors_before
+        logger.info(f"Analyzer {name} finished in {time.monotonic() - started:.2f}s with {len(findings)} findings"
+                    + (f" after {errors} failed Salesforce calls" if errors else ""))
+        return findings, errors
+    
+    deadline = (audit_options or {}).get('deadline') or (time.monotonic() + time_budget if time_budget else None)
+    if deadline is not None and isinstance(sf_client, CachedSalesforceClient):
+        sf_client.deadline = deadline
+    skipped = []
+    max_workers = max_workers or AUDIT_TIER_SETTINGS['deep']['max_workers']
+    # Work runs on the shared analyzer pool, which bounds it across audits; this audit keeps max_workers analyzers in flight
+    pool = analyzer_executor
+    # One future per distinct input; analyzers sharing an input wait on the same future
+    input_futures = {}
+    running = {}
+    try:
+        queries = [soql for name in to_run for soql in ANALYZER_REGISTRY[name]['queries']]
+        if queries and hasattr(sf_client, 'prefetch'):
+            input_futures['queries'] = pool.submit(sf_client.prefetch, queries)
+        for name in to_run:
+            for sobject in ANALYZER_REGISTRY[name]['describes']:
+                if f'describe:{sobject}' not in input_futures:
+                    input_futures[f'describe:{sobject}'] = pool.submit(get_cached_describe, sf_client, sobject)
+            for key in analyzer_metadata(name, tier):
+                if f'metadata:{key}' not in input_futures:
+                    input_futures[f'metadata:{key}'] = pool.submit(ANALYZER_METADATA_LOADERS[key], sf_client)
+        
+        def inputs_of(name):
+            spec = ANALYZER_REGISTRY[name]
+            keys = (['queries'] if spec['queries'] and 'queries' in input_futures else []) + \
+                [f'describe:{sobject}' for sobject in spec['describes']] + [f'metadata:{key}' for key in analyzer_metadata(name, tier)]
+            return [input_futures[key] for key in keys]
+        
+        pending = list(to_run)
+        checkpoint = (audit_options or {}).get('checkpoint')
+        cancel_event = (audit_options or {}).get('cancel_event')
+        progress = (audit_options or {}).get('progress')
+        while pending or running:
+            if cancel_event is not None and cancel_event.is_set():
+                skipped = pending + list(running.values())
+                raise AuditCancelled(f"Audit cancelled with {len(skipped)} analyzers unfinished")
+            # Let the scheduler pause low-priority work before more analyzers start
+            if checkpoint and pending:
+                checkpoint()
+            for name in list(pending):
+                if len(running) >= max_workers:
+                    break
+                dependencies_done = all(dep in results or dep not in to_run for dep in ANALYZER_REGISTRY[name]['depends_on'])
+                if dependencies_done and all(future.done() for future in inputs_of(name)):
+                    running[pool.submit(run_one, name)] = name
+                    pending.remove(name)
+            
+            waiting_on = list(running) + [future for future in input_futures.values() if not future.done()]
+            if not waiting_on:
+                logger.error(f"Analyzers with unresolvable dependencies skipped: {', '.join(pending)}")
+                break
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                skipped += pending + list(running.values())
+                logger.warning(f"Time budget used up, skipping analyzers: {', '.join(skipped)}")
+                break
+            # Wake at least once a second so cancellation is noticed while long analyzers run
+            done, _ = wait(waiting_on, timeout=min(remaining, 1.0) if remaining is not None else 1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in running:
+                    name = running.pop(future)
+                    # Analyzers finishing count as progress even when they made no Salesforce calls
+                    if progress is not None:
+                        progress()
+                    try:
+                        results[name], errors = future.result()
+                        if errors:
+                            # Findings are reported, but may be incomplete: never carry them forward or resume them
+                            failed.add(name)
+                        elif partial_results is not None:
+                            partial_results[name] = results[name]
+                    except AuditTimeBudgetExceeded:
+                        skipped.append(name)
+                    except Exception as e:
+                        logger.error(f"Analyzer {name} failed: {e}")
+                        results[name] = []
+                        failed.add(name)
+    finally:
+        own_futures = list(input_futures.values()) + list(running)
+        if skipped:
+            # Over-budget analyzers stop at their next Salesforce call; their results are discarded
+            for future in own_futures:
+                future.cancel()
+        else:
+            wait(own_futures)
+    
+    all_findings = []
+    for name in analyzer_names:
+        for finding in results.get(name, []):
+            finding['analyzer'] = name
+            all_findings.append(finding)
+    
+    if audit_options is not None:
+        # Failed analyzers are left out so their empty or partial result is never carried forward
+        audit_options['completed_analyzers'] = [name for name in analyzer_names if name in results and name not in failed]
+        audit_options['failed_analyzers'] = [name for name in analyzer_names if name in failed]
+        audit_options['skipped_analyzers'] = skipped
+    if isinstance(sf_client, CachedSalesforceClient):
+        logger.info(f"Query cache: {sf_client.hits} hits, {sf_client.misses} misses")
+    return all_findings
+
+def run_salesforce_audit(access_token, instance_url):
+    """Run comprehensive Salesforce audit"""
+    findings = []
+    
+    try:
+        # Initialize Salesforce client; queries shared by analyzers are fetched once
+        sf = CachedSalesforceClient(Salesforce(instance_url=instance_url, session_id=access_token))
+        
+        # Get org context for realistic calculations
+        org_context = get_org_context(sf, limits_snapshot=fetch_limits_snapshot(sf))
+        org_name = org_context['org_name']
+        hourly_rate = org_context['estimated_hourly_rate']
+        
+        # Get org ID from context
+        org_id = sf.query("SELECT Id FROM Organization LIMIT 1")['records'][0]['Id']
+        
+        logger.info(f"Starting audit for org: {org_name} (Type: {org_context['org_type']}, Users: {org_context['active_users']}, Rate: ${hourly_rate}/hr)")
+        
+        # Run the same registered analyzers as the stage engine
+        findings.extend(run_registered_analyzers(sf, select_analyzers(), {
+            'sf': sf,
+            'org_context': org_context,
+            'department_salaries': None,
+            'custom_assumptions': None,
+            'audit_options': None
+        }))
+        annotate_field_coverage(sf, findings)
+        
+        # Calculate ROI for each finding using org-specific hourly rate
+        for finding in findings:
+            finding["roi_estimate"] = finding["time_savings_hours"] * hourly_rate * 12  # Annual
+            # Add org context to finding
+            finding["org_context"] = {
+                "hourly_rate": hourly_rate,
+                "active_users": org_context['active_users'],
+                "org_type": org_context['org_type']
+            }
+        
+        logger.info(f"Audit completed: {len(findings)} findings, estimated ${sum(f['roi_estimate'] for f in findings):,.0f} annual value")
+        
+        return findings, org_name, org_id
+        
+    except Exception as e:
+        logger.error(f"Error running Salesforce audit: {e}")
+        raise e
+
+def run_salesforce_audit_with_stage_engine(access_token, instance_url, business_inputs=None, department_salaries=None, custom_assumptions=None, audit_options=None):
+    """
+    Run comprehensive Salesforce audit with Alex Hormozi Stage Engine
+    
+    Args:
+        access_token: Salesforce access token
+        instance_url: Salesforce instance URL  
+        business_inputs: BusinessInputs with revenue/headcount
+        department_salaries: Optional department salary overrides
+        custom_assumptions: Optional ROI calculation overrides
+        audit_options: Optional execution options (e.g. sampling_mode)
+    """
+    findings = []
+    
+    try:
+        # Initialize Salesforce client; queries shared by analyzers are fetched once and stop on cancellation
+        sf = CachedSalesforceClient(Salesforce(instance_url=instance_url, session_id=access_token),
+                                    (audit_options or {}).get('cancel_event'), (audit_options or {}).get('progress'),
+                                    (audit_options or {}).get('checkpoint'))
+        
+        # One /limits snapshot is shared by every analyzer that needs org size or storage signals
+        limits_snapshot = fetch_limits_snapshot(sf)
+        if audit_options is not None:
+            audit_options['limits_snapshot'] = limits_snapshot
+        
+        # Get org context for realistic calculations
+        org_context = get_org_context(sf, (audit_options or {}).get('watermarks'), limits_snapshot)
+        if audit_options is not None:
+            # Stored with the session so findings can be re-scored with new assumptions without re-running the audit
+            audit_options['scoring_context'] = {'active_users': org_context['active_users']}
+        org_name = org_context['org_name']
+        org_id = sf.query("SELECT Id FROM Organization LIMIT 1")['records'][0]['Id']
+        
+        # Determine business stage with picklist support
+        if business_inputs:
+            logger.debug(f"Business inputs provided: {business_inputs}")
+            revenue, headcount = convert_picklist_to_numeric(business_inputs)
+            logger.debug(f"Converted to numeric: revenue=${revenue:,}, headcount={headcount}")
+        else:
+            logger.debug("No business inputs provided, using defaults")
+            revenue = 1000000  # Default $1M
+            headcount = 50     # Default 50 employees
+            
+        # Final safety check before stage determination
+        if revenue is None or headcount is None:
+            logger.error(f"Critical error: None values after conversion - revenue={revenue}, headcount={headcount}")
+            revenue = revenue or 1000000
+            headcount = headcount or 50
+            logger.info(f"Applied emergency defaults: revenue=${revenue:,}, headcount={headcount}")
+            
+        business_stage = determine_business_stage(revenue, headcount)
+        
+        logger.info(f"Starting Stage {business_stage['stage']} audit for org: {org_name}")
+        logger.info(f"Stage: {business_stage['name']} ({business_stage['role']}) - {business_stage['bottom_line']}")
+        logger.info(f"Revenue: ${revenue:,} | Headcount: {headcount} | Active SF Users: {org_context['active_users']}")
+        
+        # Run registered analyzers for the audit tier, carrying forward findings for unchanged objects in incremental audits
+        logger.info("Running audit analysis modules...")
+        tier = (audit_options or {}).get('tier', 'deep')
+        analyzer_names = select_analyzers(
+            tier,
+            (audit_options or {}).get('enabled_analyzers'),
+            (audit_options or {}).get('disabled_analyzers')
+        )
+        all_findings = run_registered_analyzers(sf, analyzer_names, {
+            'sf': sf,
+            'org_context': org_context,
+            'department_salaries': department_salaries,
+            'custom_assumptions': custom_assumptions,
+            'audit_options': audit_options,
+            'tier': tier
+        }, AUDIT_TIER_SETTINGS[tier]['max_workers'], AUDIT_TIER_SETTINGS[tier]['time_budget_seconds'])
+        
+        # Make data-quality recommendations precise using existing validation rules and required fields
+        try:
+            annotate_field_coverage(sf, all_findings)
+        except AuditTimeBudgetExceeded:
+            logger.warning("Time budget used up, data quality findings keep their generic recommendations")
+        
+        logger.info(f"Generated {len(all_findings)} raw findings")
+        
+        # Stage-based scoring is CPU-bound; the CPU pool bounds how many audits score at once
+        all_findings = run_cpu_bound(score_findings, all_findings, org_context, business_stage, custom_assumptions)
+        
+        logger.info(f"Stage {business_stage['stage']} audit completed: {len(all_findings)} findings")
+        logger.info(f"Priority distribution: {[f['priority_score'] for f in all_findings[:5]]}")
+        
+        return all_findings, org_name, org_id, business_stage
+        
+    except Exception as e:
+        logger.error(f"Error running stage-based audit: {e}")
+        raise e
+
+def score_findings(all_findings: List[dict], org_context: dict, business_stage: dict, custom_assumptions=None) -> List[dict]:
+    """Enhance each finding with stage-based analysis and sort them by priority score"""
+    for finding in all_findings:
+        # Add domain classification
+        finding['domain'] = classify_finding_domain(finding)
+        
+        # Calculate stage-based priority
+        finding['priority_score'] = calculate_finding_priority(finding, business_stage)
+        
+        # Calculate enhanced ROI using stage engine
+        finding_data = {
+            'title': finding.get('title', ''),
+            'category': finding.get('category', ''),
+            'description': finding.get('description', ''),
+            'type': finding.get('finding_type') or ('custom_fields' if 'custom fields' in finding.get('title', '').lower() else 'general'),
+            'field_count': finding.get('salesforce_data', {}).get('potentially_unused', 0),
+            'record_count': next((finding.get('salesforce_data', {}).get(key) for key in ROI_RECORD_COUNT_KEYS if finding.get('salesforce_data', {}).get(key)), 0),
+            'estimated_monthly_hours': finding.get('time_savings_hours', 2.0),
+            'salesforce_data': finding.get('salesforce_data', {})
+        }
+        
+        enhanced_roi = calculate_task_based_roi(finding_data, org_context, business_stage, custom_assumptions)
+        
+        # Merge enhanced ROI data into finding
+        finding.update({
+            'stage_analysis': {
+                'current_stage': business_stage['stage'],
+                'stage_name': business_stage['name'],
+                'stage_role': business_stage['role'],
+                'stage_relevance': enhanced_roi['priority_score']
+            },
+            'enhanced_roi': enhanced_roi,
+            'domain': enhanced_roi['domain'],
+            'priority_score': enhanced_roi['priority_score'],
+            'task_breakdown': enhanced_roi['task_breakdown'],
+            'total_annual_roi': enhanced_roi['total_annual_roi'],
+            'confidence_level': enhanced_roi['confidence']
+        })
+        
+        # Update legacy fields for backward compatibility
+        if enhanced_roi['total_annual_roi'] > 0:
+            finding['roi_estimate'] = enhanced_roi['total_annual_roi']
+    
+    # Sort findings by priority score (descending) with defensive None handling
+    def safe_priority_key(finding):
+        priority = finding.get('priority_score', 0)
+        # Guard against None priority scores
+        return priority if priority is not None else 0
+    
+    all_findings.sort(key=safe_priority_key, reverse=True)
+    
+    return all_findings
+
+# salesforce_data keys holding the number of records a Revenue Leaks finding asks to clean up
+ROI_RECORD_COUNT_KEYS = ('orphaned_opportunities', 'stale_leads', 'stale_opportunities', 'duplicate_records', 'invalid_contact_records')
+
+def calculate_audit_summary(findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Calculate overall audit metrics"""
+    total_time_savings = sum(f.get("time_savings_hours", 0) for f in findings)
+    total_roi = sum(f.get("roi_estimate", 0) for f in findings)
+    
+    category_breakdown = {}
+    for finding in findings:
         category = finding.get("category", "Unknown")
         if category not in category_breakdown:
             category_breakdown[category] = {"count": 0, "savings": 0, "roi": 0}
@@ -1902,20 +4751,94 @@ def calculate_audit_summary(findings: List[Dict[str, Any]]) -> Dict[str, Any]:
         "low_impact_count": len([f for f in findings if f.get("impact") == "Low"])
     }
 
-async def process_audit_in_background(audit_session_id, access_token, instance_url, business_inputs, dept_salaries_dict):
+async def load_previous_audit(org_id, tier: str = 'deep', sampling_mode: str = 'auto'):
+    """
+    Load the latest completed audit of an org with its watermarks and findings grouped by analyzer
+
+    Only audits of the same tier and sampling mode qualify, so sampled or quick-tier findings are
+    never carried into an exact or deep audit.
+    """
+    previous = await db.audit_sessions.find_one(
+        {"org_id": org_id, "status": "completed", "object_watermarks": {"$ne": None}, "tier": tier, "sampling_mode": sampling_mode},
+        sort=[("created_at", -1)]
+    )
+    if not previous:
+        logger.info(f"No previous {tier} audit ({sampling_mode} sampling) with watermarks for org {org_id}, running a full audit")
+        return None
+    
+    # Analyzers that ran but found nothing can be carried forward as an empty result too
+    findings_by_analyzer = {name: [] for name in previous.get("completed_analyzers", [])}
+    async for finding in db.audit_findings.find({"session_id": previous["id"]}):
+        if finding.get("analyzer"):
+            findings_by_analyzer.setdefault(finding["analyzer"], []).append(finding)
+    
+    return {
+        "session_id": previous["id"],
+        "tier": previous["tier"],
+        "sampling_mode": previous["sampling_mode"],
+        "watermarks": previous["object_watermarks"],
+        "findings_by_analyzer": findings_by_analyzer
+    }
+
+async def load_previous_limits_snapshot(org_id):
+    """Load the limits snapshot of an org's latest completed audit for storage growth projection"""
+    previous = await db.audit_sessions.find_one(
+        {"org_id": org_id, "status": "completed", "limits_snapshot": {"$ne": None}},
+        {"limits_snapshot": 1},
+        sort=[("created_at", -1)]
+    )
+    return previous["limits_snapshot"] if previous else None
+
+async def process_audit_in_background(audit_session_id, access_token, instance_url, business_inputs, dept_salaries_dict, audit_options=None):
     """Process audit in background and update session when complete"""
     try:
         logger.info(f"Starting background audit processing for: {audit_session_id}")
         
         # Run Salesforce audit in thread pool to avoid blocking
         loop = asyncio.get_event_loop()
+        audit_options = dict(audit_options or {})
+        
+        # Writes are skipped once the session is cancelled, or re-queued by the reaper under a newer attempt
+        session_filter = {"id": audit_session_id, "status": {"$ne": "cancelled"}}
+        if audit_options.get('attempt') is not None:
+            session_filter["attempt"] = audit_options['attempt']
+        
+        # The tier's time budget starts here, so the watermark probe counts against it
+        time_budget = AUDIT_TIER_SETTINGS[audit_options.get('tier', 'deep')]['time_budget_seconds']
+        if time_budget:
+            audit_options['deadline'] = time.monotonic() + time_budget
         
-        # Run the stage-based audit
+        # Probe object watermarks so this audit can serve as the baseline for the next delta audit
+        watermarks = None
         try:
-            findings_data, org_name, org_id, business_stage = await loop.run_in_executor(
-                executor, run_salesforce_audit_with_stage_engine, access_token, instance_url, business_inputs, dept_salaries_dict, None
+            org_id, watermarks = await loop.run_in_executor(
+                io_executor, probe_org_watermarks, access_token, instance_url, audit_options.get('deadline')
             )
+            audit_options['watermarks'] = watermarks
+            if audit_options.get('incremental'):
+                audit_options['previous_audit'] = await load_previous_audit(
+                    org_id, audit_options.get('tier', 'deep'), audit_options.get('sampling_mode', 'auto')
+                )
+            audit_options['previous_limits_snapshot'] = await load_previous_limits_snapshot(org_id)
+        except Exception as probe_error:
+            logger.warning(f"Watermark probe failed, running a full audit: {probe_error}")
+        
+        # Run the stage-based audit; deep scans use their own pool so quick scans never wait behind them
+        audit_executor = deep_executor if audit_options.get('tier') == 'deep' else io_executor
+        # Waiting for a free engine thread is not a stall, so the heartbeat counts it as progress until the engine starts
+        engine_waiting = audit_options.get('engine_waiting', lambda waiting: None)
+        
+        def run_engine():
+            engine_waiting(False)
+            return run_salesforce_audit_with_stage_engine(access_token, instance_url, business_inputs, dept_salaries_dict, None, audit_options)
+        
+        engine_waiting(True)
+        try:
+            findings_data, org_name, org_id, business_stage = await loop.run_in_executor(audit_executor, run_engine)
             logger.info(f"Background audit completed successfully. Found {len(findings_data)} findings for {org_name}")
+        except AuditCancelled:
+            logger.info(f"Audit {audit_session_id} stopped after cancellation")
+            return
         except Exception as audit_error:
             # CAPTURE FULL TRACEBACK FOR DEBUGGING
             tb = traceback.format_exc()
@@ -1924,7 +4847,7 @@ async def process_audit_in_background(audit_session_id, access_token, instance_u
             
             # Update session with error status
             await db.audit_sessions.update_one(
-                {"id": audit_session_id},
+                session_filter,
                 {"$set": {
                     "status": "error",
                     "error_message": "An unexpected error occurred during audit processing",
@@ -1958,9 +4881,9 @@ async def process_audit_in_background(audit_session_id, access_token, instance_u
         
         logger.info(f"Generated {len(findings_data)} findings for {org_name}")
         
-        # Update session with completed results
-        await db.audit_sessions.update_one(
-            {"id": audit_session_id},
+        # Update session with completed results, unless it was cancelled while finishing
+        completed = await db.audit_sessions.update_one(
+            session_filter,
             {"$set": {
                 "org_name": org_name,
                 "org_id": org_id,
@@ -1982,38 +4905,1018 @@ async def process_audit_in_background(audit_session_id, access_token, instance_u
                     "constraints_and_actions": business_stage['constraints_and_actions']
                 },
                 "summary": summary,
+                "object_watermarks": watermarks,
+                "limits_snapshot": audit_options.get('limits_snapshot'),
+                "scoring_context": audit_options.get('scoring_context'),
+                "aging_histograms": audit_options.get('aging_histograms'),
+                "completed_analyzers": audit_options.get('completed_analyzers', []),
+                "partial_findings": None,
+                "skipped_analyzers": audit_options.get('skipped_analyzers', []),
+                "failed_analyzers": audit_options.get('failed_analyzers', []),
+                "incremental": {
+                    "enabled": bool(audit_options.get('incremental')),
+                    "previous_session_id": (audit_options.get('previous_audit') or {}).get('session_id'),
+                    "carried_forward_analyzers": sorted({f['analyzer'] for f in findings_data if f.get('carried_forward_from')})
+                },
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        
+        if completed.matched_count == 0:
+            logger.info(f"Audit {audit_session_id} was cancelled or re-queued, discarding its findings")
+            return
+        
+        # Store findings
+        findings_to_store = []
+        for finding in findings_data:
+            finding_copy = finding.copy()
+            finding_copy["session_id"] = audit_session_id
+            findings_to_store.append(finding_copy)
+        
+        await db.audit_findings.insert_many(findings_to_store)
+        
+        logger.info(f"Background audit processing completed for session: {audit_session_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in background audit processing: {e}")
+        tb = traceback.format_exc()
+        logger.error("🔥 Full background processing exception traceback:\n" + tb)
+        
+        # Update session with error status
+        try:
+            await db.audit_sessions.update_one(
+                {"id": audit_session_id},
+                {"$set": {
+                    "status": "error",
+                    "error_message": "An unexpected error occurred during audit processing",
+                    "updated_at": datetime.utcnow()
+                }}
+            )
+        except Exception as db_error:
+            logger.error(f"Failed to update session with error status: {db_error}")
+
+# Audit admission control
+AUDIT_QUEUE_MAX_DEPTH = int(os.environ.get('AUDIT_QUEUE_MAX_DEPTH', '50'))
+AUDIT_TENANT_MAX_ACTIVE = int(os.environ.get('AUDIT_TENANT_MAX_ACTIVE', '3'))  # queued + running audits per org
+AUDIT_DISPATCH_WORKERS = int(os.environ.get('AUDIT_DISPATCH_WORKERS', '4'))
+# inline: this process dispatches audits; external: audits stay queued in Mongo for audit_worker processes
+AUDIT_WORKER_MODE = os.environ.get('AUDIT_WORKER_MODE', 'inline')
+
+# Heartbeats and the stalled-audit reaper
+AUDIT_HEARTBEAT_SECONDS = int(os.environ.get('AUDIT_HEARTBEAT_SECONDS', '30'))
+AUDIT_STALE_SECONDS = int(os.environ.get('AUDIT_STALE_SECONDS', '600'))
+AUDIT_REAPER_INTERVAL_SECONDS = int(os.environ.get('AUDIT_REAPER_INTERVAL_SECONDS', '60'))
+AUDIT_MAX_ATTEMPTS = int(os.environ.get('AUDIT_MAX_ATTEMPTS', '2'))
+# Owner stamped on audits in this process's in-memory queue; its record in audit_processes is refreshed every reaper sweep
+AUDIT_PROCESS_ID = uuid.uuid4().hex
+
+# Graceful drain on shutdown
+AUDIT_DRAIN_GRACE_SECONDS = int(os.environ.get('AUDIT_DRAIN_GRACE_SECONDS', '25'))  # keep below the orchestrator's kill timeout
+AUDIT_DRAIN_RETRY_AFTER = 30
+
+# Scheduling weights; a job's share of dispatchers is its tier weight times its customer class weight
+AUDIT_TIER_WEIGHTS = {'quick': 4, 'deep': 1}
+CUSTOMER_CLASS_WEIGHTS = {'enterprise': 4, 'professional': 2, 'standard': 1}
+DEFAULT_CUSTOMER_CLASS = 'standard'
+AUDIT_PREEMPTION_ENABLED = os.environ.get('AUDIT_PREEMPTION_ENABLED', 'true').lower() == 'true'
+AUDIT_PREEMPTION_POLL_SECONDS = 1.0
+# Total time a deep job may spend paused, so steady quick traffic cannot starve it
+AUDIT_PREEMPTION_MAX_PAUSE_SECONDS = float(os.environ.get('AUDIT_PREEMPTION_MAX_PAUSE_SECONDS', '300'))
+
+class AuditQueueFull(Exception):
+    """Raised when an audit cannot be admitted; carries a Retry-After hint in seconds"""
+    status_code = 429
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AuditQueueDraining(AuditQueueFull):
+    """Raised when an audit is submitted while the server is shutting down"""
+    status_code = 503
+
+class AuditAdmissionQueue:
+    """
+    Bounded audit queue with per-tenant quotas and weighted fair queuing
+
+    Jobs are ordered by self-clocked fair queuing: each job's finish tag is its planned run time
+    divided by its weight, added to the later of the current virtual time and its tenant's last
+    finish tag. One busy tenant therefore cannot starve others, and heavier-weighted jobs (quick
+    scans, higher customer classes) get proportionally more dispatches.
+
+    Deep jobs can be preempted between analyzer steps: while a heavier job waits and no dispatcher
+    is free, the deep job pauses and lends its dispatcher until one waiting job has started, for at
+    most AUDIT_PREEMPTION_MAX_PAUSE_SECONDS over its whole run.
+    """
+    
+    def __init__(self, max_depth: int, tenant_max_active: int, workers: int):
+        self.max_depth = max_depth
+        self.tenant_max_active = tenant_max_active
+        self.workers = workers
+        self._heap = []
+        self._sequence = 0
+        self._virtual_time = 0.0
+        self._tenant_finish = {}
+        self._running = {}
+        self._active = 0  # running jobs that are not paused
+        self._tenant_active = {}
+        self._changed = asyncio.Event()
+        self._eta_scale = 1.0
+        # Snapshots read by worker threads at checkpoints; only the event loop writes them
+        self._max_waiting_weight = 0
+        self._dispatched = 0
+        self.draining = False
+    
+    def _heap_changed(self):
+        self._max_waiting_weight = max((entry[2]['weight'] for entry in self._heap), default=0)
+        self._changed.set()
+    
+    def _retry_after(self) -> int:
+        """Seconds until the next running audit is expected to free a dispatcher"""
+        now = time.monotonic()
+        remaining = [max(0.0, job['estimated_seconds'] * self._eta_scale - (now - job['started_at'])) for job in self._running.values()]
+        return max(1, int(min(remaining, default=1) + 0.5))
+    
+    def check(self, tenant: str):
+        """Raise AuditQueueFull if a job for this tenant would be rejected right now"""
+        if self.draining:
+            raise AuditQueueDraining("Server is restarting, please retry shortly", AUDIT_DRAIN_RETRY_AFTER)
+        if len(self._heap) >= self.max_depth:
+            raise AuditQueueFull(f"Audit queue is full ({self.max_depth} audits waiting)", self._retry_after())
+        if self._tenant_active.get(tenant, 0) >= self.tenant_max_active:
+            raise AuditQueueFull(f"This org already has {self.tenant_max_active} audits queued or running", self._retry_after())
+    
+    def admit(self, job: dict) -> Dict[str, Any]:
+        """Queue a job by its fair-queuing finish tag and return its position and ETA"""
+        self.check(job['tenant'])
+        job.setdefault('weight', 1)
+        job.setdefault('cancel_event', threading.Event())
+        start_tag = max(self._virtual_time, self._tenant_finish.get(job['tenant'], 0.0))
+        finish_tag = start_tag + max(job['estimated_seconds'], 1.0) / job['weight']
+        self._tenant_finish[job['tenant']] = finish_tag
+        self._sequence += 1
+        job['enqueued_at'] = time.monotonic()
+        heapq.heappush(self._heap, (finish_tag, self._sequence, job))
+        self._tenant_active[job['tenant']] = self._tenant_active.get(job['tenant'], 0) + 1
+        self._heap_changed()
+        return self.status(job['audit_session_id'])
+    
+    def status(self, audit_session_id: str) -> Optional[Dict[str, Any]]:
+        """Queue position (1 = next to run, 0 = running) and estimated seconds until the audit completes"""
+        now = time.monotonic()
+        running_work = sum(max(0.0, job['estimated_seconds'] * self._eta_scale - (now - job['started_at'])) for job in self._running.values())
+        if audit_session_id in self._running:
+            job = self._running[audit_session_id]
+            return {'position': 0, 'eta_seconds': round(max(0.0, job['estimated_seconds'] * self._eta_scale - (now - job['started_at'])))}
+        
+        queued_work = 0.0
+        for index, (_, _, job) in enumerate(sorted(self._heap, key=lambda entry: entry[:2])):
+            own = job['estimated_seconds'] * self._eta_scale
+            if job['audit_session_id'] == audit_session_id:
+                # Jobs ahead start once a dispatcher frees up; this one then runs for its own estimate
+                wait_seconds = (running_work + queued_work) / self.workers if index >= self.workers - self._active else 0
+                return {'position': index + 1, 'eta_seconds': round(wait_seconds + own)}
+            queued_work += own
+        return None
+    
+    async def next_job(self) -> dict:
+        """Wait for a free dispatcher and the job with the smallest finish tag, and mark it running"""
+        while self.draining or not self._heap or self._active >= self.workers:
+            self._changed.clear()
+            await self._changed.wait()
+        finish_tag, _, job = heapq.heappop(self._heap)
+        self._dispatched += 1
+        self._heap_changed()
+        self._virtual_time = finish_tag
+        job['started_at'] = time.monotonic()
+        self._running[job['audit_session_id']] = job
+        self._active += 1
+        return job
+    
+    def finish(self, job: dict):
+        """Release a running job's dispatcher and tenant slot, updating the ETA scale"""
+        # A reaped job may already have been re-admitted under the same id; only release this one
+        if self._running.get(job['audit_session_id']) is job:
+            del self._running[job['audit_session_id']]
+            if not job.get('paused'):
+                self._active -= 1
+        self._tenant_active[job['tenant']] = max(0, self._tenant_active.get(job['tenant'], 1) - 1)
+        if job['estimated_seconds'] > 0:
+            actual_ratio = (time.monotonic() - job['started_at']) / job['estimated_seconds']
+            self._eta_scale = 0.8 * self._eta_scale + 0.2 * min(max(actual_ratio, 0.1), 20.0)
+        self._changed.set()
+    
+    def cancel(self, audit_session_id: str) -> Optional[str]:
+        """
+        Cancel a queued or running audit
+
+        Queued jobs are dropped from the heap. Running jobs have their cancel event set, which
+        stops their analyzers at the next Salesforce call, and their dispatch task cancelled so the
+        dispatcher is released right away.
+
+        Returns:
+            str: 'queued' or 'running', or None if the audit is not in this queue
+        """
+        for index, (_, _, job) in enumerate(self._heap):
+            if job['audit_session_id'] == audit_session_id:
+                self._heap.pop(index)
+                heapq.heapify(self._heap)
+                self._tenant_active[job['tenant']] = max(0, self._tenant_active.get(job['tenant'], 1) - 1)
+                job['cancel_event'].set()
+                self._heap_changed()
+                return 'queued'
+        
+        job = self._running.get(audit_session_id)
+        if job is None:
+            return None
+        job['cancel_event'].set()
+        if job.get('task') is not None:
+            job['task'].cancel()
+        return 'running'
+    
+    def start_drain(self):
+        """Stop admitting and dispatching audits; queued jobs stay in the heap"""
+        self.draining = True
+        self._changed.set()
+    
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for running jobs to finish; returns whether none are left"""
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+        return not self._running
+    
+    def running_jobs(self) -> List[dict]:
+        return list(self._running.values())
+    
+    def queued_jobs(self) -> List[dict]:
+        return [entry[2] for entry in self._heap]
+    
+    def _set_paused(self, job: dict, paused: bool):
+        if job['audit_session_id'] not in self._running or job.get('paused') == paused:
+            return
+        job['paused'] = paused
+        self._active += -1 if paused else 1
+        self._changed.set()
+    
+    def make_checkpoint(self, job: dict, loop):
+        """
+        Checkpoint callback for a job's analyzers, called from worker threads between analyzer steps
+        and before Salesforce calls
+
+        Deep jobs pause while heavier work waits with no free dispatcher, and resume once one more job
+        has started, the heavier work is gone, or their pause allowance is used up. Analyzer threads
+        reaching the checkpoint while their job is paused wait for that one pause to end.
+        """
+        pause_lock = threading.Lock()
+
+        def should_pause():
+            if not AUDIT_PREEMPTION_ENABLED or job['audit_options'].get('tier') != 'deep':
+                return False
+            if job.get('paused_seconds', 0.0) >= AUDIT_PREEMPTION_MAX_PAUSE_SECONDS:
+                return False
+            return self._max_waiting_weight > job['weight'] and self._active >= self.workers
+
+        def checkpoint():
+            if not should_pause():
+                return
+            with pause_lock:
+                if not should_pause():
+                    return
+                logger.info(f"Audit {job['audit_session_id']} paused for higher-priority work")
+                dispatched = self._dispatched
+                paused_at = time.monotonic()
+                loop.call_soon_threadsafe(self._set_paused, job, True)
+                while (self._dispatched == dispatched and self._max_waiting_weight > job['weight']
+                       and not job['cancel_event'].is_set()
+                       and job.get('paused_seconds', 0.0) + time.monotonic() - paused_at < AUDIT_PREEMPTION_MAX_PAUSE_SECONDS):
+                    # A paused audit is waiting on purpose; keep its heartbeat fresh so the reaper leaves it alone
+                    job['progress_at'] = datetime.utcnow()
+                    time.sleep(AUDIT_PREEMPTION_POLL_SECONDS)
+                job['paused_seconds'] = job.get('paused_seconds', 0.0) + time.monotonic() - paused_at
+                loop.call_soon_threadsafe(self._set_paused, job, False)
+                logger.info(f"Audit {job['audit_session_id']} resumed")
+        return checkpoint
+    
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'queued': len(self._heap),
+            'running': len(self._running),
+            'paused': sum(1 for job in self._running.values() if job.get('paused')),
+            'max_depth': self.max_depth,
+            'workers': self.workers,
+            'eta_scale': round(self._eta_scale, 2),
+            'draining': self.draining
+        }
+
+audit_queue = AuditAdmissionQueue(AUDIT_QUEUE_MAX_DEPTH, AUDIT_TENANT_MAX_ACTIVE, AUDIT_DISPATCH_WORKERS)
+
+async def check_audit_admission(tenant: str):
+    """Raise AuditQueueFull if a new audit for this tenant would be rejected right now"""
+    if AUDIT_WORKER_MODE == 'inline':
+        audit_queue.check(tenant)
+        return
+    if audit_queue.draining:
+        raise AuditQueueDraining("Server is restarting, please retry shortly", AUDIT_DRAIN_RETRY_AFTER)
+    if await db.audit_sessions.count_documents({"status": "queued"}) >= AUDIT_QUEUE_MAX_DEPTH:
+        raise AuditQueueFull(f"Audit queue is full ({AUDIT_QUEUE_MAX_DEPTH} audits waiting)", AUDIT_DRAIN_RETRY_AFTER)
+    if await db.audit_sessions.count_documents({"job.tenant": tenant, "status": {"$in": ["queued", "processing"]}}) >= AUDIT_TENANT_MAX_ACTIVE:
+        raise AuditQueueFull(f"This org already has {AUDIT_TENANT_MAX_ACTIVE} audits queued or running", AUDIT_DRAIN_RETRY_AFTER)
+
+async def enqueue_audit_job(job: dict) -> Dict[str, Any]:
+    """
+    Hand a queued audit session to whatever runs audits
+
+    Inline, the job is admitted to this process's queue. External workers claim queued sessions
+    from Mongo themselves, so only an approximate position is reported.
+    """
+    if AUDIT_WORKER_MODE == 'inline':
+        queue_status = audit_queue.admit(job)
+        await db.audit_sessions.update_one(
+            {"id": job['audit_session_id'], "status": "queued"},
+            {"$set": {"queue_owner": AUDIT_PROCESS_ID}}
+        )
+        return queue_status
+    queued = await db.audit_sessions.count_documents({"status": "queued"})
+    return {'position': queued, 'eta_seconds': round(job['estimated_seconds'])}
+
+async def get_customer_class(org_id: Optional[str]) -> str:
+    """Customer class of an org from its tenant profile (keyed by org Id), used for scheduling weight"""
+    if not org_id:
+        return DEFAULT_CUSTOMER_CLASS
+    try:
+        profile = await db.tenant_profiles.find_one({"org_id": org_id})
+    except Exception as e:
+        logger.warning(f"Error loading tenant profile for org {org_id}: {e}")
+        profile = None
+    customer_class = (profile or {}).get('customer_class', DEFAULT_CUSTOMER_CLASS)
+    return customer_class if customer_class in CUSTOMER_CLASS_WEIGHTS else DEFAULT_CUSTOMER_CLASS
+
+async def run_audit_job(job: dict):
+    """Run an admitted audit from its stored job spec"""
+    audit_session_id = job['audit_session_id']
+    oauth_session = await db.oauth_sessions.find_one({
+        "session_id": job['oauth_session_id'],
+        "expires_at": {"$gt": datetime.utcnow()}
+    })
+    if not oauth_session:
+        logger.error(f"Salesforce session expired while audit {audit_session_id} was queued")
+        await db.audit_sessions.update_one(
+            {"id": audit_session_id},
+            {"$set": {
+                "status": "error",
+                "error_message": "Your Salesforce session expired before the audit started. Please reconnect and try again.",
                 "updated_at": datetime.utcnow()
             }}
         )
+        return
+    
+    started = await db.audit_sessions.update_one(
+        {"id": audit_session_id, "status": "queued", "attempt": job.get('attempt')},
+        {"$set": {"status": "processing", "started_at": datetime.utcnow(), "last_progress_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+    )
+    if started.matched_count == 0:
+        logger.info(f"Audit {audit_session_id} was cancelled or re-queued before it started")
+        return
+    business_inputs = BusinessInputs(**job['business_inputs']) if job.get('business_inputs') else None
+    audit_options = dict(job.get('audit_options') or {})
+    audit_options['checkpoint'] = audit_queue.make_checkpoint(job, asyncio.get_event_loop())
+    audit_options['cancel_event'] = job['cancel_event']
+    audit_options['attempt'] = job.get('attempt')
+    # Shared with the runner so a drain can save the analyzers already finished
+    job['partial_results'] = audit_options['partial_results'] = {}
+    audit_options['resumed_findings'] = job.get('resumed_findings')
+    job['progress_at'] = datetime.utcnow()
+    audit_options['progress'] = lambda: job.__setitem__('progress_at', datetime.utcnow())
+    
+    def engine_waiting(waiting: bool):
+        job['engine_waiting'] = waiting
+        job['progress_at'] = datetime.utcnow()
+    
+    audit_options['engine_waiting'] = engine_waiting
+    heartbeat = asyncio.create_task(heartbeat_audit(job))
+    try:
+        await process_audit_in_background(
+            audit_session_id, oauth_session['access_token'], oauth_session['instance_url'],
+            business_inputs, job.get('dept_salaries'), audit_options
+        )
+    finally:
+        heartbeat.cancel()
+
+async def heartbeat_audit(job: dict):
+    """
+    Periodically record a running audit's latest progress on its session
+
+    Progress is a Salesforce call, a finished analyzer or a pause. An audit waiting for a free
+    engine thread is alive but has nothing to report, so it records the current time instead.
+    """
+    while True:
+        await asyncio.sleep(AUDIT_HEARTBEAT_SECONDS)
+        last_progress_at = datetime.utcnow() if job.get('engine_waiting') else job['progress_at']
+        try:
+            await db.audit_sessions.update_one(
+                {"id": job['audit_session_id'], "status": "processing", "attempt": job.get('attempt')},
+                {"$set": {"last_progress_at": last_progress_at}}
+            )
+        except Exception as e:
+            logger.warning(f"Heartbeat failed for audit {job['audit_session_id']}: {e}")
+
+async def reap_stale_audits() -> Dict[str, int]:
+    """
+    Fail or re-queue audits whose worker stopped making progress
+
+    Processing audits whose last progress is older than AUDIT_STALE_SECONDS, and old queued audits
+    whose owning process stopped recording itself alive (their queue was lost with it), are claimed
+    with a compare-and-set on their status and progress time so concurrent reapers act once.
+    Claimed audits are re-queued from their stored job spec, with any findings saved by a drain,
+    until AUDIT_MAX_ATTEMPTS, then failed. Drained queued audits are left to recover_drained_audits.
+
+    Returns:
+        dict: Number of audits re-queued and failed
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=AUDIT_STALE_SECONDS)
+    stale_filters = [
+        {"status": "processing", "last_progress_at": {"$lt": cutoff}},
+        {"status": "processing", "last_progress_at": None, "created_at": {"$lt": cutoff}}
+    ]
+    if AUDIT_WORKER_MODE == 'inline':
+        # External workers claim queued audits from Mongo, so only an in-process queue can be lost.
+        # Audits queued in another live process are just waiting their turn there.
+        live_processes = await db.audit_processes.distinct(
+            "id", {"id": {"$ne": AUDIT_PROCESS_ID}, "last_seen_at": {"$gte": cutoff}}
+        )
+        stale_filters.append({"status": "queued", "drained_at": None, "created_at": {"$lt": cutoff}, "queue_owner": {"$nin": live_processes}})
+    stale_sessions = await db.audit_sessions.find({"$or": stale_filters}).to_list(100)
+    
+    reaped = {'requeued': 0, 'failed': 0}
+    for session in stale_sessions:
+        audit_session_id = session['id']
+        if session['status'] == 'queued' and audit_queue.status(audit_session_id) is not None:
+            continue
+        # A hung local run is stopped before its audit is handed out again
+        audit_queue.cancel(audit_session_id)
+        
+        attempt = (session.get('attempt') or 1) + 1
+        can_retry = session.get('job') and attempt <= AUDIT_MAX_ATTEMPTS
+        update = {"status": "queued", "attempt": attempt, "last_progress_at": None, "lease_owner": None} if can_retry else {
+            "status": "error",
+            "error_message": "The audit stopped making progress and could not be completed. Please run it again."
+        }
+        update["updated_at"] = datetime.utcnow()
+        claimed = await db.audit_sessions.update_one(
+            {"id": audit_session_id, "status": session['status'], "last_progress_at": session.get('last_progress_at')},
+            {"$set": update}
+        )
+        if claimed.matched_count == 0:
+            continue
+        
+        if not can_retry:
+            logger.warning(f"Audit {audit_session_id} failed after {attempt - 1} stalled attempts")
+            reaped['failed'] += 1
+            continue
+        
+        job = dict(session['job'], attempt=attempt, resumed_findings=session.get('partial_findings'))
+        try:
+            await enqueue_audit_job(job)
+            logger.warning(f"Re-queued stalled audit {audit_session_id} (attempt {attempt})")
+            reaped['requeued'] += 1
+        except AuditQueueFull as queue_full:
+            # Still queued in Mongo; picked up again by a later sweep once the queue has room
+            logger.warning(f"Could not re-queue stalled audit {audit_session_id}: {queue_full}")
+    return reaped
+
+async def record_audit_process_alive():
+    """Record that this process's in-memory queue is alive, so other reapers leave its queued audits alone"""
+    await db.audit_processes.update_one(
+        {"id": AUDIT_PROCESS_ID},
+        {"$set": {"last_seen_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def audit_reaper():
+    """
+    Sweep for stalled audits every AUDIT_REAPER_INTERVAL_SECONDS
+
+    Each sweep first records this process as alive and admits audits drained by other processes,
+    since in a rolling deploy the old process drains after this one has started.
+    """
+    while True:
+        await asyncio.sleep(AUDIT_REAPER_INTERVAL_SECONDS)
+        if AUDIT_WORKER_MODE == 'inline':
+            try:
+                await record_audit_process_alive()
+            except Exception as e:
+                logger.warning(f"Failed to record audit process heartbeat: {e}")
+            try:
+                recovered = await recover_drained_audits()
+                if recovered:
+                    logger.info(f"Audit reaper recovered {recovered} drained audits")
+            except Exception as e:
+                logger.error(f"Failed to recover drained audits: {e}")
+        try:
+            reaped = await reap_stale_audits()
+            if reaped['requeued'] or reaped['failed']:
+                logger.info(f"Audit reaper re-queued {reaped['requeued']} and failed {reaped['failed']} stalled audits")
+        except Exception as e:
+            logger.error(f"Audit reaper sweep failed: {e}")
+
+async def drain_audits():
+    """
+    Stop taking audits and hand unfinished ones to the next process
+
+    Running audits get AUDIT_DRAIN_GRACE_SECONDS to finish. Those still running are cancelled
+    at their next Salesforce call and re-queued with the findings of their finished analyzers,
+    which the resumed run reuses. Queued audits are marked drained so another process picks
+    them up at startup or on its next reaper sweep, keeping their attempt count.
+    """
+    audit_queue.start_drain()
+    running = audit_queue.running_jobs()
+    logger.info(f"Draining audits: {len(running)} running, {len(audit_queue.queued_jobs())} queued")
+    if running and await audit_queue.wait_idle(AUDIT_DRAIN_GRACE_SECONDS):
+        logger.info("All running audits finished within the drain grace period")
+    
+    drained_at = datetime.utcnow()
+    for job in audit_queue.running_jobs():
+        await requeue_interrupted_audit(job, drained_at)
+    
+    for job in audit_queue.queued_jobs():
+        try:
+            await db.audit_sessions.update_one(
+                {"id": job['audit_session_id'], "status": "queued"},
+                {"$set": {"drained_at": drained_at, "updated_at": drained_at}}
+            )
+        except Exception as e:
+            logger.error(f"Failed to mark queued audit {job['audit_session_id']} as drained: {e}")
+
+async def requeue_interrupted_audit(job: dict, drained_at: datetime):
+    """
+    Stop a running audit at its next Salesforce call and put it back in the queue
+
+    Findings of the analyzers it already finished are saved as partial_findings for the resumed run.
+    """
+    job['cancel_event'].set()
+    if job.get('task') is not None:
+        job['task'].cancel()
+    partial_findings = {**(job.get('resumed_findings') or {}), **(job.get('partial_results') or {})}
+    session_filter = {"id": job['audit_session_id'], "status": "processing", "attempt": job.get('attempt')}
+    requeue = {"status": "queued", "drained_at": drained_at, "last_progress_at": None, "lease_owner": None, "updated_at": drained_at}
+    try:
+        await db.audit_sessions.update_one(session_filter, {"$set": {**requeue, "partial_findings": partial_findings}})
+        logger.info(f"Re-queued audit {job['audit_session_id']} with {len(partial_findings)} finished analyzers")
+    except Exception as e:
+        # Findings that cannot be stored are recomputed by the resumed run
+        logger.warning(f"Could not save partial findings of audit {job['audit_session_id']}, re-queueing without them: {e}")
+        try:
+            await db.audit_sessions.update_one(session_filter, {"$set": requeue})
+        except Exception as db_error:
+            logger.error(f"Failed to re-queue audit {job['audit_session_id']} on drain: {db_error}")
+
+async def recover_drained_audits() -> int:
+    """Admit audits another process drained on shutdown, claiming each once across processes"""
+    recovered = 0
+    sessions = await db.audit_sessions.find({"status": "queued", "drained_at": {"$ne": None}}).to_list(AUDIT_QUEUE_MAX_DEPTH)
+    for session in sessions:
+        if not session.get('job'):
+            continue
+        claimed = await db.audit_sessions.update_one(
+            {"id": session['id'], "status": "queued", "drained_at": session['drained_at']},
+            {"$set": {"drained_at": None, "updated_at": datetime.utcnow()}}
+        )
+        if claimed.matched_count == 0:
+            continue
+        job = dict(session['job'], attempt=session.get('attempt'), resumed_findings=session.get('partial_findings'))
+        try:
+            await enqueue_audit_job(job)
+            recovered += 1
+        except AuditQueueFull as queue_full:
+            # Marked drained again so a later sweep retries it without using up an attempt
+            logger.warning(f"Could not recover drained audit {session['id']}: {queue_full}")
+            await db.audit_sessions.update_one(
+                {"id": session['id'], "status": "queued", "drained_at": None},
+                {"$set": {"drained_at": session['drained_at']}}
+            )
+    return recovered
+
+async def dispatch_audit_job(job: dict):
+    """Run one dispatched audit and release its dispatcher"""
+    try:
+        await run_audit_job(job)
+    except asyncio.CancelledError:
+        logger.info(f"Audit {job['audit_session_id']} cancelled, dispatcher released")
+    except Exception as e:
+        logger.error(f"Audit dispatch failed for {job['audit_session_id']}: {e}")
+    finally:
+        audit_queue.finish(job)
+
+async def audit_dispatcher():
+    """Start queued audits in fair-queuing order whenever a dispatcher is free"""
+    logger.info(f"Audit dispatcher started with {AUDIT_DISPATCH_WORKERS} workers")
+    while True:
+        job = await audit_queue.next_job()
+        job['task'] = asyncio.create_task(dispatch_audit_job(job))
+
+# Scheduled audits
+AUDIT_SCHEDULER_TICK_SECONDS = 15
+AUDIT_SCHEDULE_MAX_PER_MINUTE = int(os.environ.get('AUDIT_SCHEDULE_MAX_PER_MINUTE', '20'))  # across all API processes
+AUDIT_SCHEDULE_JITTER_MINUTES = int(os.environ.get('AUDIT_SCHEDULE_JITTER_MINUTES', '30'))
+CRON_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]  # minute hour day-of-month month day-of-week
+
+def parse_cron(expression: str) -> List[set]:
+    """
+    Parse a five-field cron expression (minute hour day-of-month month day-of-week)
+
+    Supports *, lists, ranges and steps, e.g. "0 9 * * 1" or "*/30 8-18 * * 1-5". Day-of-week
+    0 and 7 are both Sunday.
+
+    Raises:
+        ValueError: If the expression is malformed or a value is out of range
+    """
+    parts = expression.split()
+    if len(parts) != 5:
+        raise ValueError("Cron expression must have 5 fields: minute hour day-of-month month day-of-week")
+    
+    fields = []
+    for part, (low, high) in zip(parts, CRON_FIELD_RANGES):
+        values = set()
+        for item in part.split(','):
+            spec, has_step, step = item.partition('/')
+            step = int(step) if has_step else 1
+            if spec == '*':
+                start, end = low, high
+            elif '-' in spec:
+                start, end = (int(value) for value in spec.split('-', 1))
+            else:
+                start = int(spec)
+                end = high if has_step else start
+            if step < 1 or not low <= start <= end <= high:
+                raise ValueError(f"Invalid cron field '{part}', values must be within {low}-{high}")
+            values.update(range(start, end + 1, step))
+        fields.append(values)
+    
+    # Sunday may be written as 7
+    if 7 in fields[4]:
+        fields[4] = (fields[4] - {7}) | {0}
+    return fields
+
+def next_cron_time(fields: List[set], after: datetime) -> datetime:
+    """
+    First minute strictly after `after` matching parsed cron fields
+
+    As in cron, a restricted day-of-month and day-of-week match when either of them matches.
+    """
+    minutes, hours, days, months, weekdays = fields
+    days_restricted = days != set(range(1, 32))
+    weekdays_restricted = weekdays != set(range(0, 7))
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    
+    day = start.replace(hour=0, minute=0)
+    # Five years covers every valid expression, including ones that only match on 29 February
+    for _ in range(366 * 5):
+        if day.month in months:
+            day_match = day.day in days
+            weekday_match = (day.weekday() + 1) % 7 in weekdays
+            if (day_match or weekday_match) if days_restricted and weekdays_restricted else (day_match and weekday_match):
+                for hour in sorted(hours):
+                    for minute in sorted(minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+        day += timedelta(days=1)
+    raise ValueError("Cron expression never matches a date")
+
+def next_schedule_slot(cron: str, tz_name: str, after: datetime) -> datetime:
+    """Next cron slot after a naive UTC time, evaluated in the schedule's timezone and returned as naive UTC"""
+    zone = ZoneInfo(tz_name)
+    local_after = after.replace(tzinfo=timezone.utc).astimezone(zone).replace(tzinfo=None)
+    local_slot = next_cron_time(parse_cron(cron), local_after)
+    return local_slot.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+def jittered_run_time(slot: datetime) -> datetime:
+    """Spread runs sharing a slot (e.g. every Monday 9am) over the jitter window"""
+    return slot + timedelta(seconds=random.uniform(0, AUDIT_SCHEDULE_JITTER_MINUTES * 60))
+
+class SalesforceTokenRefreshError(Exception):
+    """Raised when a stored refresh token cannot be exchanged; `revoked` means it will never work again"""
+    
+    def __init__(self, message: str, revoked: bool):
+        super().__init__(message)
+        self.revoked = revoked
+
+def encrypt_refresh_token(refresh_token: Optional[str]) -> Optional[str]:
+    """Encrypt a refresh token for storage; None when Salesforce issued none or no encryption key is configured"""
+    if not refresh_token or token_cipher is None:
+        return None
+    return token_cipher.encrypt(refresh_token.encode()).decode()
+
+def refresh_salesforce_token(stored_refresh_token: str) -> Dict[str, Any]:
+    """Exchange a stored (encrypted) refresh token for a new access token"""
+    if token_cipher is None:
+        raise SalesforceTokenRefreshError("TOKEN_ENCRYPTION_KEY is not configured", False)
+    try:
+        refresh_token = token_cipher.decrypt(stored_refresh_token.encode()).decode()
+    except InvalidToken:
+        raise SalesforceTokenRefreshError("Stored refresh token could not be decrypted", True)
+    token_response = requests.post(
+        f"{SALESFORCE_LOGIN_URL}/services/oauth2/token",
+        data={
+            'grant_type': 'refresh_token',
+            'client_id': SALESFORCE_CLIENT_ID,
+            'client_secret': SALESFORCE_CLIENT_SECRET,
+            'refresh_token': refresh_token
+        },
+        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        timeout=30
+    )
+    if token_response.status_code != 200:
+        try:
+            error = token_response.json().get('error', '')
+        except ValueError:
+            error = ''
+        raise SalesforceTokenRefreshError(f"Token refresh failed: {token_response.status_code} {error}", error == 'invalid_grant')
+    return token_response.json()
+
+async def run_scheduled_audit(schedule: dict):
+    """Start one run of a schedule: refresh its Salesforce session and queue the audit"""
+    loop = asyncio.get_event_loop()
+    try:
+        token_info = await loop.run_in_executor(io_executor, refresh_salesforce_token, schedule['refresh_token'])
+    except SalesforceTokenRefreshError as e:
+        logger.warning(f"Scheduled audit {schedule['id']} could not refresh its Salesforce session: {e}")
+        update = {"last_error": "Salesforce access was revoked. Reconnect Salesforce to resume scheduled audits." if e.revoked else str(e)}
+        if e.revoked:
+            update["enabled"] = False
+        await db.audit_schedules.update_one({"id": schedule['id']}, {"$set": update})
+        return
+    
+    oauth_session = {
+        "session_id": str(uuid.uuid4()),
+        "access_token": token_info['access_token'],
+        "instance_url": token_info.get('instance_url', schedule['instance_url']),
+        "org_id": schedule['org_id'],
+        "schedule_id": schedule['id'],
+        "created_at": datetime.utcnow(),
+        "expires_at": datetime.utcnow() + timedelta(hours=2)
+    }
+    await db.oauth_sessions.insert_one(oauth_session)
+    
+    audit_request = AuditRequest(session_id=oauth_session['session_id'], **schedule['audit'])
+    tier = audit_request.tier or ('quick' if audit_request.use_quick_estimate else 'deep')
+    audit_plan = estimate_audit_plan(tier, sampling_mode=audit_request.sampling_mode)
+    try:
+        queued = await queue_audit(audit_request, oauth_session, tier, audit_plan, {"schedule_id": schedule['id']})
+    except AuditQueueFull as queue_full:
+        # Retry this run once the queue has room instead of skipping to the next slot
+        logger.warning(f"Scheduled audit {schedule['id']} deferred: {queue_full}")
+        await db.audit_schedules.update_one(
+            {"id": schedule['id']},
+            {"$set": {"next_run_at": datetime.utcnow() + timedelta(seconds=queue_full.retry_after), "last_error": str(queue_full)}}
+        )
+        return
+    
+    logger.info(f"Scheduled audit {schedule['id']} queued session {queued['session_id']}")
+    await db.audit_schedules.update_one(
+        {"id": schedule['id']},
+        {"$set": {"last_audit_session_id": queued['session_id'], "last_error": None}}
+    )
+
+async def start_due_schedules() -> int:
+    """
+    Start schedules whose run time has passed, at most AUDIT_SCHEDULE_MAX_PER_MINUTE per minute
+
+    Schedules beyond the cap stay due and start over the following minutes, oldest first. Each
+    schedule is claimed by advancing its next run time with a compare-and-set, so concurrent
+    scheduler processes start it once.
+    """
+    now = datetime.utcnow()
+    minute_start = now.replace(second=0, microsecond=0)
+    started_this_minute = await db.audit_schedules.count_documents({"last_run_at": {"$gte": minute_start}})
+    budget = AUDIT_SCHEDULE_MAX_PER_MINUTE - started_this_minute
+    if budget <= 0:
+        return 0
+    
+    due = await db.audit_schedules.find(
+        {"enabled": True, "next_run_at": {"$lte": now}},
+        sort=[("next_run_at", 1)]
+    ).to_list(budget)
+    
+    started = 0
+    for schedule in due:
+        try:
+            next_slot = next_schedule_slot(schedule['cron'], schedule.get('timezone', 'UTC'), now)
+        except (ValueError, KeyError) as e:
+            logger.error(f"Disabling schedule {schedule['id']} with an invalid cron expression: {e}")
+            await db.audit_schedules.update_one({"id": schedule['id']}, {"$set": {"enabled": False, "last_error": str(e)}})
+            continue
+        claimed = await db.audit_schedules.update_one(
+            {"id": schedule['id'], "next_run_at": schedule['next_run_at']},
+            {"$set": {"next_run_at": jittered_run_time(next_slot), "next_slot_at": next_slot, "last_run_at": now}}
+        )
+        if claimed.matched_count == 0:
+            continue
+        started += 1
+        try:
+            await run_scheduled_audit(schedule)
+        except Exception as e:
+            logger.error(f"Scheduled audit {schedule['id']} failed to start: {e}")
+            await db.audit_schedules.update_one({"id": schedule['id']}, {"$set": {"last_error": "Failed to start the scheduled audit"}})
+    return started
+
+async def audit_scheduler():
+    """Start due scheduled audits every AUDIT_SCHEDULER_TICK_SECONDS"""
+    logger.info(f"Audit scheduler started, at most {AUDIT_SCHEDULE_MAX_PER_MINUTE} scheduled audits per minute")
+    while True:
+        try:
+            started = await start_due_schedules()
+            if started:
+                logger.info(f"Started {started} scheduled audits")
+        except Exception as e:
+            logger.error(f"Audit scheduler tick failed: {e}")
+        await asyncio.sleep(AUDIT_SCHEDULER_TICK_SECONDS)
+
+# Idempotency keys for audit creation; the TTL index removes keys after IDEMPOTENCY_KEY_TTL_HOURS
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+IDEMPOTENCY_PENDING_SECONDS = 60  # a key still pending after this long belongs to a request that died
+
+async def ensure_idempotency_indexes():
+    await db.idempotency_keys.create_index("key", unique=True)
+    await db.idempotency_keys.create_index("created_at", expireAfterSeconds=IDEMPOTENCY_KEY_TTL_HOURS * 3600)
+
+# Multi-org audit batches
+AUDIT_BATCH_MAX_SIZE = 100
+AUDIT_BATCH_DEFAULT_CONCURRENCY = max(1, int(os.environ.get('AUDIT_BATCH_DEFAULT_CONCURRENCY', '5')))
+AUDIT_BATCH_PUMP_SECONDS = 5
+AUDIT_BATCH_STARTING_STALE_SECONDS = 120  # a "starting" item older than this lost the process starting it
+AUDIT_FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+
+async def get_refreshed_oauth_session(oauth_session_id: str) -> dict:
+    """
+    OAuth session for an audit that starts long after it was requested
+
+    Expired sessions are renewed in place from their refresh token.
+
+    Raises:
+        ValueError: If the session is gone, or expired without a refresh token
+    """
+    oauth_session = await db.oauth_sessions.find_one({"session_id": oauth_session_id})
+    if not oauth_session:
+        raise ValueError("Salesforce session not found")
+    if oauth_session['expires_at'] > datetime.utcnow():
+        return oauth_session
+    if not oauth_session.get('refresh_token'):
+        raise ValueError("Salesforce session expired before this audit could start")
+    
+    loop = asyncio.get_event_loop()
+    token_info = await loop.run_in_executor(io_executor, refresh_salesforce_token, oauth_session['refresh_token'])
+    renewed = {
+        "access_token": token_info['access_token'],
+        "instance_url": token_info.get('instance_url', oauth_session['instance_url']),
+        "expires_at": datetime.utcnow() + timedelta(hours=2)
+    }
+    await db.oauth_sessions.update_one({"session_id": oauth_session_id}, {"$set": renewed})
+    return {**oauth_session, **renewed}
+
+async def advance_audit_batch(batch: dict) -> int:
+    """
+    Queue a batch's pending audits while fewer than its max_concurrency are queued or running
+
+    Items are claimed with a compare-and-set on their status, so concurrent pumps start each once.
+    A full audit queue leaves the rest pending for the next pump. Items stuck in "starting" past
+    AUDIT_BATCH_STARTING_STALE_SECONDS are marked queued if their audit was created, else pending.
+
+    Returns:
+        int: Number of audits queued
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=AUDIT_BATCH_STARTING_STALE_SECONDS)
+    for index, item in enumerate(batch['items']):
+        if item['status'] != 'starting' or (item.get('claimed_at') or stale_before) > stale_before:
+            continue
+        session = await db.audit_sessions.find_one({"batch_id": batch['id'], "batch_item": index}, {"id": 1})
+        update = {"status": "queued", "session_id": session['id']} if session else {"status": "pending"}
+        released = await db.audit_batches.update_one(
+            {"id": batch['id'], f"items.{index}.status": "starting", f"items.{index}.claimed_at": item.get('claimed_at')},
+            {"$set": {f"items.{index}.{key}": value for key, value in update.items()}}
+        )
+        if released.modified_count:
+            logger.warning(f"Batch {batch['id']} item {index} was stranded while starting, now {update['status']}")
+            item.update(update)
+    
+    session_ids = [item['session_id'] for item in batch['items'] if item.get('session_id')]
+    active = await db.audit_sessions.count_documents({"id": {"$in": session_ids}, "status": {"$in": ["queued", "processing"]}})
+    
+    queued_count = 0
+    for index, item in enumerate(batch['items']):
+        if active >= batch['max_concurrency']:
+            break
+        if item['status'] != 'pending':
+            continue
+        claimed = await db.audit_batches.update_one(
+            {"id": batch['id'], f"items.{index}.status": "pending"},
+            {"$set": {f"items.{index}.status": "starting", f"items.{index}.claimed_at": datetime.utcnow()}}
+        )
+        if claimed.matched_count == 0:
+            continue
         
-        # Store findings
-        findings_to_store = []
-        for finding in findings_data:
-            finding_copy = finding.copy()
-            finding_copy["session_id"] = audit_session_id
-            findings_to_store.append(finding_copy)
-        
-        await db.audit_findings.insert_many(findings_to_store)
-        
-        logger.info(f"Background audit processing completed for session: {audit_session_id}")
-        
-    except Exception as e:
-        logger.error(f"Error in background audit processing: {e}")
-        tb = traceback.format_exc()
-        logger.error("🔥 Full background processing exception traceback:\n" + tb)
-        
-        # Update session with error status
         try:
-            await db.audit_sessions.update_one(
-                {"id": audit_session_id},
-                {"$set": {
-                    "status": "error",
-                    "error_message": "An unexpected error occurred during audit processing",
-                    "updated_at": datetime.utcnow()
-                }}
+            oauth_session = await get_refreshed_oauth_session(item['oauth_session_id'])
+            audit_request = AuditRequest(session_id=item['oauth_session_id'], **item['audit'])
+            tier = audit_request.tier or ('quick' if audit_request.use_quick_estimate else 'deep')
+            audit_plan = estimate_audit_plan(tier, sampling_mode=audit_request.sampling_mode)
+            queued = await queue_audit(audit_request, oauth_session, tier, audit_plan, {"batch_id": batch['id'], "batch_item": index})
+        except AuditQueueFull as queue_full:
+            logger.info(f"Batch {batch['id']} paused at item {index}: {queue_full}")
+            await db.audit_batches.update_one({"id": batch['id']}, {"$set": {f"items.{index}.status": "pending"}})
+            break
+        except (ValueError, SalesforceTokenRefreshError) as e:
+            await db.audit_batches.update_one({"id": batch['id']}, {"$set": {f"items.{index}.status": "error", f"items.{index}.error": str(e)}})
+            continue
+        except Exception as e:
+            logger.error(f"Batch {batch['id']} failed to start item {index}: {e}")
+            await db.audit_batches.update_one(
+                {"id": batch['id']},
+                {"$set": {f"items.{index}.status": "error", f"items.{index}.error": "Failed to start the audit"}}
             )
-        except Exception as db_error:
-            logger.error(f"Failed to update session with error status: {db_error}")
+            continue
+        
+        await db.audit_batches.update_one(
+            {"id": batch['id']},
+            {"$set": {f"items.{index}.status": "queued", f"items.{index}.session_id": queued['session_id']}}
+        )
+        active += 1
+        queued_count += 1
+    return queued_count
+
+async def summarize_audit_batch(batch: dict) -> Dict[str, Any]:
+    """Per-org status and a combined summary across a batch's audits"""
+    session_ids = [item['session_id'] for item in batch['items'] if item.get('session_id')]
+    sessions = {session['id']: session for session in await db.audit_sessions.find(
+        {"id": {"$in": session_ids}},
+        {"id": 1, "status": 1, "org_name": 1, "org_id": 1, "findings_count": 1, "estimated_savings": 1, "job.tenant": 1, "job.instance_url": 1}
+    ).to_list(len(session_ids) or 1)}
+    
+    orgs = []
+    status_counts = {}
+    combined = {"findings": 0, "annual_dollars": 0.0, "monthly_hours": 0.0, "cleanup_cost": 0.0}
+    for index, item in enumerate(batch['items']):
+        session = sessions.get(item.get('session_id'), {})
+        status = session.get('status') or item['status']
+        status_counts[status] = status_counts.get(status, 0) + 1
+        savings = session.get('estimated_savings') or {}
+        if status == 'completed':
+            combined["findings"] += session.get('findings_count', 0)
+            combined["annual_dollars"] += savings.get('annual_dollars', 0)
+            combined["monthly_hours"] += savings.get('monthly_hours', 0)
+            combined["cleanup_cost"] += savings.get('cleanup_cost', 0)
+        orgs.append({
+            "index": index,
+            "session_id": item.get('session_id'),
+            "org_name": session.get('org_name'),
+            "org_id": session.get('org_id'),
+            # Jobs queued before tenants were keyed by org Id used the instance URL as their tenant
+            "instance_url": (session.get('job') or {}).get('instance_url') or (session.get('job') or {}).get('tenant'),
+            "status": status,
+            "error": item.get('error'),
+            "findings_count": session.get('findings_count', 0),
+            "annual_dollars": savings.get('annual_dollars', 0)
+        })
+    
+    finished = sum(count for status, count in status_counts.items() if status in AUDIT_FINISHED_STATUSES)
+    total = len(batch['items'])
+    return {
+        "batch_id": batch['id'],
+        "status": "completed" if finished == total else "running",
+        "created_at": batch['created_at'].isoformat(),
+        "progress": {"total": total, "finished": finished, "percent": round(100 * finished / total) if total else 100, "by_status": status_counts},
+        "summary": {
+            "completed_orgs": status_counts.get('completed', 0),
+            "total_findings": combined["findings"],
+            "total_annual_roi": round(combined["annual_dollars"], 0),
+            "total_time_savings_hours": round(combined["monthly_hours"], 1),
+            "total_cleanup_cost": round(combined["cleanup_cost"], 0),
+            "top_orgs": sorted((org for org in orgs if org['status'] == 'completed'), key=lambda org: org['annual_dollars'], reverse=True)[:5]
+        },
+        "orgs": orgs
+    }
+
+async def audit_batch_pump():
+    """Keep running batches topped up to their concurrency and mark finished ones completed"""
+    while True:
+        await asyncio.sleep(AUDIT_BATCH_PUMP_SECONDS)
+        try:
+            async for batch in db.audit_batches.find({"status": "running"}):
+                await advance_audit_batch(batch)
+                if not any(item['status'] in ('pending', 'starting') for item in batch['items']):
+                    summary = await summarize_audit_batch(batch)
+                    if summary['status'] == 'completed':
+                        await db.audit_batches.update_one(
+                            {"id": batch['id'], "status": "running"},
+                            {"$set": {"status": "completed", "completed_at": datetime.utcnow(), "summary": summary['summary']}}
+                        )
+        except Exception as e:
+            logger.error(f"Audit batch pump failed: {e}")
 
 # API Routes
 @api_router.get("/")
@@ -2102,6 +6005,7 @@ async def salesforce_oauth_callback(request: Request, code: str = Query(...), st
             "session_id": session_id,
             "access_token": token_info['access_token'],
             "instance_url": token_info['instance_url'],
+            "refresh_token": encrypt_refresh_token(token_info.get('refresh_token')),  # lets scheduled audits reconnect later
             "created_at": datetime.utcnow(),
             "expires_at": datetime.utcnow() + timedelta(hours=2)
         }
@@ -2298,101 +6202,198 @@ async def get_all_business_stages():
         logger.error(f"Error fetching business stages: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch stages: {str(e)}")
 
+async def queue_audit(audit_request: AuditRequest, oauth_session: dict, tier: str, audit_plan: dict,
+                      session_fields: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Create a queued audit session for a validated request and hand it to the audit queue
+
+    Args:
+        audit_request: Audit request whose sampling mode and tier were already validated
+        oauth_session: Live OAuth session of the org to audit
+        tier: Resolved audit tier
+        audit_plan: Plan estimated for the tier
+        session_fields: Extra fields stored on the audit session (e.g. schedule or batch ids)
+
+    Raises:
+        AuditQueueFull: When the queue or the org's quota is full; no session is left behind
+
+    Returns:
+        dict: Session id, queue position, ETA, tier and plan
+    """
+    session_id = oauth_session['session_id']
+    department_salaries = audit_request.department_salaries
+    use_quick_estimate = audit_request.use_quick_estimate
+    instance_url = oauth_session['instance_url']
+    # Quotas and customer classes are per org; an instance host is shared by every org on its pod
+    org_id = await get_session_org_id(oauth_session)
+    tenant = org_id or instance_url
+    if not org_id:
+        logger.warning(f"Could not read the org Id of session {session_id}, applying the quota of its instance {instance_url}")
+    
+    customer_class = await get_customer_class(org_id)
+    
+    # Reject up front when saturated instead of queueing without bound
+    await check_audit_admission(tenant)
+    
+    # Convert department salaries to dict if provided
+    dept_salaries_dict = None
+    if department_salaries and not use_quick_estimate:
+        # Only use department salaries if at least one value is provided
+        has_custom_values = any([
+            department_salaries.customer_service,
+            department_salaries.sales,
+            department_salaries.marketing,
+            department_salaries.engineering,
+            department_salaries.executives
+        ])
+        
+        if has_custom_values:
+            dept_salaries_dict = {
+                'customer_service': department_salaries.customer_service,
+                'sales': department_salaries.sales,
+                'marketing': department_salaries.marketing,
+                'engineering': department_salaries.engineering,
+                'executives': department_salaries.executives
+            }
+            logger.info("Using custom department salaries for audit")
+        else:
+            logger.info("No custom salaries provided, using defaults")
+    else:
+        if use_quick_estimate:
+            logger.info("Quick estimate mode - using default calculations")
+        else:
+            dept_salaries_dict = {
+                'customer_service': None,
+                'sales': None,
+                'marketing': None,
+                'engineering': None,
+                'executives': None
+            }
+    
+    # Create audit session immediately with "queued" status
+    audit_session_id = str(uuid.uuid4())
+    session_data = {
+        "id": audit_session_id,
+        "oauth_session_id": session_id,
+        "org_name": "Processing...",  # Will update when complete
+        "org_id": "",
+        "status": "queued",  # Track audit status
+        "attempt": 1,
+        "created_at": datetime.utcnow(),
+        "business_inputs": audit_request.business_inputs.dict() if audit_request.business_inputs else None,
+        "sampling_mode": audit_request.sampling_mode,
+        "incremental": {"enabled": audit_request.incremental},
+        "tier": tier,
+        "audit_plan": audit_plan,
+        "findings_count": 0,
+        "estimated_savings": {"annual_dollars": 0},
+        **(session_fields or {})
+    }
+    
+    # The job spec is stored with the session so the audit can be re-run from it
+    job = {
+        "audit_session_id": audit_session_id,
+        "tenant": tenant,
+        "instance_url": instance_url,
+        "oauth_session_id": session_id,
+        "business_inputs": session_data["business_inputs"],
+        "dept_salaries": dept_salaries_dict,
+        "audit_options": {
+            'sampling_mode': audit_request.sampling_mode,
+            'incremental': audit_request.incremental,
+            'aging_thresholds': audit_request.aging_thresholds,
+            'tier': tier
+        },
+        "estimated_seconds": audit_plan['estimated_seconds'],
+        "customer_class": customer_class,
+        "weight": AUDIT_TIER_WEIGHTS[tier] * CUSTOMER_CLASS_WEIGHTS[customer_class],
+        "attempt": 1
+    }
+    session_data["job"] = job
+    
+    # Insert session record immediately so frontend can find it
+    await db.audit_sessions.insert_one(session_data)
+    logger.info(f"Created queued audit session: {audit_session_id}")
+    
+    try:
+        queue_status = await enqueue_audit_job(job)
+    except AuditQueueFull:
+        await db.audit_sessions.delete_one({"id": audit_session_id})
+        raise
+    
+    return {
+        "session_id": audit_session_id,
+        "status": "queued",
+        "message": "Audit queued successfully",
+        "queue_position": queue_status['position'],
+        "eta_seconds": queue_status['eta_seconds'],
+        "tier": tier,
+        "audit_plan": audit_plan
+    }
+
 @api_router.post("/audit/run")
-async def run_audit(audit_request: AuditRequest):
+async def run_audit(audit_request: AuditRequest, idempotency_key: Optional[str] = Header(None, max_length=255)):
     """Run audit analysis with new ROI calculation method"""
     try:
         session_id = audit_request.session_id
-        department_salaries = audit_request.department_salaries
         use_quick_estimate = audit_request.use_quick_estimate
         
         logger.info(f"Starting audit for session: {session_id} (Quick estimate: {use_quick_estimate})")
         logger.info(f"Business inputs: {audit_request.business_inputs}")
         
-        # Get OAuth session
-        oauth_session = await db.oauth_sessions.find_one({
-            "session_id": session_id,
-            "expires_at": {"$gt": datetime.utcnow()}
-        })
-        
-        if not oauth_session:
-            logger.error(f"Invalid or expired session: {session_id}")
-            raise HTTPException(status_code=401, detail="Invalid or expired session")
+        if audit_request.sampling_mode not in SAMPLING_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sampling mode. Must be one of: {', '.join(SAMPLING_MODES)}"
+            )
         
-        logger.info(f"OAuth session found for: {session_id}")
-        access_token = oauth_session['access_token']
-        instance_url = oauth_session['instance_url']
-        logger.info(f"Using Salesforce instance: {instance_url}")
+        tier = audit_request.tier or ('quick' if use_quick_estimate else 'deep')
+        if tier not in AUDIT_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid audit tier. Must be one of: {', '.join(AUDIT_TIERS)}"
+            )
+        audit_plan = estimate_audit_plan(tier, sampling_mode=audit_request.sampling_mode)
         
-        # Run Salesforce audit in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
+        # A retried request with the same Idempotency-Key gets the audit it already started
+        idempotency_scope = f"{session_id}:{idempotency_key}" if idempotency_key else None
+        if idempotency_scope:
+            previous_response = await claim_idempotency_key(idempotency_scope, audit_request)
+            if previous_response is not None:
+                logger.info(f"Idempotent replay of audit {previous_response['session_id']} for session {session_id}")
+                return previous_response
         
-        # Convert department salaries to dict if provided
-        dept_salaries_dict = None
-        if department_salaries and not use_quick_estimate:
-            # Only use department salaries if at least one value is provided
-            has_custom_values = any([
-                department_salaries.customer_service,
-                department_salaries.sales,
-                department_salaries.marketing,
-                department_salaries.engineering,
-                department_salaries.executives
-            ])
+        try:
+            # Get OAuth session
+            oauth_session = await db.oauth_sessions.find_one({
+                "session_id": session_id,
+                "expires_at": {"$gt": datetime.utcnow()}
+            })
             
-            if has_custom_values:
-                dept_salaries_dict = {
-                    'customer_service': department_salaries.customer_service,
-                    'sales': department_salaries.sales,
-                    'marketing': department_salaries.marketing,
-                    'engineering': department_salaries.engineering,
-                    'executives': department_salaries.executives
-                }
-                logger.info("Using custom department salaries for audit")
-            else:
-                logger.info("No custom salaries provided, using defaults")
-        else:
-            if use_quick_estimate:
-                logger.info("Quick estimate mode - using default calculations")
-            else:
-                dept_salaries_dict = {
-                    'customer_service': None,
-                    'sales': None,
-                    'marketing': None,
-                    'engineering': None,
-                    'executives': None
-                }
-        
-        # Create audit session immediately with "processing" status
-        audit_session_id = str(uuid.uuid4())
-        session_data = {
-            "id": audit_session_id,
-            "oauth_session_id": session_id,
-            "org_name": "Processing...",  # Will update when complete
-            "org_id": "",
-            "status": "processing",  # Track audit status
-            "created_at": datetime.utcnow(),
-            "business_inputs": audit_request.business_inputs.dict() if audit_request.business_inputs else None,
-            "findings_count": 0,
-            "estimated_savings": {"annual_dollars": 0}
-        }
-        
-        # Insert session record immediately so frontend can find it
-        await db.audit_sessions.insert_one(session_data)
-        logger.info(f"Created processing audit session: {audit_session_id}")
+            if not oauth_session:
+                logger.error(f"Invalid or expired session: {session_id}")
+                raise HTTPException(status_code=401, detail="Invalid or expired session")
+            
+            logger.info(f"OAuth session found for: {session_id}")
+            instance_url = oauth_session['instance_url']
+            logger.info(f"Using Salesforce instance: {instance_url}")
+            
+            # Reject up front when saturated instead of queueing without bound
+            try:
+                processing_response = await queue_audit(audit_request, oauth_session, tier, audit_plan)
+            except AuditQueueFull as queue_full:
+                logger.warning(f"Audit rejected for {instance_url}: {queue_full}")
+                raise HTTPException(status_code=queue_full.status_code, detail=str(queue_full), headers={"Retry-After": str(queue_full.retry_after)})
+        except BaseException:
+            # Failed requests release their key so the client can retry with it
+            if idempotency_scope:
+                await release_idempotency_key(idempotency_scope)
+            raise
+        
+        if idempotency_scope:
+            await complete_idempotency_key(idempotency_scope, processing_response)
         
         # Return session ID immediately so frontend can navigate
-        processing_response = {
-            "session_id": audit_session_id,
-            "status": "processing",
-            "message": "Audit started successfully"
-        }
-        
-        # Start actual audit processing in background
-        asyncio.create_task(process_audit_in_background(
-            audit_session_id, access_token, instance_url, 
-            audit_request.business_inputs, dept_salaries_dict
-        ))
-        
         return processing_response
         
     except HTTPException:
@@ -2409,11 +6410,251 @@ async def run_audit(audit_request: AuditRequest):
             detail="An unexpected error occurred during audit processing. Our team has been notified."
         )
 
+@api_router.get("/audit/plan")
+async def get_audit_plan(
+    session_id: str,
+    tier: str = Query("deep"),
+    sampling_mode: str = Query("auto")
+):
+    """Estimate the API calls and run time of an audit tier using the org's live record counts"""
+    if tier not in AUDIT_TIERS:
+        raise HTTPException(status_code=400, detail=f"Invalid audit tier. Must be one of: {', '.join(AUDIT_TIERS)}")
+    if sampling_mode not in SAMPLING_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid sampling mode. Must be one of: {', '.join(SAMPLING_MODES)}")
+    
+    oauth_session = await db.oauth_sessions.find_one({
+        "session_id": session_id,
+        "expires_at": {"$gt": datetime.utcnow()}
+    })
+    if not oauth_session:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    
+    # One /limits/recordCount call sizes the streamed objects; fall back to defaults if it fails
+    record_counts = None
+    try:
+        sf = Salesforce(instance_url=oauth_session['instance_url'], session_id=oauth_session['access_token'])
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(io_executor, sf.restful, 'limits/recordCount')
+        record_counts = {row['name']: row['count'] for row in result.get('sObjects', [])}
+    except Exception as e:
+        logger.warning(f"Error fetching record counts for audit plan: {e}")
+    
+    return {
+        "session_id": session_id,
+        "plan": estimate_audit_plan(tier, record_counts, sampling_mode)
+    }
+
+@api_router.post("/audit/batch")
+async def run_audit_batch(batch_request: AuditBatchRequest):
+    """Audit many orgs in one request; audits are queued a few at a time as earlier ones finish"""
+    try:
+        if not batch_request.audits:
+            raise HTTPException(status_code=400, detail="A batch needs at least one audit")
+        if len(batch_request.audits) > AUDIT_BATCH_MAX_SIZE:
+            raise HTTPException(status_code=400, detail=f"A batch can hold at most {AUDIT_BATCH_MAX_SIZE} audits")
+        for index, audit_request in enumerate(batch_request.audits):
+            if audit_request.sampling_mode not in SAMPLING_MODES:
+                raise HTTPException(status_code=400, detail=f"Audit {index}: invalid sampling mode. Must be one of: {', '.join(SAMPLING_MODES)}")
+            if audit_request.tier and audit_request.tier not in AUDIT_TIERS:
+                raise HTTPException(status_code=400, detail=f"Audit {index}: invalid audit tier. Must be one of: {', '.join(AUDIT_TIERS)}")
+        
+        items = []
+        for audit_request in batch_request.audits:
+            oauth_session = await db.oauth_sessions.find_one({"session_id": audit_request.session_id})
+            live = oauth_session and (oauth_session['expires_at'] > datetime.utcnow() or oauth_session.get('refresh_token'))
+            items.append({
+                "oauth_session_id": audit_request.session_id,
+                "audit": audit_request.dict(exclude={'session_id'}),
+                "status": "pending" if live else "error",
+                "error": None if live else "Invalid or expired session",
+                "session_id": None
+            })
+        
+        batch = {
+            "id": str(uuid.uuid4()),
+            "status": "running",
+            "max_concurrency": min(batch_request.max_concurrency or AUDIT_BATCH_DEFAULT_CONCURRENCY, AUDIT_BATCH_MAX_CONCURRENCY),
+            "items": items,
+            "created_at": datetime.utcnow()
+        }
+        await db.audit_batches.insert_one(batch)
+        logger.info(f"Created audit batch {batch['id']} with {len(items)} orgs, {batch['max_concurrency']} at a time")
+        
+        await advance_audit_batch(batch)
+        batch = await db.audit_batches.find_one({"id": batch['id']})
+        return await summarize_audit_batch(batch)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating audit batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create audit batch: {str(e)}")
+
+@api_router.get("/audit/batch/{batch_id}")
+async def get_audit_batch(batch_id: str):
+    """Aggregated progress, per-org status and a combined summary of a batch"""
+    batch = await db.audit_batches.find_one({"id": batch_id})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Audit batch not found")
+    return await summarize_audit_batch(batch)
+
+async def claim_idempotency_key(scope: str, audit_request: AuditRequest) -> Optional[Dict[str, Any]]:
+    """
+    Reserve an idempotency key for a new audit, or return the response of the audit it already started
+
+    Raises:
+        HTTPException: 422 if the key was used with a different request body, 409 while the
+            first request with the key is still in flight
+    """
+    fingerprint = hashlib.sha256(json.dumps(audit_request.dict(), sort_keys=True, default=str).encode()).hexdigest()
+    now = datetime.utcnow()
+    try:
+        await db.idempotency_keys.insert_one({"key": scope, "fingerprint": fingerprint, "status": "pending", "created_at": now})
+        return None
+    except DuplicateKeyError:
+        existing = await db.idempotency_keys.find_one({"key": scope})
+    
+    if existing is None:
+        # Expired between the insert and the read; treat it as new
+        return await claim_idempotency_key(scope, audit_request)
+    if existing['fingerprint'] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    if existing['status'] == 'completed':
+        return {**existing['response'], "idempotent_replay": True}
+    
+    # A pending key whose request died before finishing is taken over
+    if existing['created_at'] < now - timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS):
+        taken_over = await db.idempotency_keys.update_one(
+            {"key": scope, "status": "pending", "created_at": existing['created_at']},
+            {"$set": {"created_at": now}}
+        )
+        if taken_over.matched_count == 1:
+            return None
+    raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress", headers={"Retry-After": "1"})
+
+async def complete_idempotency_key(scope: str, response: Dict[str, Any]):
+    try:
+        await db.idempotency_keys.update_one({"key": scope}, {"$set": {"status": "completed", "response": response}})
+    except Exception as e:
+        logger.warning(f"Failed to store idempotent response for {scope}: {e}")
+
+async def release_idempotency_key(scope: str):
+    try:
+        await db.idempotency_keys.delete_one({"key": scope, "status": "pending"})
+    except Exception as e:
+        logger.warning(f"Failed to release idempotency key {scope}: {e}")
+
+def schedule_response(schedule: dict) -> dict:
+    """Schedule as returned by the API, without its refresh token"""
+    schedule = convert_objectid(schedule)
+    schedule.pop('refresh_token', None)
+    return schedule
+
+async def get_live_oauth_session(session_id: str) -> dict:
+    oauth_session = await db.oauth_sessions.find_one({
+        "session_id": session_id,
+        "expires_at": {"$gt": datetime.utcnow()}
+    })
+    if not oauth_session:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return oauth_session
+
+async def get_session_org_id(oauth_session: dict) -> Optional[str]:
+    """
+    Org Id behind an OAuth session, read once and stored on the session
+
+    Instance hosts are shared by every org on a pod, so org-scoped data is keyed by this instead.
+    Returns None when the org Id cannot be read.
+    """
+    if oauth_session.get('org_id'):
+        return oauth_session['org_id']
+    sf_client = Salesforce(instance_url=oauth_session['instance_url'], session_id=oauth_session['access_token'])
+    org_id = await asyncio.get_event_loop().run_in_executor(io_executor, get_org_cache_key, sf_client)
+    if org_id:
+        oauth_session['org_id'] = org_id
+        await db.oauth_sessions.update_one({"session_id": oauth_session['session_id']}, {"$set": {"org_id": org_id}})
+    return org_id
+
+async def get_live_session_org_id(session_id: str) -> str:
+    """Org Id of a live OAuth session, for authorizing access to org-scoped records"""
+    org_id = await get_session_org_id(await get_live_oauth_session(session_id))
+    if not org_id:
+        raise HTTPException(status_code=502, detail="Could not identify the Salesforce org of this session")
+    return org_id
+
+@api_router.post("/audit/schedules")
+async def create_audit_schedule(schedule_request: AuditScheduleRequest):
+    """Schedule recurring audits of the session's org from a cron expression"""
+    try:
+        audit_request = schedule_request.audit
+        if audit_request.sampling_mode not in SAMPLING_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid sampling mode. Must be one of: {', '.join(SAMPLING_MODES)}")
+        if audit_request.tier and audit_request.tier not in AUDIT_TIERS:
+            raise HTTPException(status_code=400, detail=f"Invalid audit tier. Must be one of: {', '.join(AUDIT_TIERS)}")
+        try:
+            next_slot = next_schedule_slot(schedule_request.cron, schedule_request.timezone, datetime.utcnow())
+        except ZoneInfoNotFoundError:
+            raise HTTPException(status_code=400, detail=f"Unknown timezone: {schedule_request.timezone}")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if token_cipher is None:
+            raise HTTPException(status_code=503, detail="Scheduled audits are disabled: TOKEN_ENCRYPTION_KEY is not configured")
+        oauth_session = await get_live_oauth_session(audit_request.session_id)
+        if not oauth_session.get('refresh_token'):
+            raise HTTPException(status_code=400, detail="Reconnect Salesforce to enable scheduled audits")
+        org_id = await get_session_org_id(oauth_session)
+        if not org_id:
+            raise HTTPException(status_code=502, detail="Could not identify the Salesforce org of this session")
+        
+        schedule = {
+            "id": str(uuid.uuid4()),
+            "org_id": org_id,
+            "instance_url": oauth_session['instance_url'],
+            "refresh_token": oauth_session['refresh_token'],
+            "cron": schedule_request.cron,
+            "timezone": schedule_request.timezone,
+            "audit": audit_request.dict(exclude={'session_id'}),
+            "enabled": True,
+            "next_slot_at": next_slot,
+            "next_run_at": jittered_run_time(next_slot),
+            "last_run_at": None,
+            "last_audit_session_id": None,
+            "last_error": None,
+            "created_at": datetime.utcnow()
+        }
+        await db.audit_schedules.insert_one(schedule)
+        logger.info(f"Created audit schedule {schedule['id']} ({schedule['cron']} {schedule['timezone']}) for org {org_id}")
+        return schedule_response(schedule)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating audit schedule: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create audit schedule: {str(e)}")
+
+@api_router.get("/audit/schedules")
+async def list_audit_schedules(session_id: str):
+    """List the audit schedules of the session's org"""
+    org_id = await get_live_session_org_id(session_id)
+    schedules = await db.audit_schedules.find({"org_id": org_id}).to_list(100)
+    return {"schedules": [schedule_response(schedule) for schedule in schedules]}
+
+@api_router.delete("/audit/schedules/{schedule_id}")
+async def delete_audit_schedule(schedule_id: str, session_id: str):
+    """Delete one of the session org's audit schedules; audits already queued keep running"""
+    org_id = await get_live_session_org_id(session_id)
+    result = await db.audit_schedules.delete_one({"id": schedule_id, "org_id": org_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Audit schedule not found")
+    return {"schedule_id": schedule_id, "deleted": True}
+
 @api_router.get("/debug/sessions")
-async def debug_oauth_sessions():
-    """Debug endpoint to see current OAuth sessions"""
+async def debug_oauth_sessions(request: Request):
+    """Debug endpoint to see current OAuth sessions, without their tokens"""
+    require_admin(request)
     try:
-        sessions = await db.oauth_sessions.find().to_list(10)
+        sessions = await db.oauth_sessions.find({}, {"access_token": 0, "refresh_token": 0}).to_list(10)
         current_time = datetime.utcnow()
         
         result = []
@@ -2426,6 +6667,39 @@ async def debug_oauth_sessions():
     except Exception as e:
         return {"error": str(e)}
 
+def require_admin(request: Request):
+    """Reject admin calls without a matching X-Admin-Token header"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def executor_metrics() -> Dict[str, Any]:
+    return {
+        "executors": {name: pool.metrics() for name, pool in EXECUTORS.items()},
+        "audit_queue": audit_queue.metrics()
+    }
+
+@api_router.get("/admin/executors")
+async def get_executor_metrics(request: Request):
+    """Pool sizes and saturation of the I/O, deep-audit, analyzer and CPU executors plus the audit queue"""
+    require_admin(request)
+    return executor_metrics()
+
+@api_router.post("/admin/executors")
+async def resize_executors(resize: ExecutorResizeRequest, request: Request):
+    """Resize executors at runtime; running work finishes on the previous pool"""
+    require_admin(request)
+    # Quick audit engines run on io threads and wait on analyzers that fetch through io threads too
+    if resize.io_workers and resize.io_workers <= AUDIT_DISPATCH_WORKERS:
+        raise HTTPException(status_code=400, detail=f"io_workers must be more than the {AUDIT_DISPATCH_WORKERS} audit dispatchers")
+    sizes = {'io': resize.io_workers, 'deep': resize.deep_workers, 'analyzers': resize.analyzer_workers, 'cpu': resize.cpu_workers}
+    for name, max_workers in sizes.items():
+        if max_workers and max_workers != EXECUTORS[name].max_workers:
+            logger.info(f"Resizing {name} executor from {EXECUTORS[name].max_workers} to {max_workers} workers")
+            EXECUTORS[name].resize(max_workers)
+    return executor_metrics()
+
 @api_router.get("/audit/sessions")
 async def get_audit_sessions():
     """Get all audit sessions"""
@@ -2480,12 +6754,14 @@ async def get_audit_details(session_id: str):
         # Check audit status
         status = session.get('status', 'unknown')
         
-        if status == 'processing':
-            # Return processing status - frontend will poll
+        if status in ('queued', 'processing'):
+            # Return processing status - frontend will poll; queued audits also report their place in line
+            queue_status = audit_queue.status(session_id)
             return {
                 "session": session,
                 "status": "processing",
-                "message": "Audit is still processing. Please wait...",
+                "message": f"Audit is queued at position {queue_status['position']}. Please wait..." if queue_status and queue_status['position'] else "Audit is still processing. Please wait...",
+                "queue": queue_status,
                 "metadata": {
                     "audit_type": "stage_based",
                     "confidence": "medium",
@@ -2506,6 +6782,18 @@ async def get_audit_details(session_id: str):
                 }
             }
         
+        elif status == 'cancelled':
+            return {
+                "session": session,
+                "status": "cancelled",
+                "message": "This audit was cancelled before it completed",
+                "metadata": {
+                    "audit_type": "stage_based",
+                    "confidence": "low",
+                    "created_at": session.get('created_at', datetime.utcnow()).isoformat() if session.get('created_at') else datetime.utcnow().isoformat()
+                }
+            }
+        
         # Status is 'completed' - get findings and return full results
         findings = await db.audit_findings.find({"session_id": session_id}).to_list(100)
         findings = [convert_objectid(finding) for finding in findings]
@@ -2554,9 +6842,40 @@ async def get_audit_details(session_id: str):
         logger.error(f"Error in get_audit_details: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get audit details: {str(e)}")
 
+@api_router.post("/audit/{session_id}/cancel")
+async def cancel_audit(session_id: str):
+    """Cancel a queued or running audit; running analyzers stop at their next Salesforce call"""
+    try:
+        session = await db.audit_sessions.find_one({"id": session_id})
+        if not session:
+            raise HTTPException(status_code=404, detail="Audit session not found")
+        
+        previous_status = session.get('status')
+        if previous_status not in ('queued', 'processing'):
+            raise HTTPException(status_code=409, detail=f"Audit is already {previous_status} and cannot be cancelled")
+        
+        # Mark the session first so a run finishing concurrently does not overwrite it as completed
+        result = await db.audit_sessions.update_one(
+            {"id": session_id, "status": {"$in": ["queued", "processing"]}},
+            {"$set": {"status": "cancelled", "cancelled_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=409, detail="Audit finished before it could be cancelled")
+        
+        cancelled_from = audit_queue.cancel(session_id)
+        logger.info(f"Audit {session_id} cancelled ({cancelled_from or 'not in queue'})")
+        
+        return {"session_id": session_id, "status": "cancelled", "previous_status": previous_status}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling audit: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to cancel audit: {str(e)}")
+
 @api_router.post("/audit/{session_id}/update-assumptions")
 async def update_audit_assumptions(session_id: str, assumptions: AssumptionsUpdate):
-    """Update audit assumptions and recalculate ROI"""
+    """Update audit assumptions and recalculate ROI by re-scoring the stored findings (no Salesforce queries)"""
     try:
         logger.info(f"Updating assumptions for session: {session_id}")
         
@@ -2564,19 +6883,8 @@ async def update_audit_assumptions(session_id: str, assumptions: AssumptionsUpda
         session = await db.audit_sessions.find_one({"id": session_id})
         if not session:
             raise HTTPException(status_code=404, detail="Audit session not found")
-        
-        # Find the corresponding OAuth session to get access tokens
-        oauth_sessions = await db.oauth_sessions.find({
-            "expires_at": {"$gt": datetime.utcnow()}
-        }).to_list(10)
-        
-        if not oauth_sessions:
-            raise HTTPException(status_code=401, detail="No valid OAuth session found. Please reconnect to Salesforce.")
-        
-        # Use the most recent OAuth session (assumes same user)
-        oauth_session = oauth_sessions[0]
-        access_token = oauth_session['access_token']
-        instance_url = oauth_session['instance_url']
+        if session.get('status') != 'completed' or not session.get('business_stage'):
+            raise HTTPException(status_code=409, detail="Assumptions can only be updated once the audit has completed")
         
         # Convert assumptions to dict, filtering out None values
         custom_assumptions = {}
@@ -2587,12 +6895,17 @@ async def update_audit_assumptions(session_id: str, assumptions: AssumptionsUpda
         
         logger.info(f"Custom assumptions: {custom_assumptions}")
         
-        # Re-run the audit with custom assumptions
-        loop = asyncio.get_event_loop()
+        # Re-score the findings of the completed audit with the custom assumptions
+        findings_data = await db.audit_findings.find({"session_id": session_id}).to_list(None)
+        org_context = session.get('scoring_context')
+        if not org_context:
+            # Audits stored before the scoring context record active users on their findings
+            active_users = max((f.get('salesforce_data', {}).get('users_affected') or 0 for f in findings_data), default=0)
+            org_context = {'active_users': active_users} if active_users else {}
         
-        # Note: We'll use empty department salaries as we're only updating assumptions
-        findings_data, org_name, org_id, business_stage = await loop.run_in_executor(
-            executor, run_salesforce_audit_with_stage_engine, access_token, instance_url, None, None, custom_assumptions
+        loop = asyncio.get_event_loop()
+        findings_data = await loop.run_in_executor(
+            cpu_executor, score_findings, findings_data, org_context, session['business_stage'], custom_assumptions
         )
         
         # Calculate new summary
@@ -2632,21 +6945,15 @@ async def update_audit_assumptions(session_id: str, assumptions: AssumptionsUpda
         
         # Update stored findings
         await db.audit_findings.delete_many({"session_id": session_id})
-        
-        findings_to_store = []
-        for finding in findings_data:
-            finding_copy = finding.copy()
-            finding_copy["session_id"] = session_id
-            findings_to_store.append(finding_copy)
-        
-        await db.audit_findings.insert_many(findings_to_store)
+        if findings_data:
+            await db.audit_findings.insert_many(findings_data)
         
         logger.info(f"Updated audit with custom assumptions: {len(findings_data)} findings")
         
         return {
             "session_id": session_id,
             "summary": summary,
-            "findings": findings_data,
+            "findings": convert_objectid(findings_data),
             "message": "Audit assumptions updated successfully"
         }
         
@@ -2656,6 +6963,40 @@ async def update_audit_assumptions(session_id: str, assumptions: AssumptionsUpda
         logger.error(f"Error updating assumptions: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update assumptions: {str(e)}")
 
+@api_router.get("/audit/{session_id}/aging")
+async def get_audit_aging(session_id: str, lead_days: int = Query(None, ge=1), opportunity_days: int = Query(None, ge=1)):
+    """Recompute stale record counts for new thresholds from the stored aging histograms (no Salesforce queries)"""
+    try:
+        session = await db.audit_sessions.find_one({"id": session_id})
+        if not session:
+            raise HTTPException(status_code=404, detail="Audit session not found")
+        
+        thresholds = {'Lead': lead_days, 'Opportunity': opportunity_days}
+        histograms = session.get('aging_histograms')
+        if histograms is None:
+            # Audits from before histograms were stored on the session only kept those with a finding
+            aging_findings = await db.audit_findings.find({"session_id": session_id, "finding_type": "record_aging"}).to_list(10)
+            histograms = {finding.get('salesforce_data', {}).get('sobject'): finding.get('salesforce_data', {}) for finding in aging_findings}
+        
+        as_of = datetime.utcnow()
+        result = {}
+        for sobject, data in histograms.items():
+            threshold_days = thresholds.get(sobject) or data.get('threshold_days')
+            result[sobject] = {
+                "threshold_days": threshold_days,
+                "stale_records": count_aged_records({'months': data.get('aging_histogram', [])}, threshold_days, as_of),
+                "no_activity_records": data.get('no_activity_records', 0),
+                "aging_histogram": data.get('aging_histogram', [])
+            }
+        
+        return {"session_id": session_id, "as_of": as_of.isoformat(), "aging": result}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error recomputing aging: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to recompute aging: {str(e)}")
+
 @api_router.get("/audit/{session_id}/pdf")
 async def generate_pdf_report(session_id: str):
     """Generate PDF report (mock endpoint)"""
@@ -2682,6 +7023,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the audit dispatcher and reaper, and drain in-flight audits before closing Mongo on shutdown"""
+    if token_cipher is None:
+        logger.error("TOKEN_ENCRYPTION_KEY is not set: refresh tokens will not be stored and scheduled audits are disabled. "
+                     "Generate one with `python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'`.")
+    try:
+        await ensure_idempotency_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create idempotency key indexes: {e}")
+    if AUDIT_WORKER_MODE == 'inline':
+        try:
+            await record_audit_process_alive()
+            recovered = await recover_drained_audits()
+            if recovered:
+                logger.info(f"Recovered {recovered} audits drained by the previous process")
+        except Exception as e:
+            logger.error(f"Failed to recover drained audits: {e}")
+        app.state.audit_dispatcher = asyncio.create_task(audit_dispatcher())
+    else:
+        logger.info("Audits run on external audit workers; this process only queues them")
+        app.state.audit_dispatcher = None
+    app.state.audit_reaper = asyncio.create_task(audit_reaper())
+    app.state.audit_scheduler = asyncio.create_task(audit_scheduler())
+    app.state.audit_batch_pump = asyncio.create_task(audit_batch_pump())
+    
+    yield
+    
+    app.state.audit_batch_pump.cancel()
+    app.state.audit_scheduler.cancel()
+    app.state.audit_reaper.cancel()
+    try:
+        await drain_audits()
+    except Exception as e:
+        logger.error(f"Audit drain failed: {e}")
+    if app.state.audit_dispatcher is not None:
+        app.state.audit_dispatcher.cancel()
+    # Cancelled audits stop at their next Salesforce call; nothing waits on their threads
+    for pool in EXECUTORS.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    client.close()
+
+app.router.lifespan_context = lifespan
\ No newline at end of file
@@ -1442,7 +1442,7 @@ const AuditResults = () => {
       setAuditData(data);
       
       // Only stop loading if we have a final status
-      if (status === 'completed' || status === 'error') {
+      if (status === 'completed' || status === 'error' || status === 'cancelled') {
         setLoading(false);
       }
       
@@ -1597,6 +1597,34 @@ const AuditResults = () => {
     );
   }
 
+  // Handle cancelled state
+  if (auditStatus === 'cancelled') {
+    return (
+      <div className="audit-results">
+        <header className="header">
+          <Link to="/" className="logo gradient">SalesAudit Pro</Link>
+        </header>
+        <div style={{ 
+          display: 'flex', 
+          alignItems: 'center', 
+          justifyContent: 'center', 
+          height: '60vh',
+          flexDirection: 'column',
+          gap: '1rem'
+        }}>
+          <h2 style={{ color: 'var(--text-primary)' }}>Audit Cancelled</h2>
+          <p style={{ color: 'var(--text-secondary)', textAlign: 'center' }}>
+            {auditData?.message || 'This audit was cancelled before it completed.'}<br/>
+            Start a new audit from the dashboard whenever you're ready.
+          </p>
+          <div style={{ display: 'flex', gap: '1rem' }}>
+            <Link to="/dashboard" className="btn-outline">← Back to Dashboard</Link>
+          </div>
+        </div>
+      </div>
+    );
+  }
+
   if (!auditData || auditStatus !== 'completed') {
     return (
       <div className="audit-results">
@@ -0,0 +1,95 @@
+"""
+In-memory stand-in for the Motor collections used by the audit queue and idempotency keys
+
+Supports the filters and updates the server issues: equality (None also matches a missing
+field), $lt, $gt, $gte, $ne, $in and $nin on fields, a top-level $or, $set with upsert, and
+unique fields that raise DuplicateKeyError on insert.
+"""
+
+import copy
+from types import SimpleNamespace
+
+from pymongo.errors import DuplicateKeyError
+
+OPERATORS = {
+    '$lt': lambda value, operand: value is not None and value < operand,
+    '$gt': lambda value, operand: value is not None and value > operand,
+    '$gte': lambda value, operand: value is not None and value >= operand,
+    '$ne': lambda value, operand: value != operand,
+    '$in': lambda value, operand: value in operand,
+    '$nin': lambda value, operand: value not in operand
+}
+
+def matches(document, query):
+    for field, condition in query.items():
+        if field == '$or':
+            if not any(matches(document, option) for option in condition):
+                return False
+            continue
+        value = document.get(field)
+        if isinstance(condition, dict) and condition and all(key.startswith('$') for key in condition):
+            if not all(OPERATORS[operator](value, operand) for operator, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents if length is None else self.documents[:length]
+
+class FakeCollection:
+    def __init__(self, unique=()):
+        self.documents = []
+        self.unique = unique
+
+    async def insert_one(self, document):
+        for field in self.unique:
+            if any(existing.get(field) == document.get(field) for existing in self.documents):
+                raise DuplicateKeyError(f"duplicate {field}")
+        self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=len(self.documents))
+
+    async def find_one(self, query):
+        document = next((document for document in self.documents if matches(document, query)), None)
+        return copy.deepcopy(document)
+
+    def find(self, query):
+        return FakeCursor([copy.deepcopy(document) for document in self.documents if matches(document, query)])
+
+    async def update_one(self, query, update, upsert=False):
+        document = next((document for document in self.documents if matches(document, query)), None)
+        if document is None:
+            if upsert:
+                document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+                self.documents.append(document)
+                document.update(copy.deepcopy(update.get('$set', {})))
+            return SimpleNamespace(matched_count=0)
+        document.update(copy.deepcopy(update.get('$set', {})))
+        return SimpleNamespace(matched_count=1)
+
+    async def delete_one(self, query):
+        for index, document in enumerate(self.documents):
+            if matches(document, query):
+                del self.documents[index]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def count_documents(self, query):
+        return sum(1 for document in self.documents if matches(document, query))
+
+    async def distinct(self, field, query=None):
+        return list({document.get(field) for document in self.documents if matches(document, query or {})})
+
+class FakeDatabase:
+    """Collections are created on first access, like Motor's"""
+
+    def __init__(self, **collections):
+        self.__dict__.update(collections)
+
+    def __getattr__(self, name):
+        collection = self.__dict__[name] = FakeCollection()
+        return collection
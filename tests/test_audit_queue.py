@@ -0,0 +1,153 @@
+"""
+Unit tests for audit admission control and weighted fair queuing
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+import server
+from server import STREAM_PAGE_SIZE, AuditAdmissionQueue, AuditQueueDraining, AuditQueueFull, CachedSalesforceClient
+
+def job(audit_session_id, tenant='org-a', estimated_seconds=10.0, weight=1, tier='quick'):
+    return {'audit_session_id': audit_session_id, 'tenant': tenant, 'estimated_seconds': estimated_seconds,
+            'weight': weight, 'audit_options': {'tier': tier}, 'cancel_event': threading.Event()}
+
+def positions(queue, *audit_session_ids):
+    return [queue.status(audit_session_id)['position'] for audit_session_id in audit_session_ids]
+
+def test_busy_tenant_does_not_starve_others():
+    """A tenant's later jobs queue behind another tenant's first job"""
+    queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1)
+    for audit_session_id in ('a1', 'a2', 'a3'):
+        queue.admit(job(audit_session_id, 'org-a'))
+    queue.admit(job('b1', 'org-b'))
+    assert positions(queue, 'a1', 'b1', 'a2', 'a3') == [1, 2, 3, 4]
+
+def test_heavier_weight_jobs_go_first():
+    queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1)
+    queue.admit(job('deep', 'org-a', estimated_seconds=100, weight=1))
+    queue.admit(job('quick', 'org-b', estimated_seconds=100, weight=4))
+    assert positions(queue, 'quick', 'deep') == [1, 2]
+
+def test_tenant_quota_rejects_with_429_and_retry_after():
+    queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=2, workers=1)
+    queue.admit(job('a1'))
+    queue.admit(job('a2'))
+    with pytest.raises(AuditQueueFull) as rejected:
+        queue.admit(job('a3'))
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after >= 1
+    # Other tenants are not affected by org-a's quota
+    queue.admit(job('b1', 'org-b'))
+
+def test_full_queue_rejects_every_tenant():
+    queue = AuditAdmissionQueue(max_depth=2, tenant_max_active=5, workers=1)
+    queue.admit(job('a1', 'org-a'))
+    queue.admit(job('b1', 'org-b'))
+    with pytest.raises(AuditQueueFull):
+        queue.admit(job('c1', 'org-c'))
+
+def test_draining_queue_rejects_with_503():
+    queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1)
+    queue.start_drain()
+    with pytest.raises(AuditQueueDraining) as rejected:
+        queue.admit(job('a1'))
+    assert rejected.value.status_code == 503
+
+def test_cancelling_a_queued_job_frees_its_tenant_slot():
+    queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=1, workers=1)
+    queued = job('a1')
+    queue.admit(queued)
+    assert queue.cancel('a1') == 'queued'
+    assert queued['cancel_event'].is_set()
+    assert queue.status('a1') is None
+    queue.admit(job('a2'))
+
+def test_status_reports_running_job_and_eta_of_queued_ones():
+    async def scenario():
+        queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1)
+        queue.admit(job('a1', estimated_seconds=10))
+        queue.admit(job('b1', 'org-b', estimated_seconds=10))
+        running = await queue.next_job()
+        return queue, running
+
+    queue, running = asyncio.run(scenario())
+    assert running['audit_session_id'] == 'a1'
+    assert queue.status('a1') == {'position': 0, 'eta_seconds': 10}
+    # Waits for the running audit, then runs for its own estimate
+    assert queue.status('b1') == {'position': 1, 'eta_seconds': 20}
+
+def test_finishing_a_job_releases_its_tenant_slot():
+    async def scenario():
+        queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=1, workers=1)
+        queue.admit(job('a1'))
+        queue.finish(await queue.next_job())
+        queue.admit(job('a2'))
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert queue.metrics()['running'] == 0
+    assert queue.status('a2')['position'] == 1
+
+def test_deep_audit_pauses_for_heavier_waiting_work(monkeypatch):
+    """A running deep audit yields its dispatcher to a heavier job and resumes once that job starts"""
+    monkeypatch.setattr(server, 'AUDIT_PREEMPTION_POLL_SECONDS', 0.01)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1)
+        queue.admit(job('deep', 'org-a', weight=1, tier='deep'))
+        deep = await queue.next_job()
+        queue.admit(job('quick', 'org-b', weight=4))
+        paused = loop.run_in_executor(None, queue.make_checkpoint(deep, loop))
+        quick = await asyncio.wait_for(queue.next_job(), 5)
+        await asyncio.wait_for(paused, 5)
+        await asyncio.sleep(0)
+        return queue, deep, quick
+
+    queue, deep, quick = asyncio.run(scenario())
+    assert quick['audit_session_id'] == 'quick'
+    assert deep['paused_seconds'] > 0
+    assert not deep['paused']
+    assert queue.metrics()['running'] == 2
+
+def test_only_deep_audits_with_pause_allowance_left_are_paused(monkeypatch):
+    monkeypatch.setattr(server, 'AUDIT_PREEMPTION_POLL_SECONDS', 0.01)
+
+    async def scenario(tier, paused_seconds):
+        loop = asyncio.get_running_loop()
+        queue = AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1)
+        queue.admit(job('running', 'org-a', weight=1, tier=tier))
+        running = await queue.next_job()
+        running['paused_seconds'] = paused_seconds
+        queue.admit(job('heavier', 'org-b', weight=4))
+        await loop.run_in_executor(None, queue.make_checkpoint(running, loop))
+        return running
+
+    assert 'paused' not in asyncio.run(scenario('quick', 0.0))
+    spent = asyncio.run(scenario('deep', server.AUDIT_PREEMPTION_MAX_PAUSE_SECONDS))
+    assert 'paused' not in spent
+
+class FakeSalesforce:
+    def query(self, soql):
+        return {'records': [], 'done': True}
+
+    def query_all_iter(self, soql):
+        return iter(range(STREAM_PAGE_SIZE * 2 + 1))
+
+def test_salesforce_calls_pass_the_checkpoint():
+    """Analyzers can be paused mid-run: at each query and once per streamed page"""
+    calls = []
+    sf = CachedSalesforceClient(FakeSalesforce(), checkpoint=lambda: calls.append(1))
+    sf.query("SELECT Id FROM Organization")
+    assert len(calls) == 1
+    assert len(list(sf.query_all_iter("SELECT Id FROM Contact"))) == STREAM_PAGE_SIZE * 2 + 1
+    assert len(calls) == 3
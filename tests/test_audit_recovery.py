@@ -0,0 +1,128 @@
+"""
+Unit tests for reaping stalled audits and handing audits over on drain
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+import server
+from server import (AUDIT_MAX_ATTEMPTS, AUDIT_PROCESS_ID, AUDIT_STALE_SECONDS, AuditAdmissionQueue, drain_audits,
+                    reap_stale_audits, recover_drained_audits)
+from tests.fake_mongo import FakeDatabase
+
+LONG_AGO = datetime.utcnow() - timedelta(seconds=AUDIT_STALE_SECONDS * 2)
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(server, 'db', db)
+    monkeypatch.setattr(server, 'audit_queue', AuditAdmissionQueue(max_depth=10, tenant_max_active=5, workers=1))
+    monkeypatch.setattr(server, 'AUDIT_WORKER_MODE', 'inline')
+    return db
+
+def audit_session(audit_session_id, status, **fields):
+    session = {
+        'id': audit_session_id, 'status': status, 'attempt': 1, 'created_at': LONG_AGO, 'last_progress_at': None,
+        'job': {'audit_session_id': audit_session_id, 'tenant': 'org-a', 'estimated_seconds': 10.0, 'weight': 1,
+                'audit_options': {'tier': 'quick'}}
+    }
+    session.update(fields)
+    return session
+
+def add_sessions(db, *sessions):
+    db.audit_sessions.documents.extend(sessions)
+
+def stored(db, audit_session_id):
+    return next(session for session in db.audit_sessions.documents if session['id'] == audit_session_id)
+
+def reap():
+    return asyncio.run(reap_stale_audits())
+
+def test_stalled_audit_is_requeued_with_its_saved_findings(db):
+    add_sessions(db, audit_session('a1', 'processing', last_progress_at=LONG_AGO, partial_findings={'duplicates': []}))
+    assert reap() == {'requeued': 1, 'failed': 0}
+    session = stored(db, 'a1')
+    assert (session['status'], session['attempt'], session['queue_owner']) == ('queued', 2, AUDIT_PROCESS_ID)
+    queued_job = server.audit_queue.queued_jobs()[0]
+    assert queued_job['attempt'] == 2
+    assert queued_job['resumed_findings'] == {'duplicates': []}
+
+def test_audit_out_of_attempts_is_failed(db):
+    add_sessions(db, audit_session('a1', 'processing', last_progress_at=LONG_AGO, attempt=AUDIT_MAX_ATTEMPTS))
+    assert reap() == {'requeued': 0, 'failed': 1}
+    assert stored(db, 'a1')['status'] == 'error'
+    assert server.audit_queue.queued_jobs() == []
+
+def test_audit_with_recent_progress_is_left_alone(db):
+    add_sessions(db, audit_session('a1', 'processing', last_progress_at=datetime.utcnow()))
+    assert reap() == {'requeued': 0, 'failed': 0}
+    assert stored(db, 'a1')['status'] == 'processing'
+
+def test_queued_audits_of_a_live_process_are_left_alone(db):
+    """Another process that recorded itself alive still holds its queue"""
+    db.audit_processes.documents.append({'id': 'other-process', 'last_seen_at': datetime.utcnow()})
+    add_sessions(db, audit_session('a1', 'queued', queue_owner='other-process'))
+    assert reap() == {'requeued': 0, 'failed': 0}
+    assert stored(db, 'a1')['attempt'] == 1
+
+def test_queued_audits_of_a_dead_process_are_requeued(db):
+    db.audit_processes.documents.append({'id': 'other-process', 'last_seen_at': LONG_AGO})
+    add_sessions(db, audit_session('a1', 'queued', queue_owner='other-process'))
+    assert reap() == {'requeued': 1, 'failed': 0}
+    assert stored(db, 'a1')['queue_owner'] == AUDIT_PROCESS_ID
+
+def test_audits_still_in_this_process_queue_are_left_alone(db):
+    add_sessions(db, audit_session('a1', 'queued', queue_owner=AUDIT_PROCESS_ID))
+    server.audit_queue.admit(dict(stored(db, 'a1')['job']))
+    assert reap() == {'requeued': 0, 'failed': 0}
+    assert len(server.audit_queue.queued_jobs()) == 1
+
+def test_drained_audits_are_left_to_recovery(db):
+    add_sessions(db, audit_session('a1', 'queued', queue_owner='other-process', drained_at=LONG_AGO))
+    assert reap() == {'requeued': 0, 'failed': 0}
+
+def test_drain_hands_running_and_queued_audits_to_the_next_process(db, monkeypatch):
+    """A running audit is stopped and re-queued with its finished analyzers; a queued one is marked drained"""
+    monkeypatch.setattr(server, 'AUDIT_DRAIN_GRACE_SECONDS', 0.01)
+    add_sessions(db, audit_session('a1', 'processing', last_progress_at=datetime.utcnow()), audit_session('b1', 'queued'))
+
+    async def scenario():
+        server.audit_queue.admit(dict(stored(db, 'a1')['job'], attempt=1))
+        server.audit_queue.admit(dict(stored(db, 'b1')['job'], tenant='org-b'))
+        running = await server.audit_queue.next_job()
+        running['resumed_findings'] = {'duplicates': ['resumed']}
+        running['partial_results'] = {'aging': ['finished']}
+        await drain_audits()
+        return running
+
+    running = asyncio.run(scenario())
+    assert running['cancel_event'].is_set()
+    interrupted = stored(db, 'a1')
+    assert (interrupted['status'], interrupted['attempt']) == ('queued', 1)
+    assert interrupted['drained_at'] is not None
+    assert interrupted['partial_findings'] == {'duplicates': ['resumed'], 'aging': ['finished']}
+    assert stored(db, 'b1')['drained_at'] == interrupted['drained_at']
+
+def test_drained_audits_are_recovered_once(db):
+    add_sessions(db, audit_session('a1', 'queued', drained_at=LONG_AGO, partial_findings={'aging': []}))
+    assert asyncio.run(recover_drained_audits()) == 1
+    assert asyncio.run(recover_drained_audits()) == 0
+    session = stored(db, 'a1')
+    assert session['drained_at'] is None
+    assert session['queue_owner'] == AUDIT_PROCESS_ID
+    queued_job = server.audit_queue.queued_jobs()[0]
+    assert (queued_job['attempt'], queued_job['resumed_findings']) == (1, {'aging': []})
+
+def test_drained_audit_stays_drained_when_the_queue_is_full(db, monkeypatch):
+    monkeypatch.setattr(server, 'audit_queue', AuditAdmissionQueue(max_depth=0, tenant_max_active=5, workers=1))
+    add_sessions(db, audit_session('a1', 'queued', drained_at=LONG_AGO))
+    assert asyncio.run(recover_drained_audits()) == 0
+    assert stored(db, 'a1')['drained_at'] == LONG_AGO
@@ -0,0 +1,75 @@
+"""
+Unit tests for cron parsing and schedule slots of recurring audits
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import AUDIT_SCHEDULE_JITTER_MINUTES, jittered_run_time, next_cron_time, next_schedule_slot, parse_cron
+
+def test_parse_simple_expression():
+    assert parse_cron("0 9 * * 1") == [{0}, {9}, set(range(1, 32)), set(range(1, 13)), {1}]
+
+def test_parse_steps_ranges_and_lists():
+    minutes, hours, days, months, weekdays = parse_cron("*/30 8-18 1,15 */3 1-5")
+    assert minutes == {0, 30}
+    assert hours == set(range(8, 19))
+    assert days == {1, 15}
+    assert months == {1, 4, 7, 10}
+    assert weekdays == {1, 2, 3, 4, 5}
+
+def test_step_from_a_start_value_runs_to_the_end_of_the_range():
+    assert parse_cron("5/20 * * * *")[0] == {5, 25, 45}
+
+def test_sunday_may_be_written_as_seven():
+    assert parse_cron("0 0 * * 7")[4] == {0}
+    assert parse_cron("0 0 * * 5-7")[4] == {0, 5, 6}
+
+@pytest.mark.parametrize('expression', [
+    "0 9 * *",         # four fields
+    "60 * * * *",      # minute out of range
+    "0 24 * * *",      # hour out of range
+    "0 0 0 * *",       # day-of-month starts at 1
+    "*/0 * * * *",     # zero step
+    "0 0 * * 5-1",     # reversed range
+    "0 0 * * mon"      # names are not supported
+])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        parse_cron(expression)
+
+def test_next_time_is_strictly_after():
+    # 2024-01-01 is a Monday
+    monday_nine = datetime(2024, 1, 1, 9, 0)
+    assert next_cron_time(parse_cron("0 9 * * 1"), monday_nine) == datetime(2024, 1, 8, 9, 0)
+    assert next_cron_time(parse_cron("0 9 * * 1"), monday_nine - timedelta(seconds=1)) == monday_nine
+
+def test_restricted_day_of_month_or_day_of_week_matches_either():
+    """As in cron, "the 13th or a Friday" fires on the first Friday"""
+    assert next_cron_time(parse_cron("0 0 13 * 5"), datetime(2024, 1, 1)) == datetime(2024, 1, 5)
+
+def test_leap_day_schedule_waits_for_the_next_leap_year():
+    assert next_cron_time(parse_cron("0 0 29 2 *"), datetime(2024, 3, 1)) == datetime(2028, 2, 29)
+
+def test_impossible_date_never_matches():
+    with pytest.raises(ValueError):
+        next_cron_time(parse_cron("0 0 31 2 *"), datetime(2024, 1, 1))
+
+def test_slot_is_evaluated_in_the_schedule_timezone():
+    # 9am in New York is 14:00 UTC in winter and 13:00 UTC in summer
+    assert next_schedule_slot("0 9 * * *", "America/New_York", datetime(2024, 1, 15, 12, 0)) == datetime(2024, 1, 15, 14, 0)
+    assert next_schedule_slot("0 9 * * *", "America/New_York", datetime(2024, 7, 15, 12, 0)) == datetime(2024, 7, 15, 13, 0)
+    assert next_schedule_slot("0 9 * * *", "UTC", datetime(2024, 7, 15, 12, 0)) == datetime(2024, 7, 16, 9, 0)
+
+def test_jitter_stays_within_the_window():
+    slot = datetime(2024, 1, 1, 9, 0)
+    for _ in range(100):
+        run_at = jittered_run_time(slot)
+        assert slot <= run_at <= slot + timedelta(minutes=AUDIT_SCHEDULE_JITTER_MINUTES)
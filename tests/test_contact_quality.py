@@ -0,0 +1,51 @@
+"""
+Unit tests for contact and lead data-quality checks
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import CONTACT_VALIDATION_OBJECTS, validate_contact_batch
+
+CONTACT = CONTACT_VALIDATION_OBJECTS['Contact']
+
+def issues_of(email=None, phone=None, country='Germany', state=None):
+    batch = pd.DataFrame.from_records([{'Id': '003000000000001', 'Email': email, 'Phone': phone,
+                                        'MailingCountry': country, 'MailingState': state}], columns=CONTACT['fields'])
+    return {issue: bool(mask.iloc[0]) for issue, mask in validate_contact_batch(batch, CONTACT).items()}
+
+@pytest.mark.parametrize('email', ['jane@example.com', "o'brien@mail.example.co.uk", 'j.doe+crm@example-corp.io', ' jane@example.com '])
+def test_valid_emails(email):
+    assert not issues_of(email=email)['invalid_email']
+
+@pytest.mark.parametrize('email', ['jane@example', 'jane@@example.com', 'jane example@example.com', 'jane@example.c', '@example.com'])
+def test_invalid_emails(email):
+    assert issues_of(email=email)['invalid_email']
+
+@pytest.mark.parametrize('phone', ['+1 (415) 555-0100', '555-0100', '+44 20 7946 0958'])
+def test_valid_phones(phone):
+    assert not issues_of(phone=phone)['invalid_phone']
+
+@pytest.mark.parametrize('phone', ['12345', '+1 415 555 0100 0100 01', '0000000000', '(999) 999-9999'])
+def test_invalid_phones(phone):
+    """Too few or too many digits, or a single digit repeated as a placeholder"""
+    assert issues_of(phone=phone)['invalid_phone']
+
+def test_blank_values_are_missing_not_invalid():
+    issues = issues_of(email='  ', phone='', country=None)
+    assert not issues['invalid_email'] and not issues['invalid_phone']
+    assert issues['no_email_or_phone']
+    assert issues['missing_country']
+
+def test_state_is_required_only_where_addresses_need_it():
+    assert issues_of(email='jane@example.com', country='United States')['missing_state']
+    assert issues_of(email='jane@example.com', country=' CANADA ')['missing_state']
+    assert not issues_of(email='jane@example.com', country='United States', state='CA')['missing_state']
+    assert not issues_of(email='jane@example.com', country='Germany')['missing_state']
@@ -0,0 +1,34 @@
+"""
+Unit tests for blocking-key duplicate clustering
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import DUPLICATE_DETECTION_OBJECTS, DUPLICATE_SAMPLE_CLUSTER_IDS, find_duplicate_clusters
+
+CONTACT = DUPLICATE_DETECTION_OBJECTS['Contact']
+
+def contact(record_id, first, last, email=None, phone=None):
+    return {'Id': record_id, 'FirstName': first, 'LastName': last, 'Email': email, 'Phone': phone, 'AccountId': None}
+
+def test_pair_lists_both_records():
+    """The first record of a match is listed too, not only the one that matched it"""
+    result = find_duplicate_clusters([
+        contact('003000000000001AAA', 'Ada', 'Lovelace', email='ada@example.com'),
+        contact('003000000000002AAA', 'Grace', 'Hopper'),
+        contact('003000000000003AAA', 'Ada', 'Lovelace', email='ada@example.com')
+    ], CONTACT)
+    assert result['duplicate_clusters'] == 1
+    assert result['duplicate_records'] == 1
+    assert result['sample_clusters'] == [['003000000000001AAA', '003000000000003AAA']]
+
+def test_sample_cluster_lists_are_capped():
+    records = [contact(f'0030000000000{i:02d}AAA', 'Ada', 'Lovelace', phone='555-010-0000') for i in range(DUPLICATE_SAMPLE_CLUSTER_IDS + 3)]
+    result = find_duplicate_clusters(records, CONTACT)
+    assert result['duplicate_records'] == len(records) - 1
+    assert result['sample_clusters'] == [[record['Id'] for record in records[:DUPLICATE_SAMPLE_CLUSTER_IDS]]]
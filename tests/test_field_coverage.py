@@ -0,0 +1,96 @@
+"""
+Unit tests for validation rule coverage of data-quality gaps
+"""
+
+import os
+import sys
+import uuid
+from urllib.parse import unquote_plus
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import annotate_field_coverage, get_field_coverage
+
+DESCRIBES = {
+    'Contact': {'fields': [
+        {'name': 'AccountId', 'label': 'Account ID', 'relationshipName': 'Account', 'nillable': True, 'createable': True},
+        {'name': 'Email', 'label': 'Email', 'relationshipName': None, 'nillable': True, 'createable': True},
+        {'name': 'Phone', 'label': 'Business Phone', 'relationshipName': None, 'nillable': True, 'createable': True}
+    ]},
+    'Lead': {'fields': [
+        {'name': 'Email', 'label': 'Email', 'relationshipName': None, 'nillable': True, 'createable': True}
+    ]}
+}
+
+class FakeDescribe:
+    def __init__(self, sobject):
+        self.sobject = sobject
+
+    def describe(self):
+        return DESCRIBES[self.sobject]
+
+class FakeSalesforce:
+    """Answers the org Id query, validation rule Tooling queries and describes"""
+
+    def __init__(self, rules):
+        self.org_id = uuid.uuid4().hex[:18]
+        self.rules = rules
+
+    def query(self, soql):
+        return {'records': [{'Id': self.org_id}], 'done': True}
+
+    def toolingexecute(self, path):
+        soql = unquote_plus(path.split('q=', 1)[1])
+        if 'Metadata' in soql:
+            rule = next(rule for rule in self.rules if f"'{rule['Id']}'" in soql)
+            return {'records': [{'Id': rule['Id'], 'Metadata': {'errorConditionFormula': rule['formula']}}], 'done': True}
+        return {'records': [
+            dict({key: rule[key] for key in ('Id', 'ValidationName', 'Active', 'ErrorDisplayField')},
+                 EntityDefinition={'QualifiedApiName': rule['object']})
+            for rule in self.rules
+        ], 'done': True}
+
+    def __getattr__(self, sobject):
+        return FakeDescribe(sobject)
+
+def rule(rule_id, name, sobject, formula, error_field=None, active=True):
+    return {'Id': rule_id, 'ValidationName': name, 'object': sobject, 'formula': formula,
+            'ErrorDisplayField': error_field, 'Active': active}
+
+def test_rule_matches_by_formula_not_name():
+    """A rule named after a field does not cover it; a rule whose formula reads the field does"""
+    sf = FakeSalesforce([
+        rule('03d1', 'Email_Required', 'Contact', 'ISBLANK(LastName)'),
+        rule('03d2', 'Check_Format', 'Contact', 'NOT(REGEX(Email, "[^@]+@[^@]+"))'),
+        rule('03d3', 'Account_Needed', 'Contact', 'ISBLANK(Account.Name)', active=False)
+    ])
+    coverage = get_field_coverage(sf, [('Contact', 'Email'), ('Contact', 'AccountId')])
+    assert coverage['Contact.Email']['active_rules'] == ['Check_Format']
+    assert coverage['Contact.AccountId']['inactive_rules'] == ['Account_Needed']
+
+def test_fields_of_related_records_do_not_match():
+    """Account.Phone in a Contact formula is the account's phone, not the contact's"""
+    sf = FakeSalesforce([rule('03d1', 'Account_Phone', 'Contact', 'ISBLANK(Account.Phone)')])
+    coverage = get_field_coverage(sf, [('Contact', 'Phone')])
+    assert coverage['Contact.Phone']['active_rules'] == []
+
+def test_rule_matches_by_error_display_field():
+    sf = FakeSalesforce([rule('03d1', 'Phone_Format', 'Contact', None, error_field='Phone')])
+    coverage = get_field_coverage(sf, [('Contact', 'Phone')])
+    assert coverage['Contact.Phone']['active_rules'] == ['Phone_Format']
+
+def test_contact_quality_gaps_are_annotated():
+    """Each contact quality issue is checked against the field it is about, per object"""
+    sf = FakeSalesforce([rule('03d1', 'Lead_Email_Format', 'Lead', 'NOT(REGEX(Email, ".+@.+"))')])
+    finding = {'recommendation': 'Add validation rules', 'salesforce_data': {'objects': {
+        'Contact': {'issue_counts': {'invalid_email': 0, 'invalid_phone': 3}},
+        'Lead': {'issue_counts': {'invalid_email': 7, 'invalid_phone': 0}}
+    }}}
+    assert annotate_field_coverage(sf, [finding]) == 1
+    covered = {f"{field['object']}.{field['field']}": field for field in finding['salesforce_data']['field_coverage']}
+    assert sorted(covered) == ['Contact.Phone', 'Lead.Email']
+    assert covered['Lead.Email']['active_rules'] == ['Lead_Email_Format']
+    assert 'No validation rule or required setting covers Business Phone on Contact' in finding['recommendation']
+    assert 'Active validation rule Lead_Email_Format already covers Email on Lead' in finding['recommendation']
@@ -0,0 +1,71 @@
+"""
+Unit tests for Idempotency-Key claims and replays of audit creation
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+import server
+from server import (IDEMPOTENCY_PENDING_SECONDS, AuditRequest, claim_idempotency_key,
+                    complete_idempotency_key, release_idempotency_key)
+from tests.fake_mongo import FakeCollection, FakeDatabase
+
+@pytest.fixture
+def keys(monkeypatch):
+    keys = FakeCollection(unique=('key',))
+    monkeypatch.setattr(server, 'db', FakeDatabase(idempotency_keys=keys))
+    return keys
+
+def claim(audit_request, scope='session-1:key-1'):
+    return asyncio.run(claim_idempotency_key(scope, audit_request))
+
+def status_code_of_claim(audit_request):
+    with pytest.raises(HTTPException) as rejected:
+        claim(audit_request)
+    return rejected.value.status_code
+
+def test_first_claim_reserves_the_key(keys):
+    assert claim(AuditRequest(session_id='session-1')) is None
+    assert keys.documents[0]['status'] == 'pending'
+
+def test_retry_while_the_first_request_runs_is_rejected(keys):
+    claim(AuditRequest(session_id='session-1'))
+    assert status_code_of_claim(AuditRequest(session_id='session-1')) == 409
+
+def test_retry_after_completion_replays_the_response(keys):
+    claim(AuditRequest(session_id='session-1'))
+    asyncio.run(complete_idempotency_key('session-1:key-1', {'audit_session_id': 'audit-1', 'status': 'queued'}))
+    assert claim(AuditRequest(session_id='session-1')) == {
+        'audit_session_id': 'audit-1', 'status': 'queued', 'idempotent_replay': True
+    }
+
+def test_key_reused_with_a_different_body_is_rejected(keys):
+    claim(AuditRequest(session_id='session-1'))
+    assert status_code_of_claim(AuditRequest(session_id='session-1', tier='deep')) == 422
+
+def test_pending_key_of_a_dead_request_is_taken_over(keys):
+    claim(AuditRequest(session_id='session-1'))
+    keys.documents[0]['created_at'] -= timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS + 1)
+    assert claim(AuditRequest(session_id='session-1')) is None
+    assert keys.documents[0]['created_at'] > datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS)
+
+def test_released_key_can_be_claimed_again(keys):
+    claim(AuditRequest(session_id='session-1'))
+    asyncio.run(release_idempotency_key('session-1:key-1'))
+    assert keys.documents == []
+    assert claim(AuditRequest(session_id='session-1')) is None
+
+def test_completed_key_is_not_released(keys):
+    claim(AuditRequest(session_id='session-1'))
+    asyncio.run(complete_idempotency_key('session-1:key-1', {'audit_session_id': 'audit-1'}))
+    asyncio.run(release_idempotency_key('session-1:key-1'))
+    assert keys.documents[0]['status'] == 'completed'
@@ -0,0 +1,60 @@
+"""
+Unit tests for the permission bitsets behind the security analyzer
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import SECURITY_SYSTEM_PERMISSIONS, build_permission_bitsets, compute_permission_analysis
+
+PROFILE = {'Id': 'PS_PROFILE', 'Name': 'X00e_Standard', 'IsOwnedByProfile': True, 'PermissionsApiEnabled': True}
+MODIFY_ALL = {'Id': 'PS_ADMIN', 'Name': 'Modify_All', 'IsCustom': True, 'PermissionsModifyAllData': True}
+API_ONLY = {'Id': 'PS_API', 'Name': 'Api_Access', 'IsCustom': True, 'PermissionsApiEnabled': True}
+FLS_ONLY = {'Id': 'PS_FLS', 'Name': 'Field_Access', 'IsCustom': True}
+GROUPED = {'Id': 'PS_GROUPED', 'Name': 'Sales_Ops', 'IsCustom': True, 'PermissionsExportReport': True}
+ORPHAN = {'Id': 'PS_ORPHAN', 'Name': 'Old_Project', 'IsCustom': True, 'PermissionsViewSetup': True}
+
+PERMISSION_SETS = [PROFILE, MODIFY_ALL, API_ONLY, FLS_ONLY, GROUPED, ORPHAN]
+OBJECT_PERMISSIONS = [{'ParentId': 'PS_PROFILE', 'SobjectType': 'Account', 'PermissionsRead': True, 'PermissionsEdit': True}]
+ASSIGNMENTS = [
+    {'AssigneeId': 'U1', 'PermissionSetId': 'PS_PROFILE'},
+    {'AssigneeId': 'U1', 'PermissionSetId': 'PS_ADMIN'},
+    {'AssigneeId': 'U2', 'PermissionSetId': 'PS_PROFILE'},
+    {'AssigneeId': 'U2', 'PermissionSetId': 'PS_API'},
+    {'AssigneeId': 'U2', 'PermissionSetId': 'PS_FLS'}
+]
+
+def run_analysis(grouped_set_ids=()):
+    return compute_permission_analysis(PERMISSION_SETS, OBJECT_PERMISSIONS, ASSIGNMENTS, grouped_set_ids)
+
+def test_bitsets_pack_system_and_object_permissions():
+    matrix, ps_index, bit_count = build_permission_bitsets(PERMISSION_SETS, OBJECT_PERMISSIONS)
+    assert bit_count == len(SECURITY_SYSTEM_PERMISSIONS) + 2
+    api_bit = SECURITY_SYSTEM_PERMISSIONS.index('PermissionsApiEnabled')
+    object_bits = (1 << len(SECURITY_SYSTEM_PERMISSIONS)) | (1 << (len(SECURITY_SYSTEM_PERMISSIONS) + 1))
+    assert int(matrix[ps_index['PS_PROFILE'], 0]) == (1 << api_bit) | object_bits
+    assert int(matrix[ps_index['PS_FLS'], 0]) == 0
+
+def test_high_risk_users_elevated_by_permission_set():
+    analysis = run_analysis()
+    assert analysis['users_analyzed'] == 2
+    assert analysis['high_risk_users'] == 1
+    assert analysis['elevated_by_permission_set'] == 1
+
+def test_set_duplicating_profile_is_redundant():
+    analysis = run_analysis()
+    assert analysis['redundant_permission_sets'] == ['Api_Access']
+    assert analysis['redundant_assignments'] == 1
+
+def test_set_without_tracked_permissions_is_not_redundant():
+    """A set granting only field access or Apex classes has no bits, which is not the same as granting nothing"""
+    assert 'Field_Access' not in run_analysis()['redundant_permission_sets']
+
+def test_set_assigned_through_group_is_not_unused():
+    analysis = run_analysis(grouped_set_ids={'PS_GROUPED'})
+    assert analysis['unused_permission_sets'] == ['Old_Project']
+    assert 'Sales_Ops' in run_analysis()['unused_permission_sets']
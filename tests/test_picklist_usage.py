@@ -0,0 +1,33 @@
+"""
+Unit tests for packing picklist fields into GROUP BY CUBE queries
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import PICKLIST_MAX_CUBE_FIELDS, PICKLIST_MAX_GROUP_ROWS, plan_picklist_queries
+
+def test_fields_are_packed_first_fit_decreasing():
+    """Each group's CUBE stays within the aggregate row limit"""
+    groups = plan_picklist_queries('Lead', [('Rating', 10), ('Source', 5), ('Status', 3), ('Industry', 50)])
+    assert [group['fields'] for group in groups] == [['Industry', 'Rating'], ['Source', 'Status']]
+    assert [group['max_rows'] for group in groups] == [52 * 12, 7 * 5]
+    assert all(group['max_rows'] <= PICKLIST_MAX_GROUP_ROWS for group in groups)
+
+def test_cube_accepts_at_most_three_fields():
+    groups = plan_picklist_queries('Case', [(f"Field{i}__c", 1) for i in range(PICKLIST_MAX_CUBE_FIELDS + 1)])
+    assert [len(group['fields']) for group in groups] == [PICKLIST_MAX_CUBE_FIELDS, 1]
+
+def test_picklist_too_large_for_one_query_is_skipped():
+    groups = plan_picklist_queries('Account', [('Huge__c', PICKLIST_MAX_GROUP_ROWS), ('Type', 4)])
+    assert [group['fields'] for group in groups] == [['Type']]
+
+def test_query_groups_by_cube_with_grouping_columns():
+    [group] = plan_picklist_queries('Lead', [('Status', 4), ('Rating', 3)])
+    assert group['sobject'] == 'Lead'
+    assert group['soql'] == ("SELECT Status, Rating, GROUPING(Status) grp0, GROUPING(Rating) grp1, COUNT(Id) record_count "
+                             "FROM Lead GROUP BY CUBE(Status, Rating)")
@@ -0,0 +1,36 @@
+"""
+Unit tests for counting aged records from monthly activity histograms
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import count_aged_records
+
+def histogram(*months, no_activity=0):
+    return {'months': [{'year': year, 'month': month, 'count': count} for year, month, count in months],
+            'no_activity': no_activity}
+
+def test_months_before_the_cutoff_count_in_full():
+    # 30 days before July 1st is June 1st, so June is not aged yet
+    activity = histogram((2024, 4, 10), (2024, 5, 20), (2024, 6, 30))
+    assert count_aged_records(activity, 30, as_of=datetime(2024, 7, 1)) == 30
+
+def test_month_containing_the_cutoff_is_pro_rated():
+    """The cutoff falls halfway through June, so half of June's records are aged"""
+    activity = histogram((2024, 4, 10), (2024, 5, 20), (2024, 6, 30))
+    assert count_aged_records(activity, 30, as_of=datetime(2024, 7, 16)) == 45
+
+def test_december_ends_at_the_next_new_year():
+    activity = histogram((2023, 12, 40), (2024, 1, 8))
+    assert count_aged_records(activity, 31, as_of=datetime(2024, 2, 1)) == 40
+
+def test_records_without_activity_are_not_counted():
+    activity = histogram((2024, 6, 5), no_activity=100)
+    assert count_aged_records(activity, 90, as_of=datetime(2024, 7, 1)) == 0
+    assert count_aged_records(histogram(), 90) == 0
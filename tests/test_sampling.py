@@ -0,0 +1,87 @@
+"""
+Unit tests for cluster-sample estimates and record sampling windows
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+from server import draw_record_sample, estimate_cluster_ratio, sampling_confidence_label
+
+def test_empty_sample_estimates_nothing():
+    result = estimate_cluster_ratio([], 1000)
+    assert result['estimate'] == 0
+    assert result['sampled_records'] == 0
+    assert result['relative_error'] == 1.0
+
+def test_identical_clusters_have_no_margin():
+    """Every window with the same rate leaves no between-cluster variance"""
+    result = estimate_cluster_ratio([(100, 10)] * 5, 100000)
+    assert result['rate'] == 0.1
+    assert result['estimate'] == 10000
+    assert result['margin_of_error'] == 0
+    assert (result['ci_low'], result['ci_high']) == (10000, 10000)
+
+def test_varied_clusters_give_an_interval_around_the_estimate():
+    result = estimate_cluster_ratio([(100, 0), (100, 20), (100, 5), (100, 15)], 100000)
+    assert result['estimate'] == 10000
+    assert result['ci_low'] < result['estimate'] < result['ci_high']
+    assert result['ci_high'] - result['estimate'] == result['margin_of_error']
+    assert 0 < result['relative_error'] < 1
+
+def test_interval_is_clamped_at_zero():
+    result = estimate_cluster_ratio([(100, 0), (100, 0), (100, 3)], 100000)
+    assert result['ci_low'] == 0
+    assert result['ci_high'] > result['estimate']
+
+def test_sampling_every_cluster_removes_the_margin():
+    """The finite population correction is zero once all clusters were read"""
+    result = estimate_cluster_ratio([(100, 0), (100, 20)], 200, total_clusters=2)
+    assert result['estimate'] == 20
+    assert result['margin_of_error'] == 0
+
+def test_single_cluster_falls_back_to_binomial_error():
+    result = estimate_cluster_ratio([(400, 100)], 10000)
+    # z(95%) * sqrt(0.25 * 0.75 / 400) * 10000
+    assert result['margin_of_error'] == 424
+
+def test_confidence_labels_follow_relative_error():
+    assert sampling_confidence_label(0.05) == 'High'
+    assert sampling_confidence_label(0.1) == 'High'
+    assert sampling_confidence_label(0.2) == 'Medium'
+    assert sampling_confidence_label(0.25) == 'Medium'
+    assert sampling_confidence_label(0.5) == 'Low'
+
+class FakeSalesforce:
+    """Returns fixed lowest and highest Ids and one record per window query"""
+
+    def __init__(self, low_id, high_id):
+        self.low_id, self.high_id = low_id, high_id
+        self.queries = []
+
+    def query(self, soql):
+        self.queries.append(soql)
+        if 'ORDER BY Id ASC LIMIT 1' in soql:
+            return {'records': [{'Id': self.low_id}]}
+        if 'ORDER BY Id DESC LIMIT 1' in soql:
+            return {'records': [{'Id': self.high_id}]}
+        if 'MIN(CreatedDate)' in soql:
+            return {'records': [{'first_created': '2020-01-01T00:00:00.000+0000', 'last_created': '2024-01-01T00:00:00.000+0000'}]}
+        return {'records': [{'Id': f"record{len(self.queries)}"}]}
+
+def test_ids_on_one_pod_are_sampled_by_id_range():
+    sf = FakeSalesforce('003000000000001AAA', '003000000zzzzzzAAA')
+    method, windows = draw_record_sample(sf, 'Contact', ['Id'], windows=4)
+    assert method == 'id_range'
+    assert windows
+    assert all("Id >= '003000" in soql for soql in sf.queries[2:])
+
+def test_ids_across_pods_fall_back_to_created_date_windows():
+    sf = FakeSalesforce('003000000000001AAA', '003A00000000001AAA')
+    method, windows = draw_record_sample(sf, 'Contact', ['Id'], windows=4)
+    assert method == 'created_date'
+    assert windows
+    assert all('CreatedDate >=' in soql for soql in sf.queries[3:])